@@ -1,12 +1,162 @@
+from datetime import timedelta
+
+from django.conf import settings
 from django.contrib import admin
-from .models import Competition, Participant
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.auth.models import User
+from django.core.paginator import Paginator
+from django.db.models import Max, Min, Q, QuerySet
+from django.utils import timezone
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+from .database import estimate_count
+from .models import (
+    ArchivedCompetition, ArchivedParticipant, Competition, Participant, StatusTransition, WaitlistEntry,
+)
+from .search import get_archive_backend, get_backend
+
+# Поиск участников затрагивает не больше стольких самых релевантных соревнований
+SEARCH_COMPETITIONS_LIMIT = 1000
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Пагинатор больших списков админки: без фильтров число строк берется из
+    оценки (``database.estimate_count``), если она не меньше
+    ``ADMIN_COUNT_ESTIMATE_THRESHOLD``; с фильтрами считается точно.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.has_filters():
+            estimate = estimate_count(queryset.model, queryset.db)
+            if estimate is not None and estimate >= getattr(settings, 'ADMIN_COUNT_ESTIMATE_THRESHOLD', 50000):
+                return estimate
+        return super().count
+
+
+def _next_period(moment, kind):
+    if kind == 'year':
+        return moment.replace(year=moment.year + 1)
+    if kind == 'month':
+        return moment.replace(year=moment.year + moment.month // 12, month=moment.month % 12 + 1)
+    return moment + timedelta(days=1)
+
+
+class DateHierarchyQuerySet(QuerySet):
+    """
+    Уровни ``date_hierarchy`` без прохода по всем строкам: вместо DISTINCT по
+    усеченной дате — границы Min и Max (по одной из индекса) и для каждого года (месяца, дня) между
+    ними один поиск ``EXISTS`` по диапазону индекса на поле даты
+    """
+
+    def aggregate(self, *args, **kwargs):
+        # Min и Max отдельными запросами: SQLite читает границу из индекса,
+        # только если агрегат в запросе один (иначе — проход по таблице)
+        if not args and len(kwargs) > 1 and all(isinstance(value, (Min, Max)) for value in kwargs.values()):
+            return {name: super(DateHierarchyQuerySet, self).aggregate(value=value)['value']
+                    for name, value in kwargs.items()}
+        return super().aggregate(*args, **kwargs)
+
+    def datetimes(self, field_name, kind, order='ASC', tzinfo=None):
+        if kind not in ('year', 'month', 'day'):
+            return super().datetimes(field_name, kind, order, tzinfo)
+        bounds = self.aggregate(first=Min(field_name), last=Max(field_name))
+        if bounds['first'] is None:
+            return []
+        first, last = timezone.localtime(bounds['first']), timezone.localtime(bounds['last'])
+        period = first.replace(
+            month=first.month if kind != 'year' else 1,
+            day=first.day if kind == 'day' else 1,
+            hour=0, minute=0, second=0, microsecond=0,
+        )
+        periods = []
+        while period <= last:
+            following = _next_period(period, kind)
+            if self.filter(**{f'{field_name}__gte': period, f'{field_name}__lt': following}).exists():
+                periods.append(period)
+            period = following
+        return periods[::-1] if order == 'DESC' else periods
+
+
+class DateHierarchyChangeList(ChangeList):
+    def get_queryset(self, request, exclude_parameters=None):
+        queryset = super().get_queryset(request, exclude_parameters)
+        indexed = DateHierarchyQuerySet(model=queryset.model, query=queryset.query.chain(), using=queryset._db)
+        indexed._prefetch_related_lookups = queryset._prefetch_related_lookups
+        return indexed
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # Без второго COUNT(*) по всей таблице при включенном фильтре или поиске
+    show_full_result_count = False
+
+
+class CompetitionFilter(admin.SimpleListFilter):
+    """
+    Фильтр по соревнованию без перечисления всех соревнований: показывается
+    только выбранное. Выбирается ссылкой в столбце «Соревнование».
+    """
+    title = "соревнование"
+    parameter_name = 'competition'
+
+    def lookups(self, request, model_admin):
+        value = self.value()
+        if not value or not value.isdigit():
+            return []
+        return list(Competition.objects.filter(pk=value).values_list('pk', 'name'))
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if value and value.isdigit():
+            return queryset.filter(competition_id=value)
+        return queryset
+
+
+class RegistrationAdmin(LargeTableAdmin):
+    """Общие настройки списков участников и листа ожидания"""
+    list_filter = (CompetitionFilter,)
+    list_select_related = ('user', 'competition')
+    autocomplete_fields = ('user', 'competition')
+    search_fields = ('user__username', 'competition__name')
+    search_help_text = "Начало имени пользователя или слова из названия соревнования"
+
+    @admin.display(description="Соревнование")
+    def competition_link(self, obj):
+        return format_html(
+            '<a href="?{}={}">{}</a>', CompetitionFilter.parameter_name, obj.competition_id, obj.competition.name
+        )
+
+    def get_search_results(self, request, queryset, search_term):
+        # Вместо icontains через JOIN: начало имени пользователя и полнотекстовый
+        # индекс соревнований, затем выборка по индексам competition_id/user_id.
+        # Соревнования выбираются отдельным запросом: таблица индекса,
+        # присоединенная через extra(), не работает во вложенном подзапросе
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        backend = get_backend()
+        users = User.objects.filter(username__istartswith=search_term).values('pk')
+        competitions = list(
+            backend.search(Competition.objects.all(), search_term)
+            .order_by(*backend.ordering)
+            .values_list('pk', flat=True)[:SEARCH_COMPETITIONS_LIMIT]
+        )
+        return queryset.filter(Q(user__in=users) | Q(competition__in=competitions)), False
+
 
 @admin.register(Competition)
-class CompetitionAdmin(admin.ModelAdmin):
+class CompetitionAdmin(LargeTableAdmin):
     list_display = ('name', 'sport_type', 'location', 'start_date', 'status', 'created_by')
     list_filter = ('status', 'sport_type', 'is_public', 'start_date')
+    list_select_related = ('created_by',)
     search_fields = ('name', 'description', 'location')
+    # Уровни иерархии дат строятся поиском по индексу start_date (DateHierarchyQuerySet)
     date_hierarchy = 'start_date'
+    autocomplete_fields = ('created_by',)
     readonly_fields = ('created_at', 'updated_at')
     fieldsets = (
         ('Основная информация', {
@@ -27,8 +177,60 @@ class CompetitionAdmin(admin.ModelAdmin):
         }),
     )
 
+    def get_changelist(self, request, **kwargs):
+        return DateHierarchyChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Полнотекстовый индекс (search.py) вместо icontains по трем столбцам;
+        # используется и автодополнением полей соревнования
+        if not search_term.strip():
+            return queryset, False
+        return get_backend().search(queryset, search_term), False
+
 @admin.register(Participant)
-class ParticipantAdmin(admin.ModelAdmin):
+class ParticipantAdmin(RegistrationAdmin):
+    list_display = ('user', 'competition_link', 'registration_date', 'is_confirmed')
+    list_filter = ('is_confirmed', CompetitionFilter)
+
+@admin.register(WaitlistEntry)
+class WaitlistEntryAdmin(RegistrationAdmin):
+    list_display = ('user', 'competition_link', 'created_at')
+
+@admin.register(StatusTransition)
+class StatusTransitionAdmin(LargeTableAdmin):
+    list_display = ('competition', 'from_status', 'to_status', 'changed_at')
+    list_filter = ('to_status',)
+    list_select_related = ('competition',)
+    raw_id_fields = ('competition',)
+
+
+class ReadOnlyAdmin(LargeTableAdmin):
+    """Архив только для просмотра: записи в него переносит archive_competitions"""
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(ArchivedCompetition)
+class ArchivedCompetitionAdmin(ReadOnlyAdmin):
+    list_display = ('name', 'sport_type', 'location', 'start_date', 'status', 'archived_at')
+    list_filter = ('status', 'sport_type', 'is_public')
+    list_select_related = ('created_by',)
+    search_fields = ('name', 'description', 'location')
+
+    def get_search_results(self, request, queryset, search_term):
+        if not search_term.strip():
+            return queryset, False
+        return get_archive_backend().search(queryset, search_term), False
+
+@admin.register(ArchivedParticipant)
+class ArchivedParticipantAdmin(ReadOnlyAdmin):
     list_display = ('user', 'competition', 'registration_date', 'is_confirmed')
-    list_filter = ('is_confirmed', 'competition')
-    search_fields = ('user__username', 'competition__name')
\ No newline at end of file
+    list_select_related = ('user', 'competition')
+    raw_id_fields = ('user', 'competition')
@@ -0,0 +1,216 @@
+"""
+JSON API только для чтения: список соревнований, карточка и участники.
+
+* фильтры те же, что у SearchForm (``query``, ``sport_type``, ``status``);
+* видимость как у HTML-страниц: закрытые соревнования доступны только
+  с правом ``competitions.can_view_all``;
+* участников видят только организатор соревнования и пользователи с правом
+  ``competitions.can_edit_competition``;
+* ``fields=name,start_date`` выбирает поля ответа, в запрос к базе попадают
+  только они (плюс ключ пагинации);
+* курсорная пагинация параметрами ``after``/``before`` и ``limit``;
+* ETag / If-None-Match: неизменившийся ответ возвращается как 304.
+
+Строки сериализуются из ``.values()``, экземпляры моделей не создаются.
+"""
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db.models import F
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, set_response_etag
+from django.views.decorators.http import require_GET
+
+from .forms import SearchForm
+from .models import Participant
+from .pagination import KeysetPaginator, page_url
+from .queries import filter_competitions
+
+COMPETITION_FIELDS = {
+    'id': 'id',
+    'name': 'name',
+    'description': 'description',
+    'sport_type': 'sport_type',
+    'location': 'location',
+    'start_date': 'start_date',
+    'end_date': 'end_date',
+    'max_participants': 'max_participants',
+    'current_participants': 'current_participants',
+    'available_slots': F('max_participants') - F('current_participants'),
+    'status': 'status',
+    'is_public': 'is_public',
+    'registration_deadline': 'registration_deadline',
+    'organizer': F('created_by__username'),
+    'created_at': 'created_at',
+    'updated_at': 'updated_at',
+}
+
+DEFAULT_LIST_FIELDS = (
+    'id', 'name', 'sport_type', 'location', 'start_date', 'end_date',
+    'status', 'current_participants', 'max_participants',
+)
+
+PARTICIPANT_FIELDS = {
+    'id': 'id',
+    'username': F('user__username'),
+    'registration_date': 'registration_date',
+    'is_confirmed': 'is_confirmed',
+}
+
+MAX_PAGE_SIZE = 100
+
+
+class APIError(Exception):
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def _json_response(request, payload, status=200):
+    response = JsonResponse(payload, status=status, json_dumps_params={'ensure_ascii': False})
+    if status != 200:
+        return response
+    set_response_etag(response)
+    return get_conditional_response(request, etag=response.headers['ETag'], response=response)
+
+
+def _error_response(exc):
+    return JsonResponse({'error': exc.message}, status=exc.status,
+                        json_dumps_params={'ensure_ascii': False})
+
+
+def _api_view(view):
+    """Общая обработка ошибок API: ответы в JSON вместо HTML-страниц"""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            try:
+                return await view(request, *args, **kwargs)
+            except APIError as exc:
+                return _error_response(exc)
+    else:
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            try:
+                return view(request, *args, **kwargs)
+            except APIError as exc:
+                return _error_response(exc)
+    return require_GET(wrapper)
+
+
+def _requested_fields(request, available, default):
+    raw = request.GET.get('fields')
+    if not raw:
+        return list(default)
+    fields = [name.strip() for name in raw.split(',') if name.strip()]
+    unknown = [name for name in fields if name not in available]
+    if unknown:
+        raise APIError(f"Неизвестные поля: {', '.join(unknown)}")
+    return fields
+
+
+def _values(queryset, fields, available, extra=()):
+    """Проекция queryset на выбранные поля API (и служебные поля extra)"""
+    names = list(dict.fromkeys([*fields, *extra]))
+    plain = [name for name in names if isinstance(available.get(name, name), str)]
+    expressions = {name: available[name] for name in names if name not in plain}
+    return queryset.values(*plain, **expressions)
+
+
+def _page_size(request):
+    default = getattr(settings, 'COMPETITIONS_PAGE_SIZE', 20)
+    try:
+        limit = int(request.GET.get('limit', default))
+    except ValueError:
+        raise APIError("Параметр limit должен быть числом")
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def _paginator(request, queryset, ordering):
+    paginator = KeysetPaginator(queryset, per_page=_page_size(request), ordering=ordering)
+    for name in ('after', 'before'):
+        cursor = request.GET.get(name)
+        if cursor and paginator.decode_cursor(cursor) is None:
+            raise APIError(f"Некорректный курсор {name}")
+    return paginator
+
+
+def _paginated(request, queryset, fields, ordering):
+    page = _paginator(request, queryset, ordering).get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return _page_payload(request, page, fields)
+
+
+def _page_payload(request, page, fields):
+    return {
+        'results': [{name: row[name] for name in fields} for row in page],
+        'next': page_url(request, after=page.next_cursor) if page.has_next else None,
+        'previous': page_url(request, before=page.previous_cursor) if page.has_previous else None,
+    }
+
+
+def _visible_competitions(request):
+    return filter_competitions({}, request.user.has_perm('competitions.can_view_all'))[0]
+
+
+def _competition_list_query(request, can_view_all):
+    """Проекция списка соревнований: (queryset, поля ответа, сортировка)"""
+    form = SearchForm(request.GET)
+    if not form.is_valid():
+        raise APIError(form.errors.get_json_data())
+    fields = _requested_fields(request, COMPETITION_FIELDS, DEFAULT_LIST_FIELDS)
+    competitions, ordering = filter_competitions(form.cleaned_data, can_view_all)
+    key_fields = [name.lstrip('-') for name in ordering]
+    queryset = _values(competitions, fields, COMPETITION_FIELDS, extra=key_fields)
+    return queryset, fields, ordering
+
+
+@_api_view
+def competition_list(request):
+    queryset, fields, ordering = _competition_list_query(
+        request,
+        request.user.has_perm('competitions.can_view_all'),
+    )
+    return _json_response(request, _paginated(request, queryset, fields, ordering))
+
+
+@_api_view
+def competition_detail(request, pk):
+    fields = _requested_fields(request, COMPETITION_FIELDS, COMPETITION_FIELDS)
+    row = _values(_visible_competitions(request).filter(pk=pk), fields, COMPETITION_FIELDS).first()
+    if row is None:
+        raise APIError("Соревнование не найдено", status=404)
+    return _json_response(request, row)
+
+
+def _check_participants_access(user, can_edit, owners):
+    """
+    Список участников видят организатор соревнования и редакторы, как и
+    выгрузку (``views.export_participants``); ``owners`` — pk организатора
+    видимого соревнования или пустой список
+    """
+    if not owners:
+        raise APIError("Соревнование не найдено", status=404)
+    if not (can_edit or user.pk == owners[0]):
+        raise APIError("Нет прав на просмотр участников этого соревнования", status=403)
+
+
+@_api_view
+def competition_participants(request, pk):
+    _check_participants_access(
+        request.user,
+        request.user.has_perm('competitions.can_edit_competition'),
+        list(_visible_competitions(request).filter(pk=pk).values_list('created_by_id', flat=True)),
+    )
+    fields = _requested_fields(request, PARTICIPANT_FIELDS, PARTICIPANT_FIELDS)
+    participants = _values(
+        Participant.objects.filter(competition_id=pk),
+        fields,
+        PARTICIPANT_FIELDS,
+        extra=['id'],
+    )
+    return _json_response(request, _paginated(request, participants, fields, ('id',)))
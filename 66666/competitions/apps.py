@@ -3,4 +3,7 @@ from django.apps import AppConfig
 class CompetitionsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'competitions'
-    verbose_name = "Соревнования"
\ No newline at end of file
+    verbose_name = "Соревнования"
+
+    def ready(self):
+        from . import checks, signals  # noqa: F401
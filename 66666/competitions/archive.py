@@ -0,0 +1,153 @@
+"""
+Перенос завершенных и отмененных соревнований в архивные таблицы.
+
+Соревнования со статусом ``completed`` или ``cancelled``, закончившиеся
+больше ``ARCHIVE_AFTER_DAYS`` дней назад, переносятся пачками в
+``ArchivedCompetition`` вместе с участниками (``ArchivedParticipant``), а
+из рабочих таблиц удаляются. Список, поиск и счетчики фильтров работают
+только с рабочими таблицами, поэтому их скорость зависит от числа текущих
+соревнований, а не от всей истории.
+
+Каждая пачка — отдельная транзакция: копирование, удаление и поправки
+производных данных фиксируются вместе. Прерванный запуск можно повторить —
+перенесенные пачки уже удалены из рабочей таблицы, а следующие будут
+выбраны заново.
+
+Строки удаляются без ``Collector`` и сигналов: сигнал удаления участника
+уменьшал бы счетчик соревнования, которое удаляется в той же пачке.
+Поэтому здесь же вычитаются счетчики фильтров (``facets.apply``), из
+поискового индекса удаляются перенесенные соревнования, а в индекс архива
+добавляются, и сбрасывается кэш страниц. Лист ожидания и журнал смены
+статусов перенесенных соревнований удаляются. В конце запуска обновляется
+статистика таблиц (``database.analyze``).
+"""
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import database, facets, page_cache
+from .models import (
+    ArchivedCompetition, ArchivedParticipant, Competition, Participant, StatusTransition, WaitlistEntry,
+)
+from .search import get_archive_backend, get_backend
+
+ARCHIVED_STATUSES = ('completed', 'cancelled')
+
+COMPETITION_FIELDS = (
+    'id', 'name', 'description', 'sport_type', 'location', 'start_date', 'end_date',
+    'max_participants', 'current_participants', 'status', 'is_public',
+    'registration_deadline', 'created_by_id', 'created_at', 'updated_at',
+)
+PARTICIPANT_FIELDS = ('id', 'competition_id', 'user_id', 'registration_date', 'is_confirmed')
+
+
+class ArchiveReport:
+    """Число перенесенных соревнований и участников"""
+
+    def __init__(self):
+        self.batches = 0
+        self.competitions = 0
+        self.participants = 0
+
+
+def get_cutoff(days=None):
+    if days is None:
+        days = getattr(settings, 'ARCHIVE_AFTER_DAYS', 180)
+    return timezone.now() - timedelta(days=days)
+
+
+def candidates(cutoff):
+    """Соревнования, которые пора перенести в архив"""
+    return Competition.objects.filter(status__in=ARCHIVED_STATUSES, end_date__lt=cutoff)
+
+
+def _delete(queryset):
+    # Без Collector: каскады и сигналы обрабатываются в archive_batch
+    return queryset._raw_delete(queryset.db)
+
+
+def archive_batch(pks, batch_size=1000):
+    """Переносит соревнования ``pks`` с участниками; возвращает (соревнований, участников)"""
+    with transaction.atomic():
+        # Блокировка строк пачки: соревнование не изменится между копированием и удалением
+        rows = list(
+            Competition.objects.select_for_update()
+            .filter(pk__in=pks, status__in=ARCHIVED_STATUSES)
+            .values(*COMPETITION_FIELDS)
+        )
+        if not rows:
+            return 0, 0
+        pks = [row['id'] for row in rows]
+        # ignore_conflicts: строки, уже попавшие в архив, не мешают повторному запуску
+        ArchivedCompetition.objects.bulk_create(
+            [ArchivedCompetition(**row) for row in rows],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        participants = Participant.objects.filter(competition_id__in=pks)
+        moved = 0
+        batch = []
+        for row in participants.order_by().values(*PARTICIPANT_FIELDS).iterator(chunk_size=batch_size):
+            batch.append(ArchivedParticipant(**row))
+            if len(batch) >= batch_size:
+                ArchivedParticipant.objects.bulk_create(batch, ignore_conflicts=True)
+                moved += len(batch)
+                batch = []
+        ArchivedParticipant.objects.bulk_create(batch, ignore_conflicts=True)
+        moved += len(batch)
+
+        for model in (Participant, WaitlistEntry, StatusTransition):
+            _delete(model.objects.filter(competition_id__in=pks))
+        _delete(Competition.objects.filter(pk__in=pks))
+
+        deltas = Counter()
+        for row in rows:
+            deltas.update(facets.keys(row['sport_type'], row['status'], row['is_public']))
+        facets.apply({key: -delta for key, delta in deltas.items()})
+        get_backend().remove(pks)
+        get_archive_backend().index_rows(
+            [(row['id'], row['name'], row['location'], row['description']) for row in rows]
+        )
+        page_cache.invalidate_competitions(pks)
+    return len(rows), moved
+
+
+def archive(cutoff=None, batch_size=500, limit=None, pause=0, dry_run=False, progress=None):
+    """
+    Переносит в архив соревнования, закончившиеся до ``cutoff``, пачками
+    по ``batch_size``. Возвращает ``ArchiveReport``; при ``dry_run`` только
+    считает кандидатов.
+    """
+    cutoff = cutoff or get_cutoff()
+    report = ArchiveReport()
+    if dry_run:
+        report.competitions = candidates(cutoff).count()
+        report.participants = Participant.objects.filter(competition__in=candidates(cutoff)).count()
+        return report
+
+    last_pk = 0
+    while limit is None or report.competitions < limit:
+        size = batch_size if limit is None else min(batch_size, limit - report.competitions)
+        pks = list(
+            candidates(cutoff).filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:size]
+        )
+        if not pks:
+            break
+        last_pk = pks[-1]
+        competitions, participants = archive_batch(pks)
+        report.batches += 1
+        report.competitions += competitions
+        report.participants += participants
+        if progress:
+            progress(report)
+        if pause:
+            # Пауза между пачками дает место записи регистраций
+            time.sleep(pause)
+    if report.competitions:
+        # Оценка размера таблиц в админке берется из статистики
+        database.analyze([Competition, Participant, WaitlistEntry, ArchivedCompetition, ArchivedParticipant])
+    return report
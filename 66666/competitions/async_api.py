@@ -0,0 +1,64 @@
+"""
+Асинхронные версии эндпоинтов JSON API (см. ``api.py``): тот же формат
+ответов, фильтры, проекция полей, пагинация и ETag, но запросы к базе
+выполняются асинхронным ORM. Подключаются при ``ASYNC_READ_VIEWS``.
+"""
+from .api import (
+    COMPETITION_FIELDS, PARTICIPANT_FIELDS, APIError, _api_view,
+    _check_participants_access, _competition_list_query, _json_response,
+    _page_payload, _paginator, _requested_fields, _values,
+)
+from .models import Participant
+from .queries import filter_competitions
+
+
+async def _can_view_all(request):
+    user = await request.auser()
+    return await user.ahas_perm('competitions.can_view_all')
+
+
+async def _paginated(request, queryset, fields, ordering):
+    page = await _paginator(request, queryset, ordering).aget_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return _page_payload(request, page, fields)
+
+
+async def _visible_competitions(request):
+    return filter_competitions({}, await _can_view_all(request))[0]
+
+
+@_api_view
+async def competition_list(request):
+    queryset, fields, ordering = _competition_list_query(request, await _can_view_all(request))
+    return _json_response(request, await _paginated(request, queryset, fields, ordering))
+
+
+@_api_view
+async def competition_detail(request, pk):
+    fields = _requested_fields(request, COMPETITION_FIELDS, COMPETITION_FIELDS)
+    competitions = await _visible_competitions(request)
+    row = await _values(competitions.filter(pk=pk), fields, COMPETITION_FIELDS).afirst()
+    if row is None:
+        raise APIError("Соревнование не найдено", status=404)
+    return _json_response(request, row)
+
+
+@_api_view
+async def competition_participants(request, pk):
+    competitions = await _visible_competitions(request)
+    user = await request.auser()
+    _check_participants_access(
+        user,
+        await user.ahas_perm('competitions.can_edit_competition'),
+        [owner async for owner in competitions.filter(pk=pk).values_list('created_by_id', flat=True)],
+    )
+    fields = _requested_fields(request, PARTICIPANT_FIELDS, PARTICIPANT_FIELDS)
+    participants = _values(
+        Participant.objects.filter(competition_id=pk),
+        fields,
+        PARTICIPANT_FIELDS,
+        extra=['id'],
+    )
+    return _json_response(request, await _paginated(request, participants, fields, ('id',)))
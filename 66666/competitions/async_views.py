@@ -0,0 +1,166 @@
+"""
+Асинхронные версии страниц только для чтения: списка и карточки соревнования.
+
+Подключаются вместо ``views.competition_list``/``views.competition_detail``
+при ``ASYNC_READ_VIEWS`` (по умолчанию — при запуске через ``asgi.py``).
+Данные выбираются асинхронным ORM (``aget``, ``aexists``, ``async for``),
+пользователь — через ``request.auser()``, права — через ``ahas_perm()`` с тем
+же кэшем ``CachedModelBackend``. Шаблон рендерит обработчик Django
+(``TemplateResponse``) в синхронном потоке, поэтому ленивые обращения к базе
+из шаблонов, например ``waitlist_entry.position``, остаются допустимыми.
+
+Здесь же поток событий ``competition_events`` (Server-Sent Events) с числом
+участников: он держит соединение открытым и поэтому имеет смысл только под
+ASGI. Маршрут регистрируется только при ``ASYNC_READ_VIEWS``, а запрос,
+пришедший не через ASGI, получает 404; карточка подключается к потоку
+только в асинхронном режиме.
+"""
+import asyncio
+import json
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.exceptions import PermissionDenied
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+
+from . import facets, http_cache, live, page_cache
+from .forms import SearchForm
+from .models import ArchivedCompetition, Competition, Participant, WaitlistEntry
+from .views import _competition_paginator, _page_context
+
+
+async def _auser(request):
+    user = await request.auser()
+    # Контекстный процессор auth и PermWrapper читают request.user:
+    # подставляем уже загруженного пользователя, чтобы не загружать его повторно
+    request.user = user
+    return user
+
+
+async def competition_list(request):
+    user = await _auser(request)
+    can_view_all = await user.ahas_perm('competitions.can_view_all')
+    form = SearchForm(request.GET or None, facet_counts=await facets.aget_counts(can_view_all))
+    filters = form.cleaned_data if form.is_valid() else {}
+
+    # Страница кэшируется по фильтрам, курсору и уровню доступа
+    cache_key = await page_cache.alist_key(
+        'all' if can_view_all else 'public',
+        dict(filters, after=request.GET.get('after'), before=request.GET.get('before')),
+    )
+    page_data = await page_cache.aload(cache_key)
+    if page_data is None:
+        page = await _competition_paginator(filters, can_view_all).aget_page(
+            after=request.GET.get('after'),
+            before=request.GET.get('before'),
+        )
+        page_data = _page_context(request, page)
+        await page_cache.astore(cache_key, page_data)
+
+    context = {
+        **page_data,
+        'form': form,
+        'can_create': await user.ahas_perm('competitions.can_create_competition'),
+        'page_cache_key': cache_key,
+        'page_cache_timeout': page_cache.get_timeout(),
+    }
+    return TemplateResponse(request, 'competitions/competition_list.html', context)
+
+
+async def competition_detail(request, pk):
+    cache_key = await page_cache.adetail_key(pk)
+    competition = await page_cache.aload(cache_key)
+    if competition is None:
+        competition = await Competition.objects.select_related('created_by').filter(pk=pk).afirst()
+        if competition is None:
+            # Старые ссылки на перенесенные в архив соревнования
+            if await ArchivedCompetition.objects.filter(pk=pk).aexists():
+                return redirect('archive_detail', pk=pk, permanent=True)
+            raise Http404("Соревнование не найдено")
+        await page_cache.astore(cache_key, competition)
+
+    user = await _auser(request)
+    # Проверка доступа
+    if not competition.is_public and not await user.ahas_perm('competitions.can_view_all'):
+        messages.error(request, "У вас нет доступа к этому соревнованию")
+        return redirect('competition_list')
+
+    is_participant = False
+    waitlist_entry = None
+    if user.is_authenticated:
+        is_participant = await Participant.objects.filter(
+            competition=competition,
+            user=user
+        ).aexists()
+        if not is_participant:
+            waitlist_entry = await WaitlistEntry.objects.filter(
+                competition=competition,
+                user=user
+            ).afirst()
+
+    is_owner = user == competition.created_by
+    context = {
+        'competition': competition,
+        'is_participant': is_participant,
+        'waitlist_entry': waitlist_entry,
+        'can_edit': await user.ahas_perm('competitions.can_edit_competition') or is_owner,
+        'can_delete': await user.ahas_perm('competitions.can_delete_competition') or is_owner,
+        'can_register': await user.ahas_perm('competitions.can_register_participant'),
+        'page_cache_key': cache_key,
+        'page_cache_timeout': page_cache.get_timeout(),
+        'live_updates': True,
+    }
+    validators = http_cache.DetailValidators(competition, http_cache.viewer_state(user, context))
+    response = validators.not_modified(request)
+    if response is None:
+        response = TemplateResponse(request, 'competitions/competition_detail.html', context)
+    return validators.patch(request, response)
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _participant_events(competition_id):
+    # Подписка оформляется до чтения начального снимка, чтобы не пропустить изменение между ними
+    subscription = live.get_broker().subscribe(competition_id)
+    heartbeat = getattr(settings, 'LIVE_UPDATES_HEARTBEAT', 15)
+    try:
+        last = await live.aget_snapshot(competition_id)
+        if last is None:
+            return
+        yield _event('participants', last)
+        while True:
+            try:
+                value = await asyncio.wait_for(subscription.get(), heartbeat)
+            except asyncio.TimeoutError:
+                # Комментарий не дает прокси закрыть простаивающее соединение
+                yield ": ping\n\n"
+                continue
+            if value != last:
+                last = value
+                yield _event('participants', value)
+    finally:
+        subscription.close()
+
+
+async def competition_events(request, pk):
+    if not isinstance(request, ASGIRequest):
+        # Под WSGI бесконечный поток читался бы через async_to_sync и не завершился бы никогда
+        raise Http404("Поток событий доступен только под ASGI")
+    is_public = await Competition.objects.filter(pk=pk).values_list('is_public', flat=True).afirst()
+    if is_public is None:
+        raise Http404("Соревнование не найдено")
+    if not is_public:
+        user = await request.auser()
+        if not await user.ahas_perm('competitions.can_view_all'):
+            raise PermissionDenied
+
+    response = StreamingHttpResponse(_participant_events(pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # nginx не должен буферизовать поток
+    response['X-Accel-Buffering'] = 'no'
+    return response
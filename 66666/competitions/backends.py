@@ -0,0 +1,68 @@
+"""
+Бэкенд аутентификации с общим кэшем прав.
+
+``ModelBackend`` запоминает права только на время жизни объекта пользователя,
+то есть в пределах одного запроса. Здесь набор прав пользователя (собственные
+и полученные через группы) хранится в кэше Django (``PERMISSION_CACHE_ALIAS``),
+общем для всех процессов, поэтому после прогрева проверки ``has_perm`` и
+``perms.*`` в шаблонах не обращаются к базе данных. Асинхронные проверки
+(``ahas_perm``) читают тот же кэш. Если кэш прав — память процесса, срок
+записей ограничен (см. ``shared_cache.py``).
+
+Записи сбрасываются сигналами (см. ``signals.py``) при изменении прав групп,
+членства в группах, прав пользователя и флагов ``is_superuser``/``is_active``.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import caches
+from django.db import transaction
+
+from . import shared_cache
+
+
+def get_permission_cache():
+    return caches[getattr(settings, 'PERMISSION_CACHE_ALIAS', 'default')]
+
+
+def permission_cache_key(user_id):
+    return f"competitions:perms:{user_id}"
+
+
+def get_timeout(cache):
+    return shared_cache.get_timeout(cache, getattr(settings, 'PERMISSION_CACHE_TIMEOUT', 3600))
+
+
+def invalidate_permissions(user_ids):
+    """Сбрасывает кэш прав пользователей после фиксации транзакции"""
+    keys = [permission_cache_key(user_id) for user_id in user_ids]
+    if keys:
+        transaction.on_commit(lambda: get_permission_cache().delete_many(keys))
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            cache = get_permission_cache()
+            key = permission_cache_key(user_obj.pk)
+            perms = cache.get(key)
+            if perms is None:
+                perms = super().get_all_permissions(user_obj)
+                cache.set(key, perms, get_timeout(cache))
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
+
+    async def aget_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, '_perm_cache'):
+            cache = get_permission_cache()
+            key = permission_cache_key(user_obj.pk)
+            perms = await cache.aget(key)
+            if perms is None:
+                perms = await super().aget_all_permissions(user_obj)
+                await cache.aset(key, perms, get_timeout(cache))
+            user_obj._perm_cache = perms
+        return user_obj._perm_cache
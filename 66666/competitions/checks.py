@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.core import checks
+
+from . import backends, page_cache, shared_cache
+from .hashers import LoadTestPBKDF2PasswordHasher
+
+LOADTEST_HASHER = f'{LoadTestPBKDF2PasswordHasher.__module__}.{LoadTestPBKDF2PasswordHasher.__name__}'
+
+
+@checks.register(checks.Tags.security, deploy=True)
+def check_loadtest_hasher(app_configs, **kwargs):
+    # Дешевый хэшер допустим только на нагрузочном стенде
+    if settings.PASSWORD_HASHERS and settings.PASSWORD_HASHERS[0] == LOADTEST_HASHER:
+        return [checks.Warning(
+            "Новые пароли хэшируются дешевым хэшером нагрузочного стенда",
+            hint="Уберите PASSWORD_HASHER_PROFILE=loadtest на рабочем сервере",
+            id='competitions.W001',
+        )]
+    return []
+
+
+@checks.register(checks.Tags.caches, deploy=True)
+def check_process_local_caches(app_configs, **kwargs):
+    # Сброс кэша прав и страниц в памяти процесса не виден другим процессам
+    names = [
+        name for name, cache in (
+            ('PERMISSION_CACHE_ALIAS', backends.get_permission_cache()),
+            ('PAGE_CACHE_ALIAS', page_cache.get_page_cache()),
+        )
+        if shared_cache.is_process_local(cache)
+    ]
+    if names:
+        return [checks.Warning(
+            f"{', '.join(names)}: кэш в памяти процесса, отозванные права и старые страницы "
+            f"видны другим процессам до LOCAL_CACHE_TIMEOUT секунд",
+            hint="Используйте CACHE_PROFILE=shared или memcached/redis",
+            id='competitions.W002',
+        )]
+    return []
@@ -0,0 +1,79 @@
+"""
+Настройка соединений SQLite: PRAGMA из ``SQLITE_PRAGMAS`` выполняются при
+открытии каждого соединения (сигнал ``connection_created``).
+
+journal_mode=WAL сохраняется в самом файле базы, остальные PRAGMA действуют
+только в пределах соединения, поэтому вместе с ними включаются постоянные
+соединения (``CONN_MAX_AGE``).
+
+Здесь же ``estimate_count()`` — оценка размера таблицы без ``COUNT(*)``.
+"""
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+def get_pragmas():
+    return getattr(settings, 'SQLITE_PRAGMAS', {})
+
+
+def apply_pragmas(cursor, pragmas):
+    for name, value in pragmas.items():
+        if not name.isidentifier():
+            raise ValueError(f"Недопустимое имя PRAGMA: {name}")
+        cursor.execute(f"PRAGMA {name} = {value}")
+
+
+def configure_connection(connection):
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = get_pragmas()
+    if not pragmas:
+        return
+    # Курсор драйвера, а не Django: PRAGMA не попадают в execute_wrapper
+    # и не засчитываются в бюджет запросов первого запроса на соединении
+    cursor = connection.connection.cursor()
+    try:
+        apply_pragmas(cursor, pragmas)
+    finally:
+        cursor.close()
+
+
+def estimate_count(model, using=DEFAULT_DB_ALIAS):
+    """
+    Приблизительное число строк таблицы модели без полного подсчета:
+    статистика планировщика — ``reltuples`` PostgreSQL или ``sqlite_stat1``
+    SQLite (заполняется ``ANALYZE``, см. ``analyze()``). Возвращает None,
+    если статистики нет: тогда строки считаются точно.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [connection.ops.quote_name(table)]
+            )
+            row = cursor.fetchone()
+            # -1: таблица еще ни разу не анализировалась
+            return row[0] if row and row[0] >= 0 else None
+        if connection.vendor == 'sqlite':
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                return None
+            # Первое число stat — строк в индексе на момент ANALYZE; частичные
+            # индексы меньше таблицы, поэтому берется наибольшее
+            cursor.execute("SELECT MAX(CAST(stat AS INTEGER)) FROM sqlite_stat1 WHERE tbl = %s", [table])
+            return cursor.fetchone()[0]
+    return None
+
+
+def analyze(models, using=DEFAULT_DB_ALIAS):
+    """
+    Обновляет статистику таблиц после массового удаления или вставки, чтобы
+    ``estimate_count()`` и планировщик видели новый размер
+    """
+    connection = connections[using]
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        return
+    with connection.cursor() as cursor:
+        for model in models:
+            cursor.execute(f"ANALYZE {connection.ops.quote_name(model._meta.db_table)}")
@@ -0,0 +1,72 @@
+"""
+Потоковая выгрузка соревнований и списков участников в CSV и JSONL.
+
+Строки читаются через ``values_list().iterator(chunk_size=...)`` и сразу
+превращаются в текст, поэтому расход памяти не зависит от объема выгрузки.
+Список участников выбирается одним запросом с JOIN на пользователя.
+"""
+import csv
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .models import Competition, Participant
+
+COMPETITION_FIELDS = (
+    'id', 'name', 'sport_type', 'location', 'start_date', 'end_date',
+    'max_participants', 'current_participants', 'status', 'is_public',
+    'registration_deadline', 'created_by__username',
+)
+
+PARTICIPANT_FIELDS = (
+    'id', 'competition_id', 'user__username', 'user__first_name',
+    'user__last_name', 'user__email', 'registration_date', 'is_confirmed',
+)
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class _Echo:
+    """Буфер для csv.writer, возвращающий записанную строку"""
+
+    def write(self, value):
+        return value
+
+
+def get_chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def competition_rows(queryset=None):
+    queryset = Competition.objects.all() if queryset is None else queryset
+    return queryset.order_by('id').values_list(*COMPETITION_FIELDS)
+
+
+def participant_rows(queryset=None):
+    queryset = Participant.objects.all() if queryset is None else queryset
+    return queryset.order_by('competition_id', 'id').values_list(*PARTICIPANT_FIELDS)
+
+
+def csv_lines(fields, rows, chunk_size=None):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows.iterator(chunk_size=chunk_size or get_chunk_size()):
+        yield writer.writerow(row)
+
+
+def jsonl_lines(fields, rows, chunk_size=None):
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows.iterator(chunk_size=chunk_size or get_chunk_size()):
+        yield encoder.encode(dict(zip(fields, row))) + '\n'
+
+
+def stream(export_format, fields, rows, chunk_size=None):
+    """Генератор строк выгрузки в формате csv или jsonl"""
+    if export_format == 'csv':
+        return csv_lines(fields, rows, chunk_size)
+    if export_format == 'jsonl':
+        return jsonl_lines(fields, rows, chunk_size)
+    raise ValueError(f"Неизвестный формат выгрузки: {export_format}")
@@ -0,0 +1,115 @@
+"""
+Счетчики соревнований для выпадающих списков SearchForm: «Футбол (1 234)».
+
+Таблица ``FacetCount`` хранит количество соревнований для каждого значения
+вида спорта и статуса отдельно для публичных и закрытых. Счетчики меняются
+на ±1 сигналами ``Competition`` в той же транзакции, что и само изменение,
+поэтому вывод фильтров — чтение нескольких десятков строк вместо GROUP BY по
+всей таблице; результат дополнительно кэшируется вместе со страницами списка.
+
+Код, меняющий соревнования в обход сигналов, вызывает ``apply()`` с
+изменениями или ``reconcile()`` (команда ``reconcile_facets``).
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, F
+
+from . import page_cache
+from .models import Competition, FacetCount
+
+# Параметры ключа кэша: счетчики хранятся рядом со страницами списка
+CACHE_PARAMS = {'facets': True}
+
+FACETS = {
+    'sport_type': Competition.SPORT_TYPES,
+    'status': Competition.STATUS_CHOICES,
+}
+
+
+def keys(sport_type, status, is_public):
+    """Ключи счетчиков (facet, value, is_public), в которые входит соревнование"""
+    return [('sport_type', sport_type, is_public), ('status', status, is_public)]
+
+
+def compute(competitions):
+    """Точные счетчики по queryset соревнований, включая нулевые"""
+    counts = Counter({
+        (facet, value, is_public): 0
+        for facet, choices in FACETS.items()
+        for value, _ in choices
+        for is_public in (True, False)
+    })
+    for facet in FACETS:
+        rows = competitions.order_by().values(facet, 'is_public').annotate(total=Count('id'))
+        for row in rows:
+            counts[facet, row[facet], row['is_public']] = row['total']
+    return counts
+
+
+def apply(deltas):
+    """Прибавляет к счетчикам изменения {(facet, value, is_public): delta}"""
+    for (facet, value, is_public), delta in deltas.items():
+        if not delta:
+            continue
+        counter = FacetCount.objects.filter(facet=facet, value=value, is_public=is_public)
+        if not counter.update(count=F('count') + delta):
+            FacetCount.objects.bulk_create(
+                [FacetCount(facet=facet, value=value, is_public=is_public)],
+                ignore_conflicts=True,
+            )
+            counter.update(count=F('count') + delta)
+
+
+def reconcile():
+    """Пересчитывает все счетчики; возвращает число исправленных"""
+    with transaction.atomic():
+        expected = compute(Competition.objects.all())
+        current = {
+            (row.facet, row.value, row.is_public): row
+            for row in FacetCount.objects.select_for_update()
+        }
+        changed = []
+        for key, total in expected.items():
+            row = current.get(key)
+            if row is None:
+                row = FacetCount(facet=key[0], value=key[1], is_public=key[2])
+            if row.pk is None or row.count != total:
+                row.count = total
+                changed.append(row)
+        FacetCount.objects.bulk_create([row for row in changed if row.pk is None])
+        FacetCount.objects.bulk_update([row for row in changed if row.pk is not None], ['count'])
+        if changed:
+            page_cache.invalidate_competitions()
+    return len(changed)
+
+
+def _totals(rows, can_view_all):
+    counts = {facet: Counter() for facet in FACETS}
+    for facet, value, is_public, total in rows:
+        if facet in counts and (is_public or can_view_all):
+            counts[facet][value] += total
+    return counts
+
+
+def _rows():
+    return FacetCount.objects.values_list('facet', 'value', 'is_public', 'count')
+
+
+def get_counts(can_view_all):
+    """{facet: {value: количество}} для уровня доступа пользователя"""
+    key = page_cache.list_key('all' if can_view_all else 'public', CACHE_PARAMS)
+    counts = page_cache.load(key)
+    if counts is None:
+        counts = _totals(_rows(), can_view_all)
+        page_cache.store(key, counts)
+    return counts
+
+
+async def aget_counts(can_view_all):
+    key = await page_cache.alist_key('all' if can_view_all else 'public', CACHE_PARAMS)
+    counts = await page_cache.aload(key)
+    if counts is None:
+        counts = _totals([row async for row in _rows()], can_view_all)
+        await page_cache.astore(key, counts)
+    return counts
@@ -48,6 +48,11 @@ class LoginForm(AuthenticationForm):
     )
 
 
+def _format_count(number):
+    # Разряды отделяются неразрывным пробелом: 1 234
+    return f"{number:,}".replace(',', '\u00a0')
+
+
 class SearchForm(forms.Form):
     query = forms.CharField(
         max_length=100,
@@ -61,4 +66,31 @@ class SearchForm(forms.Form):
     status = forms.ChoiceField(
         choices=[('', 'Все статусы')] + Competition.STATUS_CHOICES,
         required=False
+    )
+
+    def __init__(self, *args, facet_counts=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Количество соревнований рядом с каждым значением: «Футбол (1 234)»
+        for name, counts in (facet_counts or {}).items():
+            field = self.fields[name]
+            field.choices = [
+                (value, f"{label} ({_format_count(counts.get(value, 0))})" if value else label)
+                for value, label in field.choices
+            ]
+
+
+class ParticipantImportForm(forms.Form):
+    file = forms.FileField(
+        label="CSV-файл с именами пользователей",
+        help_text="Имена пользователей в первом столбце, заголовок username необязателен"
+    )
+    is_confirmed = forms.BooleanField(
+        label="Сразу подтвердить участие",
+        required=False,
+        initial=True
+    )
+    force = forms.BooleanField(
+        label="Вне очереди и после окончания регистрации",
+        required=False,
+        help_text="Зарегистрировать, даже если срок регистрации истек или есть лист ожидания"
     )
\ No newline at end of file
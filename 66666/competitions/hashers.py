@@ -0,0 +1,39 @@
+"""
+Хэширование паролей.
+
+``LoadTestPBKDF2PasswordHasher`` — хэшер для нагрузочных стендов
+(``PASSWORD_HASHER_PROFILE=loadtest``). Стандартный PBKDF2 намеренно
+медленный, и при нагрузочном тесте входа (``benchmark --scenario login``)
+измеряется в основном он. Этот хэшер — тот же алгоритм с малым числом
+итераций. Число итераций хранится в самом хэше, поэтому хэши проверяются в
+обоих профилях, а при входе пароль перехэшируется с итерациями текущего
+профиля: после возврата к ``default`` — снова стойко.
+
+``make_passwords()`` хэширует много паролей сразу для массового создания
+пользователей (``provisioning.py``). Модуль не импортирует модели, поэтому
+его функции можно выполнять в дочерних процессах.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, make_password
+
+
+class LoadTestPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    iterations = 1000
+
+
+def make_passwords(passwords, workers=None):
+    """
+    Хэширует пароли в пуле процессов и возвращает хэши в том же порядке.
+    Хэширование занимает процессор, поэтому потоки из-за GIL его бы не
+    ускорили. Если паролей мало или доступен один процесс, пул не создается.
+    """
+    passwords = list(passwords)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) < 2 * workers:
+        return [make_password(password) for password in passwords]
+    # В дочернем процессе, запущенном через spawn, Django еще не настроен
+    with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+        return list(pool.map(make_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
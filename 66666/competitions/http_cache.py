@@ -0,0 +1,101 @@
+"""
+Условные запросы и заголовки HTTP-кэширования карточки соревнования.
+
+Валидаторы строятся из того, от чего зависит страница: ``updated_at``,
+число участников, открыта ли регистрация и кто смотрит. Код, меняющий
+счетчик участников (``registration.py``, планировщик), обновляет и
+``updated_at``, поэтому ``Last-Modified`` не отстает от страницы.
+
+* Анонимная страница одинакова для всех анонимных посетителей:
+  ``Cache-Control: public, max-age=0, s-maxage=HTTP_CACHE_S_MAXAGE`` —
+  прокси или CDN отдает ее сам, а браузер перепроверяет условным запросом;
+* страница пользователя содержит его кнопки и состояние регистрации:
+  ``private, no-cache``, ETag включает пользователя и его права;
+* ``Vary: Cookie`` не дает смешать одни ответы с другими.
+
+Ответы с flash-сообщениями и страница пользователя из листа ожидания
+(его позиция меняется без изменения соревнования) не кэшируются.
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.utils import timezone
+from django.utils.cache import (
+    add_never_cache_headers, get_conditional_response, patch_cache_control, patch_vary_headers,
+)
+from django.utils.http import http_date, quote_etag
+
+
+def last_modified(competition):
+    """Время последнего изменения страницы: истечение срока регистрации тоже ее меняет"""
+    deadline = competition.registration_deadline
+    if deadline and competition.updated_at < deadline <= timezone.now():
+        return deadline
+    return competition.updated_at
+
+
+def viewer_state(user, context):
+    """
+    Часть валидатора, зависящая от пользователя: None для анонимного,
+    False — если страницу пользователя кэшировать нельзя.
+    """
+    if not user.is_authenticated:
+        return None
+    if context['waitlist_entry'] is not None:
+        return False
+    return (user.pk, context['is_participant'], context['can_edit'], context['can_delete'], context['can_register'])
+
+
+class DetailValidators:
+    """ETag и Last-Modified карточки соревнования для одного зрителя"""
+
+    def __init__(self, competition, state=None):
+        self.public = state is None
+        self.etag = None
+        self.last_modified = None
+        if state is False:
+            return
+        parts = [
+            competition.pk,
+            competition.updated_at.isoformat(),
+            competition.current_participants,
+            competition.is_registration_open,
+            *(state or ('anonymous',)),
+        ]
+        # Слабый ETag: страница пользователя содержит маскированный CSRF-токен
+        self.etag = 'W/' + quote_etag(hashlib.md5(':'.join(map(str, parts)).encode()).hexdigest())
+        if self.public:
+            self.last_modified = last_modified(competition)
+
+    def cacheable(self, request):
+        # Flash-сообщение показывается один раз, его нельзя заменить ответом 304
+        return self.etag is not None and request.method in ('GET', 'HEAD') and not len(get_messages(request))
+
+    def not_modified(self, request):
+        """Ответ 304, если у клиента актуальная версия страницы, иначе None"""
+        if not self.cacheable(request):
+            return None
+        response = get_conditional_response(
+            request,
+            etag=self.etag,
+            last_modified=self.last_modified and int(self.last_modified.timestamp()),
+        )
+        return response and self.patch(request, response)
+
+    def patch(self, request, response):
+        patch_vary_headers(response, ('Cookie',))
+        if not self.cacheable(request):
+            add_never_cache_headers(response)
+            patch_cache_control(response, private=True)
+            return response
+        response.headers['ETag'] = self.etag
+        if self.last_modified:
+            response.headers['Last-Modified'] = http_date(self.last_modified.timestamp())
+        if self.public:
+            patch_cache_control(
+                response, public=True, max_age=0, s_maxage=getattr(settings, 'HTTP_CACHE_S_MAXAGE', 10)
+            )
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,229 @@
+"""
+Календари соревнований в формате iCalendar (RFC 5545) для подписки из
+приложений календаря.
+
+* ``/calendar/sport/<sport_type>.ics`` — публичные соревнования вида спорта;
+* ``/calendar/user/<token>.ics`` — соревнования, на которые зарегистрирован
+  пользователь. Приложение календаря не передает cookie сессии, поэтому
+  пользователь определяется подписанным токеном (``user_token``).
+
+В ленту попадают соревнования, начавшиеся не раньше ``CALENDAR_PAST_DAYS``
+дней назад, включая отмененные (``STATUS:CANCELLED`` убирает их из
+календаря подписчика).
+
+Приложения опрашивают ленты каждые несколько минут. Запрос начинается с
+одного агрегирующего запроса — версии ленты: число событий и наибольший
+``updated_at`` соревнований (для ленты пользователя еще наибольший pk
+участника, чтобы заметить новую регистрацию). Из версии строится ETag, и
+опрос без изменений получает 304. Тело ленты хранится в кэше под ключом с
+версией; при промахе оно отдается потоком из ``values_list().iterator()``
+и сохраняется в кэш после отдачи последней строки. Изменение соревнования
+обновляет ``updated_at`` (``auto_now``, а счетчик участников —
+``registration.py``), поэтому устаревшие записи кэша просто перестают
+читаться, и отдельная инвалидация не нужна.
+"""
+import hashlib
+from datetime import timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.core import signing
+from django.db.models import Count, Max
+from django.http import HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import quote_etag
+
+from . import page_cache
+from .export import get_chunk_size
+from .models import Competition, Participant
+
+CONTENT_TYPE = 'text/calendar; charset=utf-8'
+TOKEN_SALT = 'competitions.ical.user'
+
+EVENT_FIELDS = (
+    'pk', 'name', 'description', 'location', 'sport_type', 'status',
+    'start_date', 'end_date', 'updated_at',
+)
+STATUSES = {'cancelled': 'CANCELLED'}
+SPORT_NAMES = dict(Competition.SPORT_TYPES)
+
+# Длина строки iCalendar в октетах без CRLF
+LINE_LIMIT = 75
+
+
+def user_token(user):
+    return signing.Signer(salt=TOKEN_SALT).sign(str(user.pk))
+
+
+def user_from_token(token):
+    """pk пользователя из токена или None, если подпись неверна"""
+    try:
+        value = signing.Signer(salt=TOKEN_SALT).unsign(token)
+    except signing.BadSignature:
+        return None
+    return int(value) if value.isdigit() else None
+
+
+def escape(value):
+    return (
+        str(value).replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,')
+        .replace('\r\n', '\\n').replace('\n', '\\n').replace('\r', '')
+    )
+
+
+def fold(line):
+    """Переносит строку длиннее 75 октетов, не разрывая символы UTF-8"""
+    if len(line.encode()) <= LINE_LIMIT:
+        return line + '\r\n'
+    parts, current, size = [], [], 0
+    for char in line:
+        width = len(char.encode())
+        # Продолжение начинается с пробела, он тоже занимает октет
+        if size + width > (LINE_LIMIT if not parts else LINE_LIMIT - 1):
+            parts.append(''.join(current))
+            current, size = [], 0
+        current.append(char)
+        size += width
+    parts.append(''.join(current))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _timestamp(value):
+    return value.astimezone(dt_timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+
+def event(row, base_url):
+    pk, name, description, location, sport_type, status, start, end, updated = row
+    lines = [
+        'BEGIN:VEVENT',
+        f'UID:competition-{pk}@{getattr(settings, "CALENDAR_UID_DOMAIN", "sports-competition")}',
+        # Время последнего изменения: тело ленты зависит только от данных
+        f'DTSTAMP:{_timestamp(updated)}',
+        f'LAST-MODIFIED:{_timestamp(updated)}',
+        f'DTSTART:{_timestamp(start)}',
+        f'DTEND:{_timestamp(end)}',
+        f'SUMMARY:{escape(name)}',
+        f'LOCATION:{escape(location)}',
+        f'DESCRIPTION:{escape(description)}',
+        f'CATEGORIES:{escape(SPORT_NAMES.get(sport_type, sport_type))}',
+        f'STATUS:{STATUSES.get(status, "CONFIRMED")}',
+        f'URL:{base_url}{reverse("competition_detail", args=[pk])}',
+        'END:VEVENT',
+    ]
+    return ''.join(fold(line) for line in lines)
+
+
+def calendar_lines(title, rows, base_url, chunk_size=None):
+    yield ''.join(fold(line) for line in (
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Sports Competition//Calendar//RU',
+        'CALSCALE:GREGORIAN',
+        'METHOD:PUBLISH',
+        f'X-WR-CALNAME:{escape(title)}',
+        f'REFRESH-INTERVAL;VALUE=DURATION:PT{get_max_age() // 60 or 1}M',
+    ))
+    for row in rows.iterator(chunk_size=chunk_size or get_chunk_size()):
+        yield event(row, base_url)
+    yield fold('END:VCALENDAR')
+
+
+def get_max_age():
+    return getattr(settings, 'CALENDAR_MAX_AGE', 5 * 60)
+
+
+def window_start():
+    """Начало окна ленты; округлено до суток, чтобы версия не менялась с каждым запросом"""
+    today = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=getattr(settings, 'CALENDAR_PAST_DAYS', 30))
+
+
+class Feed:
+    """Лента: название, события и запрос ее версии"""
+    updated_field = 'updated_at'
+    extra_version = {}
+
+    def __init__(self, key, title, events, version_queryset, public):
+        self.key = key
+        self.title = title
+        self.events = events
+        self.version_queryset = version_queryset
+        self.public = public
+
+    def version(self):
+        return self.version_queryset.aggregate(
+            count=Count('pk'),
+            updated=Max(self.updated_field),
+            **self.extra_version,
+        )
+
+
+class SportFeed(Feed):
+    def __init__(self, sport_type):
+        competitions = Competition.objects.filter(
+            sport_type=sport_type, is_public=True, start_date__gte=window_start(),
+        )
+        super().__init__(
+            key=f'sport:{sport_type}',
+            title=f"Соревнования: {SPORT_NAMES[sport_type]}",
+            events=competitions.order_by('start_date', 'id').values_list(*EVENT_FIELDS),
+            version_queryset=competitions.order_by(),
+            public=True,
+        )
+
+
+class UserFeed(Feed):
+    updated_field = 'competition__updated_at'
+    extra_version = {'last': Max('pk')}
+
+    def __init__(self, user_id, username):
+        since = window_start()
+        super().__init__(
+            key=f'user:{user_id}',
+            title=f"Мои соревнования ({username})",
+            events=Competition.objects.filter(participants__user_id=user_id, start_date__gte=since)
+            .order_by('start_date', 'id').values_list(*EVENT_FIELDS),
+            version_queryset=Participant.objects.filter(user_id=user_id, competition__start_date__gte=since)
+            .order_by(),
+            public=False,
+        )
+
+
+def _store_after_streaming(key, chunks):
+    # Тело попадает в кэш, только если поток отдан полностью
+    body = []
+    for chunk in chunks:
+        body.append(chunk)
+        yield chunk
+    page_cache.get_page_cache().set(key, ''.join(body), getattr(settings, 'CALENDAR_CACHE_TIMEOUT', 60 * 60))
+
+
+def response(request, feed):
+    """Ответ 304, тело из кэша или поток, сохраняемый в кэш"""
+    base_url = f'{request.scheme}://{request.get_host()}'
+    version = feed.version()
+    digest = hashlib.md5(
+        ':'.join(map(str, [feed.key, base_url, *sorted(version.items())])).encode()
+    ).hexdigest()
+    etag = quote_etag(digest)
+
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        key = f'competitions:ical:{digest}'
+        body = page_cache.get_page_cache().get(key)
+        if body is not None:
+            response = HttpResponse(body, content_type=CONTENT_TYPE)
+        else:
+            response = StreamingHttpResponse(
+                _store_after_streaming(key, calendar_lines(feed.title, feed.events, base_url)),
+                content_type=CONTENT_TYPE,
+            )
+        response['Content-Disposition'] = f'inline; filename="{feed.key.replace(":", "-")}.ics"'
+    response['ETag'] = etag
+    if feed.public:
+        patch_cache_control(response, public=True, max_age=get_max_age())
+    else:
+        # Адрес ленты пользователя содержит токен: общим кэшам ее хранить незачем
+        patch_cache_control(response, private=True, max_age=0)
+    return response
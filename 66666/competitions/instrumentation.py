@@ -0,0 +1,183 @@
+"""
+Инструментирование запросов: число SQL-запросов, время SQL, время рендеринга
+шаблонов и общее время обработки, с привязкой к имени URL.
+
+* ``QueryInstrumentationMiddleware`` собирает статистику, пишет ее в журнал
+  ``competitions.instrumentation``, добавляет заголовок ``Server-Timing`` и
+  проверяет бюджет запросов из ``QUERY_BUDGETS``;
+* ``InstrumentedDjangoTemplates`` — шаблонный бэкенд, измеряющий рендеринг;
+* ``enforce_query_budgets()`` — помощник для тестов: внутри блока превышение
+  бюджета вызывает ``QueryBudgetExceeded``.
+
+Запросы считает обертка ``record_query``, которая ставится на каждое
+соединение при его открытии и пишет в статистику текущего запроса из
+ContextVar. Так учитываются и запросы асинхронных представлений: асинхронный
+ORM выполняет их в другом потоке и на другом соединении, но контекст
+передается туда через ``sync_to_async``.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+
+logger = logging.getLogger('competitions.instrumentation')
+
+_current_stats = ContextVar('competitions_request_stats', default=None)
+_budget_action = ContextVar('competitions_query_budget_action', default=None)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestStats:
+    def __init__(self):
+        self.query_count = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+        self.wall_time = 0.0
+        self.view_name = None
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.query_count += 1
+            self.sql_time += time.perf_counter() - start
+
+    def server_timing(self):
+        return ', '.join([
+            f'db;dur={self.sql_time * 1000:.1f};desc="{self.query_count} queries"',
+            f'tpl;dur={self.template_time * 1000:.1f}',
+            f'total;dur={self.wall_time * 1000:.1f}',
+        ])
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.record_query(execute, sql, params, many, context)
+
+
+def install_query_recorder(connection):
+    """Ставит record_query на соединение (сигнал connection_created)"""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+class _TimedTemplate:
+    """Обертка шаблона, добавляющая время рендеринга к статистике запроса"""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        stats = _current_stats.get()
+        if stats is None:
+            return self.template.render(context, request)
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            stats.template_time += time.perf_counter() - start
+
+
+class InstrumentedDjangoTemplates(DjangoTemplates):
+
+    def from_string(self, template_code):
+        return _TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _TimedTemplate(super().get_template(template_name))
+
+
+def get_query_budget(view_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', None))
+
+
+@contextmanager
+def enforce_query_budgets():
+    """Превышение бюджета запросов внутри блока приводит к исключению"""
+    token = _budget_action.set('raise')
+    try:
+        yield
+    finally:
+        _budget_action.reset(token)
+
+
+class QueryInstrumentationMiddleware:
+    """
+    Должен стоять первым в MIDDLEWARE, чтобы учитывались и запросы
+    SessionMiddleware/AuthenticationMiddleware. Для StreamingHttpResponse
+    учитываются только запросы, выполненные до начала передачи тела.
+    Работает как в синхронной, так и в асинхронной цепочке обработчиков.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, start)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = _current_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current_stats.reset(token)
+        return self.finish(request, response, stats, start)
+
+    def finish(self, request, response, stats, start):
+        stats.wall_time = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        stats.view_name = match.url_name if match else None
+        response.instrumentation = stats
+        response['Server-Timing'] = stats.server_timing()
+
+        logger.debug(
+            "%s %s: %d queries, sql %.1f ms, templates %.1f ms, total %.1f ms",
+            stats.view_name, request.path, stats.query_count,
+            stats.sql_time * 1000, stats.template_time * 1000, stats.wall_time * 1000,
+        )
+        self.check_budget(stats)
+        return response
+
+    def check_budget(self, stats):
+        budget = get_query_budget(stats.view_name)
+        if budget is None or stats.query_count <= budget:
+            return
+        message = (
+            f"{stats.view_name}: {stats.query_count} SQL-запросов "
+            f"при бюджете {budget}"
+        )
+        action = _budget_action.get() or getattr(settings, 'QUERY_BUDGET_ACTION', 'log')
+        if action == 'raise':
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
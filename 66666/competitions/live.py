@@ -0,0 +1,193 @@
+"""
+Живое обновление числа участников через Server-Sent Events.
+
+Страница соревнования подписывается на ``/competition/<pk>/events/``
+(``async_views.competition_events``) и получает снимки счетчиков вместо
+перезагрузки всей карточки. Снимки раздает брокер, выбранный настройкой
+``LIVE_UPDATES_BROKER``:
+
+* ``InProcessBroker`` — путь регистрации после фиксации транзакции вызывает
+  ``publish()``, брокер одним запросом читает счетчики соревнований, на
+  которые есть подписчики, и рассылает их. Работает, когда регистрация и
+  подписчики обслуживаются одним процессом (один воркер uvicorn);
+* ``PollingBroker`` — одна фоновая задача на процесс раз в
+  ``LIVE_UPDATES_POLL_INTERVAL`` секунд читает счетчики всех соревнований,
+  за которыми кто-то следит, одним запросом. Подходит для нескольких
+  воркеров и для изменений из других процессов (админка, команды).
+
+В обоих случаях тысячи подписчиков одного соревнования обслуживает одно
+чтение из базы. Очередь подписчика хранит только последний снимок:
+медленный клиент пропускает промежуточные значения, а не копит их.
+
+Код, меняющий ``current_participants`` в обход сигналов ``Participant``
+(``QuerySet.update()``, ``bulk_create()``), сам вызывает ``publish()``.
+"""
+import asyncio
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.module_loading import import_string
+
+from .models import Competition
+
+DEFAULT_BROKER = 'competitions.live.InProcessBroker'
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def snapshot(pk, current_participants, max_participants):
+    return {
+        'competition_id': pk,
+        'current_participants': current_participants,
+        'max_participants': max_participants,
+        'available_slots': max_participants - current_participants,
+    }
+
+
+def _snapshot_queryset(pks):
+    return Competition.objects.filter(pk__in=pks).values_list(
+        'pk', 'current_participants', 'max_participants'
+    )
+
+
+async def aget_snapshot(competition_id):
+    row = await _snapshot_queryset([competition_id]).afirst()
+    return snapshot(*row) if row is not None else None
+
+
+class Subscription:
+    """Подписка на снимки одного соревнования в рамках event loop клиента"""
+
+    def __init__(self, broker, competition_id):
+        self.broker = broker
+        self.competition_id = competition_id
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=1)
+
+    def _offer(self, value):
+        # Вызывается в потоке event loop: устаревший снимок заменяется новым
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(value)
+
+    def deliver(self, value):
+        """Передает снимок подписчику из любого потока"""
+        self.loop.call_soon_threadsafe(self._offer, value)
+
+    async def get(self):
+        return await self.queue.get()
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class BaseBroker:
+    """
+    Учет подписчиков и рассылка снимков. Наследники решают, откуда берутся
+    изменения: ``notify()`` вызывается после фиксации транзакций этого
+    процесса, ``on_subscribe()`` — при появлении нового подписчика.
+    """
+
+    def __init__(self):
+        self._subscriptions = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, competition_id):
+        subscription = Subscription(self, competition_id)
+        with self._lock:
+            self._subscriptions[competition_id].add(subscription)
+        self.on_subscribe(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscriptions.get(subscription.competition_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscriptions[subscription.competition_id]
+
+    def watched(self):
+        with self._lock:
+            return list(self._subscriptions)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscriptions.values())
+
+    def broadcast(self, competition_id, value):
+        with self._lock:
+            subscribers = list(self._subscriptions.get(competition_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(value)
+
+    def on_subscribe(self, subscription):
+        pass
+
+    def notify(self, pks):
+        pass
+
+
+class InProcessBroker(BaseBroker):
+    """Рассылает снимки, опубликованные этим же процессом"""
+
+    def notify(self, pks):
+        with self._lock:
+            watched = [pk for pk in pks if pk in self._subscriptions]
+        if not watched:
+            return
+        for row in _snapshot_queryset(watched):
+            self.broadcast(row[0], snapshot(*row))
+
+
+class PollingBroker(BaseBroker):
+    """
+    Опрашивает базу одной задачей на процесс, пока есть подписчики.
+    ``publish()`` не нужен: изменения из любых процессов видны при опросе.
+    """
+
+    def __init__(self, interval=None):
+        super().__init__()
+        self.interval = interval or getattr(settings, 'LIVE_UPDATES_POLL_INTERVAL', 1.0)
+        self._task = None
+        self._last = {}
+
+    def on_subscribe(self, subscription):
+        if self._task is None or self._task.done():
+            self._task = subscription.loop.create_task(self._poll())
+
+    async def _poll(self):
+        while True:
+            watched = self.watched()
+            if not watched:
+                break
+            async for row in _snapshot_queryset(watched):
+                value = snapshot(*row)
+                if self._last.get(row[0]) != value:
+                    self._last[row[0]] = value
+                    self.broadcast(row[0], value)
+            # Снимки соревнований без подписчиков больше не нужны
+            self._last = {pk: self._last[pk] for pk in watched if pk in self._last}
+            await asyncio.sleep(self.interval)
+        self._last = {}
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                _broker = import_string(getattr(settings, 'LIVE_UPDATES_BROKER', DEFAULT_BROKER))()
+    return _broker
+
+
+def publish(pks):
+    """
+    Сообщает брокеру, что у соревнований изменилось число участников,
+    после фиксации текущей транзакции.
+    """
+    pks = list(pks)
+    transaction.on_commit(lambda: get_broker().notify(pks))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from competitions import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит завершенные и отмененные соревнования вместе с участниками в "
+        "архивные таблицы пачками. Каждая пачка — отдельная транзакция, поэтому "
+        "прерванный запуск можно просто повторить"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than', type=int, default=None,
+            help="Сколько дней должно пройти после окончания (по умолчанию ARCHIVE_AFTER_DAYS)",
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help="Соревнований в одной пачке")
+        parser.add_argument('--limit', type=int, default=None, help="Перенести не больше стольких соревнований")
+        parser.add_argument('--pause', type=float, default=0.0, help="Пауза между пачками, секунды")
+        parser.add_argument('--dry-run', action='store_true', help="Только посчитать соревнования и участников")
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size должен быть положительным")
+        cutoff = archive.get_cutoff(options['older_than'])
+
+        def progress(report):
+            if options['verbosity'] > 1:
+                self.stdout.write(
+                    f"  пачка {report.batches}: соревнований {report.competitions}, участников {report.participants}"
+                )
+
+        report = archive.archive(
+            cutoff=cutoff,
+            batch_size=options['batch_size'],
+            limit=options['limit'],
+            pause=options['pause'],
+            dry_run=options['dry_run'],
+            progress=progress,
+        )
+        if options['dry_run']:
+            self.stdout.write(
+                f"К переносу (закончились до {cutoff:%d.%m.%Y}): "
+                f"соревнований {report.competitions}, участников {report.participants}"
+            )
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Перенесено в архив: соревнований {report.competitions}, участников {report.participants}"
+            ))
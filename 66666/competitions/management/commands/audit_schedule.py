@@ -0,0 +1,79 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.timezone import localtime
+
+from competitions import schedule
+
+
+def _interval(item):
+    pk, name, start, end = item
+    return f"#{pk} {name} ({localtime(start):%d.%m.%Y %H:%M} – {localtime(end):%d.%m.%Y %H:%M})"
+
+
+class Command(BaseCommand):
+    help = "Ищет пересечения расписания: площадку, занятую двумя соревнованиями, и участников двух соревнований одновременно"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--only', choices=('locations', 'participants'),
+            help="Проверить только площадки или только участников",
+        )
+        parser.add_argument('--limit', type=int, default=100, help="Сколько пересечений печатать в каждом разделе")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--fail', action='store_true', help="Завершиться с ошибкой, если пересечения найдены")
+
+    def handle(self, *args, **options):
+        total = 0
+        if options['only'] != 'participants':
+            total += self.report(
+                "Площадки",
+                schedule.audit_locations(options['chunk_size']),
+                lambda overlap: overlap.key,
+                options['limit'],
+            )
+            total += self.report_too_long(options['limit'])
+        if options['only'] != 'locations':
+            usernames = {}
+
+            def username(overlap):
+                if overlap.key not in usernames:
+                    usernames[overlap.key] = User.objects.filter(pk=overlap.key).values_list('username', flat=True).first()
+                return usernames[overlap.key]
+
+            total += self.report(
+                "Участники",
+                schedule.audit_participants(options['chunk_size']),
+                username,
+                options['limit'],
+            )
+
+        if not total:
+            self.stdout.write(self.style.SUCCESS("Пересечений нет"))
+        elif options['fail']:
+            raise CommandError(f"Найдено пересечений: {total}")
+        else:
+            self.stdout.write(self.style.WARNING(f"Найдено пересечений: {total}"))
+
+    def report(self, title, overlaps, label, limit):
+        count = 0
+        for overlap in overlaps:
+            count += 1
+            if count == 1:
+                self.stdout.write(title)
+            if count <= limit:
+                self.stdout.write(f"  {label(overlap)}: {_interval(overlap.first)} и {_interval(overlap.second)}")
+        if count > limit:
+            self.stdout.write(f"  ... и еще {count - limit}")
+        return count
+
+    def report_too_long(self, limit):
+        # Пересечения с такими соревнованиями проверка площадки не видит
+        competitions = schedule.too_long().filter(schedule.ACTIVE)
+        count = competitions.count()
+        if count:
+            self.stdout.write(f"Длиннее {schedule.get_max_duration().days} дней (COMPETITION_MAX_DURATION)")
+            for row in competitions.order_by('start_date').values_list('pk', 'name', 'start_date', 'end_date')[:limit]:
+                self.stdout.write(f"  {_interval(row)}")
+            if count > limit:
+                self.stdout.write(f"  ... и еще {count - limit}")
+        return count
@@ -0,0 +1,179 @@
+import json
+import time
+from pathlib import Path
+
+from django.contrib.auth.hashers import check_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from competitions import page_cache
+from competitions.models import Competition
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, max(0, round(fraction * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Измеряет задержку и число SQL-запросов основных страниц (список, поиск, "
+        "карточка, регистрация) через тестовый клиент Django. Запускайте на базе, "
+        "заполненной командой seed_data"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--host', default='localhost', help="Значение заголовка Host")
+        parser.add_argument('--query', default='турнир', help="Строка для сценария поиска")
+        parser.add_argument('--password', default='seed123',
+                            help="Пароль пользователя для сценария входа (как у seed_data)")
+        parser.add_argument('--save', help="Сохранить результаты в JSON-файл")
+        parser.add_argument('--compare', help="Сравнить с ранее сохраненным JSON-файлом")
+        parser.add_argument('--cold-cache', action='store_true',
+                            help="Очищать кэш страниц перед каждой итерацией")
+        parser.add_argument('--scenario', action='append', dest='scenarios',
+                            help="Запустить только указанные сценарии (можно повторять)")
+
+    def handle(self, *args, **options):
+        scenarios = self.build_scenarios(options)
+        if options['scenarios']:
+            scenarios = {name: scenarios[name] for name in options['scenarios'] if name in scenarios}
+
+        results = {}
+        for name, (client, request) in scenarios.items():
+            results[name] = self.measure(
+                client, request, options['iterations'], options['warmup'], options['cold_cache']
+            )
+
+        self.print_results(results)
+
+        if options['compare']:
+            self.compare(results, json.loads(Path(options['compare']).read_text()))
+        if options['save']:
+            Path(options['save']).write_text(json.dumps({
+                'created_at': timezone.now().isoformat(),
+                'iterations': options['iterations'],
+                'results': results,
+            }, indent=2, ensure_ascii=False))
+            self.stdout.write(f"Результаты сохранены в {options['save']}")
+
+    def build_scenarios(self, options):
+        competition = (
+            Competition.objects.filter(is_public=True)
+            .filter(Q(registration_deadline__isnull=True) | Q(registration_deadline__gte=timezone.now()))
+            .filter(current_participants__lt=F('max_participants'))
+            .first()
+        )
+        if competition is None:
+            raise CommandError("Нет открытых соревнований; сначала запустите seed_data")
+
+        anonymous = Client(HTTP_HOST=options['host'])
+        scenarios = {
+            'list_anonymous': (anonymous, lambda c: c.get(reverse('competition_list'))),
+            'search_anonymous': (anonymous, lambda c: c.get(reverse('competition_list'), {'query': options['query']})),
+            'detail_anonymous': (anonymous, lambda c: c.get(reverse('competition_detail', args=[competition.pk]))),
+            'api_list': (anonymous, lambda c: c.get(reverse('api_competition_list'))),
+        }
+
+        member = (
+            User.objects.filter(is_active=True, groups__permissions__codename='can_register_participant')
+            .exclude(participations__competition=competition)
+            .first()
+        )
+        if member is None:
+            self.stderr.write("Нет пользователя с правом регистрации: сценарии авторизованного пользователя пропущены")
+            return scenarios
+
+        authenticated = Client(HTTP_HOST=options['host'])
+        authenticated.force_login(member)
+
+        def log_in(client):
+            # Проверка пароля, запись сессии и last_login: стоимость зависит от PASSWORD_HASHER_PROFILE
+            response = client.post(reverse('custom_login'), {
+                'username': member.username,
+                'password': options['password'],
+            })
+            if response.status_code != 302:
+                raise CommandError(f"Не удалось войти как {member.username}: проверьте --password")
+            return response
+
+        def register(client):
+            # Регистрация откатывается, чтобы каждая итерация проходила одинаково
+            with transaction.atomic():
+                response = client.post(reverse('register_participant', args=[competition.pk]))
+                transaction.set_rollback(True)
+            return response
+
+        scenarios.update({
+            'list_authenticated': (authenticated, lambda c: c.get(reverse('competition_list'))),
+            'detail_authenticated': (authenticated, lambda c: c.get(reverse('competition_detail', args=[competition.pk]))),
+            'register': (authenticated, register),
+        })
+        # Пароль проверяется заранее, без сохранения пользователя: с неверным
+        # --password пропускается только сценарий входа, а не весь замер
+        if check_password(options['password'], member.password):
+            scenarios['login'] = (Client(HTTP_HOST=options['host']), log_in)
+        else:
+            self.stderr.write(self.style.WARNING(
+                f"Пароль --password не подходит пользователю {member.username}: сценарий login пропущен"
+            ))
+        return scenarios
+
+    def measure(self, client, request, iterations, warmup, cold_cache=False):
+        for _ in range(warmup):
+            request(client)
+
+        timings = []
+        queries = []
+        for _ in range(iterations):
+            if cold_cache:
+                page_cache.get_page_cache().clear()
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request(client)
+                timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code >= 400:
+                raise CommandError(f"Ответ {response.status_code} при замере")
+            queries.append(len(captured))
+
+        return {
+            'p50_ms': round(percentile(timings, 0.50), 3),
+            'p95_ms': round(percentile(timings, 0.95), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'queries_max': max(queries),
+            'queries_mean': round(sum(queries) / len(queries), 2),
+        }
+
+    def print_results(self, results):
+        self.stdout.write(f"{'сценарий':<24}{'p50, мс':>10}{'p95, мс':>10}{'запросы':>10}")
+        for name, result in results.items():
+            self.stdout.write(
+                f"{name:<24}{result['p50_ms']:>10.2f}{result['p95_ms']:>10.2f}{result['queries_max']:>10}"
+            )
+
+    def compare(self, results, baseline):
+        self.stdout.write("\nСравнение с базовой линией:")
+        for name, result in results.items():
+            base = baseline.get('results', {}).get(name)
+            if base is None:
+                continue
+            delta = (result['p95_ms'] - base['p95_ms']) / base['p95_ms'] * 100 if base['p95_ms'] else 0.0
+            line = (
+                f"{name:<24}p95 {base['p95_ms']:.2f} → {result['p95_ms']:.2f} мс ({delta:+.1f}%), "
+                f"запросы {base['queries_max']} → {result['queries_max']}"
+            )
+            if result['queries_max'] > base['queries_max']:
+                self.stdout.write(self.style.WARNING(line))
+            else:
+                self.stdout.write(line)
@@ -0,0 +1,142 @@
+import asyncio
+import importlib.util
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from .benchmark import percentile
+
+MODES = {
+    'sync': '0',
+    'async': '1',
+}
+
+
+async def _read_response(reader):
+    """Читает один ответ HTTP/1.1; возвращает код статуса"""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Соединение закрыто сервером")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    elif headers.get('transfer-encoding') == 'chunked':
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    return status
+
+
+async def _worker(host, port, paths, deadline_count, counter, timings, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            number = counter[0]
+            if number >= deadline_count:
+                return
+            counter[0] += 1
+            path = paths[number % len(paths)]
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n"
+            start = time.perf_counter()
+            writer.write(request.encode())
+            await writer.drain()
+            status = await _read_response(reader)
+            timings.append((time.perf_counter() - start) * 1000)
+            if status >= 400:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def _load(host, port, paths, connections, requests):
+    counter = [0]
+    timings = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _worker(host, port, paths, requests, counter, timings, errors)
+        for _ in range(connections)
+    ])
+    return time.perf_counter() - start, timings, errors
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнивает пропускную способность синхронных и асинхронных представлений "
+        "только для чтения под uvicorn при множестве одновременных соединений. "
+        "Требует пакет uvicorn"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', dest='modes', choices=list(MODES),
+                            help="Режим (можно повторять); по умолчанию sync и async")
+        parser.add_argument('--connections', type=int, default=50)
+        parser.add_argument('--requests', type=int, default=2000, help="Всего запросов на режим")
+        parser.add_argument('--warmup', type=int, default=100)
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Адрес для запросов (можно повторять)")
+        parser.add_argument('--port', type=int, default=8765)
+
+    def handle(self, *args, **options):
+        if importlib.util.find_spec('uvicorn') is None:
+            raise CommandError("uvicorn не установлен: pip install uvicorn")
+        paths = options['paths'] or ['/', '/api/competitions/', '/?sport_type=football']
+
+        self.stdout.write(
+            f"{'режим':<8}{'запросов/с':>12}{'p50, мс':>10}{'p95, мс':>10}{'ошибки':>9}"
+        )
+        for mode in options['modes'] or list(MODES):
+            server = self.start_server(mode, options['port'])
+            try:
+                asyncio.run(_load('127.0.0.1', options['port'], paths, options['connections'], options['warmup']))
+                elapsed, timings, errors = asyncio.run(
+                    _load('127.0.0.1', options['port'], paths, options['connections'], options['requests'])
+                )
+            finally:
+                server.terminate()
+                server.wait(timeout=10)
+            self.stdout.write(
+                f"{mode:<8}{len(timings) / elapsed:>12.1f}{percentile(timings, 0.50):>10.2f}"
+                f"{percentile(timings, 0.95):>10.2f}{len(errors):>9}"
+            )
+
+    def start_server(self, mode, port):
+        env = dict(
+            os.environ,
+            ASYNC_READ_VIEWS=MODES[mode],
+            DJANGO_SETTINGS_MODULE=os.environ.get('DJANGO_SETTINGS_MODULE', 'sports_competition.settings'),
+        )
+        server = subprocess.Popen(
+            [
+                sys.executable, '-m', 'uvicorn', 'sports_competition.asgi:application',
+                '--host', '127.0.0.1', '--port', str(port),
+                '--no-access-log', '--log-level', 'warning',
+            ],
+            cwd=settings.BASE_DIR,
+            env=env,
+        )
+        deadline = time.monotonic() + 15
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"uvicorn завершился с кодом {server.returncode}")
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=0.2).close()
+                return server
+            except OSError:
+                time.sleep(0.1)
+        server.terminate()
+        raise CommandError("uvicorn не начал принимать соединения за 15 секунд")
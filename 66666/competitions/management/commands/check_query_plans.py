@@ -0,0 +1,137 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from competitions import ical, schedule
+from competitions.forms import SearchForm
+from competitions.models import Competition, Participant
+from competitions.pagination import KeysetPaginator
+from competitions.queries import filter_competitions
+
+# Признаки полного просмотра таблицы в выводе EXPLAIN
+FULL_SCAN_MARKERS = {
+    'sqlite': lambda line, table: f"SCAN {table}" in line and 'USING' not in line and 'VIRTUAL TABLE' not in line,
+    'postgresql': lambda line, table: f"Seq Scan on {table}" in line,
+}
+
+# Признаки сортировки без индекса
+SORT_MARKERS = {
+    'sqlite': lambda line: 'USE TEMP B-TREE FOR ORDER BY' in line,
+    'postgresql': lambda line: line.lstrip(' ->').startswith('Sort '),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Проверяет планы выполнения (EXPLAIN) основных запросов списка, поиска, "
+        "расписания, календарей и участников: ни один не должен полностью просматривать таблицу, а список "
+        "без поиска — сортировать без индекса. Завершается с ошибкой при нарушении. "
+        "Запускайте на базе с реалистичным объемом данных (seed_data)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', default='турнир', help="Строка для проверки поиска")
+        parser.add_argument('--show-plans', action='store_true', help="Печатать планы целиком")
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN_MARKERS:
+            raise CommandError(f"Проверка планов не поддерживается для {connection.vendor}")
+
+        failures = []
+        for name, queryset, table, sorted_by_index in self.cases(options['query']):
+            plan = queryset.explain()
+            problems = self.problems(plan, table, sorted_by_index)
+            if problems:
+                failures.append(name)
+                self.stdout.write(self.style.ERROR(f"FAIL {name}: {'; '.join(problems)}"))
+            else:
+                self.stdout.write(f"ok   {name}")
+            if options['show_plans'] or problems:
+                for line in plan.splitlines():
+                    self.stdout.write(f"       {line}")
+
+        if failures:
+            raise CommandError(f"Неоптимальные планы: {len(failures)}")
+
+    def problems(self, plan, table, sorted_by_index):
+        full_scan = FULL_SCAN_MARKERS[connection.vendor]
+        sort = SORT_MARKERS[connection.vendor]
+        problems = []
+        for line in plan.splitlines():
+            if full_scan(line, table):
+                problems.append(f"полный просмотр {table}")
+            if sorted_by_index and sort(line):
+                problems.append("сортировка без индекса")
+        return problems
+
+    def cases(self, query):
+        competitions_table = Competition._meta.db_table
+        participants_table = Participant._meta.db_table
+
+        filters = [{}, {'query': query}]
+        filters += [{'status': value} for value, _ in Competition.STATUS_CHOICES[:1]]
+        filters += [{'sport_type': value} for value, _ in Competition.SPORT_TYPES[:1]]
+        filters.append({**filters[2], **filters[3]})
+        filters.append({**filters[1], **filters[2]})
+
+        for can_view_all, tier in ((False, 'public'), (True, 'all')):
+            for raw in filters:
+                form = SearchForm(raw)
+                form.is_valid()
+                queryset, ordering = filter_competitions(form.cleaned_data, can_view_all)
+                paginator = KeysetPaginator(queryset, ordering=ordering)
+                label = ', '.join(f"{key}={value}" for key, value in raw.items()) or 'без фильтров'
+                sorted_by_index = 'query' not in raw
+                yield f"list[{tier}] {label}", paginator.page_queryset(), competitions_table, sorted_by_index
+                # Курсор следующей страницы: условие (start_date, id) < (...) тоже должно идти по индексу
+                page = paginator.get_page()
+                if page.has_next:
+                    yield (
+                        f"list[{tier}] {label}, следующая страница",
+                        paginator.page_queryset(after=page.next_cursor),
+                        competitions_table,
+                        sorted_by_index,
+                    )
+
+        competition = Competition.objects.order_by('pk').first()
+        if competition is not None:
+            conflicts = schedule.location_query(
+                competition.location, competition.start_date, competition.end_date, exclude_pk=competition.pk
+            )
+            yield "location conflicts", conflicts, competitions_table, True
+
+        feed = ical.SportFeed(Competition.SPORT_TYPES[0][0])
+        yield "calendar feed of sport", feed.events, competitions_table, True
+        yield "calendar feed version", feed.version_queryset, competitions_table, False
+
+        participant = Participant.objects.order_by('pk').first()
+        if participant is None:
+            self.stderr.write("Нет участников: проверка запросов участников пропущена")
+            return
+        yield (
+            "participant by (competition, user)",
+            Participant.objects.filter(competition_id=participant.competition_id, user_id=participant.user_id),
+            participants_table,
+            False,
+        )
+        yield (
+            "participants of competition",
+            Participant.objects.filter(competition_id=participant.competition_id).order_by('id')[:21],
+            participants_table,
+            True,
+        )
+        yield (
+            "participations of user",
+            Participant.objects.filter(user_id=participant.user_id),
+            participants_table,
+            False,
+        )
+        competition = participant.competition
+        yield (
+            "schedule conflicts of user",
+            schedule.user_competitions(participant.user_id, competition.start_date, competition.end_date),
+            competitions_table,
+            False,
+        )
+        user_feed = ical.UserFeed(participant.user_id, '')
+        yield "calendar feed of user", user_feed.events, competitions_table, False
+        yield "calendar feed version of user", user_feed.version_queryset, participants_table, False
@@ -0,0 +1,39 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from competitions import export
+from competitions.models import Participant
+
+
+class Command(BaseCommand):
+    help = "Потоковая выгрузка соревнований или участников в CSV/JSONL"
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=['competitions', 'participants'])
+        parser.add_argument('--format', dest='export_format', choices=sorted(export.FORMATS), default='csv')
+        parser.add_argument(
+            '--competition', type=int, action='append', dest='competitions',
+            help="Выгрузить участников только этих соревнований (можно повторять)",
+        )
+        parser.add_argument('--output', '-o', help="Файл для записи (по умолчанию stdout)")
+        parser.add_argument('--chunk-size', type=int, help="Размер пачки строк, читаемых из базы")
+
+    def handle(self, *args, dataset, export_format, competitions, output, chunk_size, **options):
+        if dataset == 'competitions':
+            if competitions:
+                raise CommandError("--competition применим только к выгрузке участников")
+            fields, rows = export.COMPETITION_FIELDS, export.competition_rows()
+        else:
+            queryset = Participant.objects.all()
+            if competitions:
+                queryset = queryset.filter(competition_id__in=competitions)
+            fields, rows = export.PARTICIPANT_FIELDS, export.participant_rows(queryset)
+
+        stream = open(output, 'w', encoding='utf-8', newline='') if output else sys.stdout
+        try:
+            for line in export.stream(export_format, fields, rows, chunk_size):
+                stream.write(line)
+        finally:
+            if output:
+                stream.close()
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from competitions import registration
+from competitions.models import Competition
+
+
+class Command(BaseCommand):
+    help = "Массовая регистрация участников на соревнование из CSV-файла с именами пользователей"
+
+    def add_arguments(self, parser):
+        parser.add_argument('competition_id', type=int)
+        parser.add_argument('csv_file', help="CSV-файл, имена пользователей в первом столбце")
+        parser.add_argument(
+            '--unconfirmed', action='store_true',
+            help="Не подтверждать участие импортированных пользователей",
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help="Регистрировать вне очереди и после окончания срока регистрации",
+        )
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, competition_id, csv_file, unconfirmed, batch_size, force, **options):
+        try:
+            competition = Competition.objects.get(pk=competition_id)
+        except Competition.DoesNotExist:
+            raise CommandError(f"Соревнование {competition_id} не найдено")
+
+        with open(csv_file, 'rb') as f:
+            data = f.read()
+        try:
+            usernames = registration.read_usernames(data)
+        except registration.UnreadableFile as exc:
+            raise CommandError(exc.message)
+
+        report = registration.bulk_register(
+            competition,
+            usernames,
+            is_confirmed=not unconfirmed,
+            batch_size=batch_size,
+            force=force,
+        )
+
+        self.stdout.write(self.style.SUCCESS(f"Зарегистрировано: {len(report.inserted)}"))
+        self.stdout.write(f"Уже зарегистрированы или повторяются: {len(report.duplicates)}")
+        for username in report.duplicates:
+            self.stdout.write(f"  = {username}")
+        self.stdout.write(f"Отклонено: {len(report.rejected)}")
+        for username, reason in report.rejected:
+            self.stdout.write(self.style.WARNING(f"  ✗ {username}: {reason}"))
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from competitions.provisioning import SpecError, load_spec, merge_specs, provision
+
+REPORT_LABELS = {
+    'groups_created': "групп создано",
+    'permissions_added': "прав групп добавлено",
+    'permissions_removed': "прав групп удалено",
+    'users_created': "пользователей создано",
+    'users_updated': "пользователей обновлено",
+    'memberships_added': "членств в группах добавлено",
+    'memberships_removed': "членств в группах удалено",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Создает группы, права и пользователей по спецификации в YAML или CSV "
+        "(см. competitions/provisioning.py). Повторный запуск ничего не меняет"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('specs', nargs='+', help="Файлы спецификации (.yaml, .yml, .csv)")
+        parser.add_argument('--workers', type=int, help="Процессов для хэширования паролей; по умолчанию по числу ядер")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--prune', action='store_true',
+                            help="Удалить у перечисленных групп и пользователей права и членства, которых нет в спецификации")
+        parser.add_argument('--reset-passwords', action='store_true',
+                            help="Заменить пароли существующих пользователей паролями из спецификации")
+        parser.add_argument('--dry-run', action='store_true', help="Показать изменения без записи")
+
+    def handle(self, *args, **options):
+        try:
+            spec = merge_specs(load_spec(path) for path in options['specs'])
+            report = provision(
+                spec,
+                workers=options['workers'],
+                prune=options['prune'],
+                reset_passwords=options['reset_passwords'],
+                dry_run=options['dry_run'],
+                batch_size=options['batch_size'],
+            )
+        except (SpecError, OSError) as exc:
+            raise CommandError(str(exc))
+
+        for key, value in report.items():
+            self.stdout.write(f"{REPORT_LABELS[key]}: {value}")
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Пробный запуск: изменения не сохранены"))
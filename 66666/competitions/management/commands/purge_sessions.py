@@ -0,0 +1,45 @@
+import time
+from importlib import import_module
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        "Удаляет истекшие сессии из базы пачками. В отличие от clearsessions, "
+        "который удаляет все одним запросом, блокировка записи SQLite "
+        "удерживается только на время одной пачки и не задерживает регистрацию"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Пауза между пачками, секунды")
+        parser.add_argument('--dry-run', action='store_true', help="Только посчитать истекшие сессии")
+
+    def handle(self, *args, **options):
+        store = import_module(settings.SESSION_ENGINE).SessionStore
+        if not hasattr(store, 'get_model_class'):
+            self.stdout.write(f"Сессии хранятся не в базе ({settings.SESSION_ENGINE}): удалять нечего")
+            return
+
+        model = store.get_model_class()
+        now = timezone.now()
+        expired = model.objects.filter(expire_date__lt=now)
+        if options['dry_run']:
+            self.stdout.write(f"Истекших сессий: {expired.count()}")
+            return
+
+        deleted = 0
+        while True:
+            keys = list(expired.values_list('pk', flat=True)[:options['batch_size']])
+            if not keys:
+                break
+            # Условие по expire_date повторяется: сессию могли продлить между чтением и удалением
+            count, _ = expired.filter(pk__in=keys).delete()
+            deleted += count
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f"Удалено сессий: {deleted}")
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from competitions.models import ArchivedCompetition, Competition
+from competitions.search import get_archive_backend, get_backend
+
+
+class Command(BaseCommand):
+    help = "Полностью перестраивает полнотекстовый индекс соревнований (с --archive — индекс архива)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help="Количество соревнований, индексируемых за один запрос",
+        )
+        parser.add_argument('--archive', action='store_true', help="Перестроить индекс архивных соревнований")
+
+    def handle(self, *args, batch_size, **options):
+        backend = get_archive_backend() if options['archive'] else get_backend()
+        model = ArchivedCompetition if options['archive'] else Competition
+        rows = model.objects.order_by().values_list(
+            'id', 'name', 'location', 'description'
+        )
+        total = 0
+        with transaction.atomic():
+            backend.create_index()
+            backend.clear()
+            batch = []
+            for row in rows.iterator(chunk_size=batch_size):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    backend.index_rows(batch)
+                    total += len(batch)
+                    batch = []
+            backend.index_rows(batch)
+            total += len(batch)
+        self.stdout.write(self.style.SUCCESS(f"Проиндексировано соревнований: {total}"))
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from competitions.registration import reconcile_counts
+
+
+class Command(BaseCommand):
+    help = "Сверяет счетчики участников (current_participants) с таблицей участников и исправляет расхождения"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Только показать расхождения")
+        parser.add_argument(
+            '--promote', action='store_true',
+            help="Отдать освободившиеся места пользователям из листа ожидания",
+        )
+
+    def handle(self, *args, **options):
+        drifts = reconcile_counts(
+            batch_size=options['batch_size'],
+            fix=not options['dry_run'],
+            promote_waitlist=options['promote'],
+        )
+        for drift in drifts:
+            self.stdout.write(
+                f"  соревнование {drift.competition_id}: {drift.stored} → {drift.actual} ({drift.delta:+d})"
+            )
+        if not drifts:
+            self.stdout.write(self.style.SUCCESS("Расхождений нет"))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f"Найдено расхождений: {len(drifts)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f"Исправлено счетчиков: {len(drifts)}"))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from competitions import facets
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счетчики фильтров по виду спорта и статусу (FacetCount)"
+
+    def handle(self, *args, **options):
+        changed = facets.reconcile()
+        if changed:
+            self.stdout.write(self.style.WARNING(f"Исправлено счетчиков: {changed}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("Счетчики совпадают с данными"))
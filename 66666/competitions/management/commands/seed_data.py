@@ -0,0 +1,158 @@
+import random
+from collections import Counter
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission, User
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from competitions import facets, page_cache
+from competitions.models import Competition, Participant
+from competitions.search import get_backend
+
+SPORT_WORDS = {
+    'football': 'Кубок по футболу',
+    'basketball': 'Турнир по баскетболу',
+    'volleyball': 'Первенство по волейболу',
+    'tennis': 'Теннисный турнир',
+    'swimming': 'Соревнования по плаванию',
+    'athletics': 'Легкоатлетический забег',
+    'chess': 'Шахматный турнир',
+}
+
+LOCATIONS = [
+    'Центральный стадион', 'Спортивный комплекс "Олимп"', 'Теннисный клуб "Ас"',
+    'Бассейн "Волна"', 'Центр интеллектуальных игр', 'Дворец спорта', 'Городской парк',
+]
+
+
+class Command(BaseCommand):
+    help = "Генерирует синтетический набор данных: пользователей, соревнования и участников"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--competitions', type=int, default=10000)
+        parser.add_argument('--participants', type=int, default=50000)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--prefix', default='seed', help="Префикс имен создаваемых пользователей")
+        parser.add_argument('--password', default='seed123', help="Пароль всех создаваемых пользователей")
+        parser.add_argument('--seed', type=int, default=0, help="Зерно генератора случайных чисел")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        batch_size = options['batch_size']
+
+        with transaction.atomic():
+            users = self.create_users(options, batch_size)
+            competitions = self.create_competitions(rng, users, options['competitions'], batch_size)
+            participants = self.create_participants(rng, users, competitions, options['participants'], batch_size)
+
+            # bulk_create не отправляет сигналы: индекс поиска, счетчики фильтров
+            # и кэш страниц обновляем сами
+            get_backend().index_rows(
+                (c.pk, c.name, c.location, c.description) for c in competitions
+            )
+            facets.reconcile()
+            page_cache.invalidate_competitions()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Создано: пользователей {len(users)}, соревнований {len(competitions)}, "
+            f"участников {participants}"
+        ))
+
+    def create_users(self, options, batch_size):
+        prefix = options['prefix']
+        start = User.objects.filter(username__startswith=f"{prefix}_").count()
+        # Хэш пароля вычисляется один раз на всех пользователей
+        password = make_password(options['password'])
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{prefix}_{number}",
+                    email=f"{prefix}_{number}@example.com",
+                    password=password,
+                )
+                for number in range(start, start + options['users'])
+            ],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        users = list(User.objects.filter(username__startswith=f"{prefix}_").order_by('pk'))
+
+        # Все сгенерированные пользователи могут регистрироваться на соревнования
+        group, _ = Group.objects.get_or_create(name='Участники')
+        group.permissions.add(Permission.objects.get(
+            content_type__app_label='competitions',
+            codename='can_register_participant',
+        ))
+        Membership = User.groups.through
+        Membership.objects.bulk_create(
+            [Membership(user_id=user.pk, group_id=group.pk) for user in users],
+            batch_size=batch_size,
+            ignore_conflicts=True,
+        )
+        return users
+
+    def create_competitions(self, rng, users, count, batch_size):
+        now = timezone.now()
+        sport_types = [value for value, _ in Competition.SPORT_TYPES]
+        statuses = [value for value, _ in Competition.STATUS_CHOICES]
+        competitions = []
+        for number in range(count):
+            sport_type = sport_types[number % len(sport_types)]
+            status = statuses[(number // len(sport_types)) % len(statuses)]
+            # Даты согласованы со статусом
+            if status == 'completed':
+                start = now - timedelta(days=rng.randint(2, 1000), hours=rng.randint(0, 23))
+            elif status == 'ongoing':
+                start = now - timedelta(hours=rng.randint(1, 48))
+            else:
+                start = now + timedelta(days=rng.randint(1, 365), hours=rng.randint(0, 23))
+            end = start + timedelta(days=rng.randint(1, 5))
+            competitions.append(Competition(
+                name=f"{SPORT_WORDS[sport_type]} №{number + 1}",
+                description=f"{SPORT_WORDS[sport_type]} для любителей и профессионалов. "
+                            f"Сезон {start.year}, этап {rng.randint(1, 12)}.",
+                sport_type=sport_type,
+                location=rng.choice(LOCATIONS),
+                start_date=start,
+                end_date=end,
+                registration_deadline=start - timedelta(days=1) if rng.random() < 0.5 else None,
+                max_participants=rng.choice([8, 16, 32, 64, 100, 500]),
+                status=status,
+                is_public=rng.random() < 0.9,
+                created_by=rng.choice(users),
+            ))
+        # На SQLite и PostgreSQL bulk_create возвращает первичные ключи
+        return Competition.objects.bulk_create(competitions, batch_size=batch_size)
+
+    def create_participants(self, rng, users, competitions, count, batch_size):
+        if not users or not competitions:
+            return 0
+        capacity = {c.pk: c.max_participants for c in competitions}
+        taken = Counter()
+        pairs = set()
+        attempts = 0
+        while len(pairs) < count and attempts < count * 3:
+            attempts += 1
+            competition = rng.choice(competitions)
+            if taken[competition.pk] >= capacity[competition.pk]:
+                continue
+            pair = (competition.pk, rng.choice(users).pk)
+            if pair not in pairs:
+                pairs.add(pair)
+                taken[competition.pk] += 1
+
+        Participant.objects.bulk_create(
+            [
+                Participant(competition_id=competition_id, user_id=user_id, is_confirmed=True)
+                for competition_id, user_id in pairs
+            ],
+            batch_size=batch_size,
+        )
+        for competition in competitions:
+            competition.current_participants = taken[competition.pk]
+        Competition.objects.bulk_update(competitions, ['current_participants'], batch_size=batch_size)
+        return len(pairs)
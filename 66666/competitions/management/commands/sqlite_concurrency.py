@@ -0,0 +1,154 @@
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection, connections
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from competitions import registration
+from competitions.models import Competition
+from competitions.pagination import KeysetPaginator
+from competitions.queries import filter_competitions
+
+
+class Command(BaseCommand):
+    help = (
+        "Нагрузочная проверка профилей SQLite: параллельные регистрации и отмены "
+        "(registration.register/unregister) и чтения страницы списка на временной базе "
+        "с настоящей схемой (миграции проекта). Выводит число ошибок \"database is locked\" "
+        "и пропускную способность для каждого профиля"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--profile', action='append', dest='profiles',
+                            help="Профиль из SQLITE_PROFILES (можно повторять); по умолчанию все")
+        parser.add_argument('--writers', type=int, default=8)
+        parser.add_argument('--readers', type=int, default=8)
+        parser.add_argument('--seconds', type=float, default=5.0)
+        parser.add_argument('--competitions', type=int, default=50)
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError("Команда проверяет только профили SQLite")
+        profiles = getattr(settings, 'SQLITE_PROFILES', {})
+        names = options['profiles'] or list(profiles)
+        unknown = [name for name in names if name not in profiles]
+        if unknown:
+            raise CommandError(f"Неизвестные профили: {', '.join(unknown)}")
+
+        self.stdout.write(f"{'профиль':<14}{'записи':>10}{'чтения':>10}{'locked':>10}{'записей/с':>12}")
+        for name in names:
+            with tempfile.TemporaryDirectory() as directory:
+                with self.temporary_database(Path(directory) / 'stress.sqlite3', profiles[name]):
+                    result = self.run_profile(options)
+            self.stdout.write(
+                f"{name:<14}{result['writes']:>10}{result['reads']:>10}{result['locked']:>10}"
+                f"{result['writes'] / options['seconds']:>12.1f}"
+            )
+
+    @contextmanager
+    def temporary_database(self, path, profile):
+        """
+        Временная база с миграциями проекта вместо ``default`` (механизм
+        тестовой базы Django); соединения всех потоков открываются с PRAGMA
+        и режимом транзакций профиля
+        """
+        settings_dict = connection.settings_dict
+        saved_test, saved_options = settings_dict['TEST'], dict(settings_dict['OPTIONS'])
+        settings_dict['TEST'] = {**saved_test, 'NAME': str(path)}
+        settings_dict['OPTIONS'].pop('transaction_mode', None)
+        if profile.get('transaction_mode'):
+            settings_dict['OPTIONS']['transaction_mode'] = profile['transaction_mode']
+        try:
+            with override_settings(SQLITE_PRAGMAS=profile['pragmas']):
+                old_name = settings_dict['NAME']
+                connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+                try:
+                    yield
+                finally:
+                    connection.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            settings_dict['TEST'] = saved_test
+            settings_dict['OPTIONS'].clear()
+            settings_dict['OPTIONS'].update(saved_options)
+
+    def run_profile(self, options):
+        owner = User.objects.create(username='stress-owner')
+        users = User.objects.bulk_create(
+            [User(username=f'stress-{number}') for number in range(options['writers'])]
+        )
+        start = timezone.now() + timedelta(days=30)
+        competitions = Competition.objects.bulk_create([
+            Competition(
+                name=f"Соревнование {number}", description='', sport_type='chess',
+                location=f"Площадка {number}", start_date=start, end_date=start + timedelta(hours=2),
+                max_participants=1000, created_by=owner,
+            )
+            for number in range(options['competitions'])
+        ])
+        connection.close()
+
+        deadline = time.monotonic() + options['seconds']
+        totals = {'writes': 0, 'reads': 0, 'locked': 0}
+        lock = threading.Lock()
+
+        def count(key):
+            with lock:
+                totals[key] += 1
+
+        def locked(exc):
+            if 'locked' not in str(exc) and 'busy' not in str(exc):
+                raise exc
+            count('locked')
+
+        def writer(number):
+            user = users[number]
+            iteration = number
+            try:
+                while time.monotonic() < deadline:
+                    competition = competitions[iteration % len(competitions)]
+                    iteration += 1
+                    # Регистрация и отмена тем же кодом, что у страницы соревнования
+                    try:
+                        registration.register(competition, user)
+                        count('writes')
+                    except OperationalError as exc:
+                        locked(exc)
+                        continue
+                    while time.monotonic() < deadline:
+                        try:
+                            registration.unregister(competition, user)
+                            count('writes')
+                            break
+                        except OperationalError as exc:
+                            locked(exc)
+            finally:
+                connections.close_all()
+
+        def reader():
+            queryset, ordering = filter_competitions({}, True)
+            paginator = KeysetPaginator(queryset, ordering=ordering)
+            try:
+                while time.monotonic() < deadline:
+                    try:
+                        paginator.get_page()
+                        count('reads')
+                    except OperationalError as exc:
+                        locked(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=writer, args=(number,)) for number in range(options['writers'])]
+        threads += [threading.Thread(target=reader) for _ in range(options['readers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return totals
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from competitions.models import Competition
+from competitions.scheduler import advance_statuses
+
+
+class Command(BaseCommand):
+    help = (
+        "Переводит соревнования в статусы «В процессе» и «Завершено» по датам начала "
+        "и окончания. Запускайте из cron или с --loop"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Только посчитать соревнования к переводу")
+        parser.add_argument('--loop', action='store_true', help="Повторять запуск до остановки процесса")
+        parser.add_argument('--interval', type=float, default=60.0, help="Пауза между запусками с --loop, секунд")
+
+    def handle(self, *args, **options):
+        while True:
+            self.run_once(options)
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+    def run_once(self, options):
+        start = time.perf_counter()
+        counts = advance_statuses(batch_size=options['batch_size'], dry_run=options['dry_run'])
+        labels = dict(Competition.STATUS_CHOICES)
+        for (from_status, to_status), count in counts.items():
+            if count:
+                self.stdout.write(f"{labels[from_status]} → {labels[to_status]}: {count}")
+        verb = "К переводу" if options['dry_run'] else "Переведено"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb}: {sum(counts.values())} за {time.perf_counter() - start:.2f} с"
+        ))
@@ -0,0 +1,58 @@
+from django.db import migrations
+
+# Схема индекса на момент миграции (см. competitions/search.py); миграция не
+# импортирует код приложения, чтобы его дальнейшие изменения ее не затрагивали
+SEARCH_TABLE = 'competitions_competition_fts'
+SOURCE_TABLE = 'competitions_competition'
+
+
+def _normalized(column):
+    # Как search.normalize: «ё» сводится к «е»
+    return f"REPLACE(REPLACE({column}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    name, location, description = map(_normalized, ('name', 'location', 'description'))
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "name, location, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, name, location, description) "
+            f"SELECT id, {name}, {location}, {description} FROM {SOURCE_TABLE}"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {SEARCH_TABLE} ("
+            "competition_id bigint PRIMARY KEY "
+            f"REFERENCES {SOURCE_TABLE} (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {SEARCH_TABLE}_document_idx "
+            f"ON {SEARCH_TABLE} USING GIN (document)"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (competition_id, document) "
+            f"SELECT id, setweight(to_tsvector('russian', {name}), 'A') || "
+            f"setweight(to_tsvector('russian', {location}), 'B') || "
+            f"setweight(to_tsvector('russian', {description}), 'C') FROM {SOURCE_TABLE}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0002_competition_start_id_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
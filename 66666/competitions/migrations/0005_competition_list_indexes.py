@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0004_waitlistentry'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['start_date', 'id'], name='competition_public_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['status', 'start_date', 'id'], name='competition_status_start_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['sport_type', 'start_date', 'id'], name='competition_sport_start_idx'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:33
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0005_competition_list_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StatusTransition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('from_status', models.CharField(choices=[('planned', 'Запланировано'), ('ongoing', 'В процессе'), ('completed', 'Завершено'), ('cancelled', 'Отменено')], max_length=20, verbose_name='Прежний статус')),
+                ('to_status', models.CharField(choices=[('planned', 'Запланировано'), ('ongoing', 'В процессе'), ('completed', 'Завершено'), ('cancelled', 'Отменено')], max_length=20, verbose_name='Новый статус')),
+                ('changed_at', models.DateTimeField(verbose_name='Дата изменения')),
+                ('competition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='status_transitions', to='competitions.competition')),
+            ],
+            options={
+                'verbose_name': 'Смена статуса',
+                'verbose_name_plural': 'Смены статусов',
+                'ordering': ['-id'],
+            },
+        ),
+    ]
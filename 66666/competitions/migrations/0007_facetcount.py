@@ -0,0 +1,50 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:36
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_facet_counts(apps, schema_editor):
+    # Счетчики считаются здесь, а не через competitions.facets: миграция
+    # не зависит от дальнейших изменений кода приложения
+    Competition = apps.get_model('competitions', 'Competition')
+    FacetCount = apps.get_model('competitions', 'FacetCount')
+    alias = schema_editor.connection.alias
+    counts = {}
+    for facet in ('sport_type', 'status'):
+        for value, _ in Competition._meta.get_field(facet).choices:
+            for is_public in (True, False):
+                counts[facet, value, is_public] = 0
+        rows = Competition.objects.using(alias).order_by().values(facet, 'is_public').annotate(total=Count('id'))
+        for row in rows:
+            counts[facet, row[facet], row['is_public']] = row['total']
+    FacetCount.objects.using(alias).bulk_create([
+        FacetCount(facet=facet, value=value, is_public=is_public, count=total)
+        for (facet, value, is_public), total in counts.items()
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0006_statustransition'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('facet', models.CharField(max_length=20, verbose_name='Фильтр')),
+                ('value', models.CharField(max_length=50, verbose_name='Значение')),
+                ('is_public', models.BooleanField(verbose_name='Публичные соревнования')),
+                ('count', models.IntegerField(default=0, verbose_name='Количество')),
+            ],
+            options={
+                'verbose_name': 'Счетчик фильтра',
+                'verbose_name_plural': 'Счетчики фильтров',
+                'unique_together': {('facet', 'value', 'is_public')},
+            },
+        ),
+        migrations.RunPython(populate_facet_counts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 04:59
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0007_facetcount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(fields=['location', 'start_date', 'end_date'], name='competition_location_time_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:03
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0008_competition_location_time_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='competition',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['sport_type', 'start_date', 'updated_at'], name='competition_sport_feed_idx'),
+        ),
+    ]
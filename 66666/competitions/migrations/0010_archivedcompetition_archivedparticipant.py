@@ -0,0 +1,97 @@
+# Generated by Django 5.2.18 on 2026-10-18 05:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Схема индекса архива на момент миграции (см. competitions/search.py)
+ARCHIVE_SEARCH_TABLE = 'competitions_archivedcompetition_fts'
+
+
+def create_archive_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {ARCHIVE_SEARCH_TABLE} USING fts5("
+            "name, location, description, tokenize = 'unicode61 remove_diacritics 2')"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {ARCHIVE_SEARCH_TABLE} ("
+            "competition_id bigint PRIMARY KEY "
+            "REFERENCES competitions_archivedcompetition (id) ON DELETE CASCADE, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SEARCH_TABLE}_document_idx "
+            f"ON {ARCHIVE_SEARCH_TABLE} USING GIN (document)"
+        )
+
+
+def drop_archive_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor in ('sqlite', 'postgresql'):
+        schema_editor.execute(f"DROP TABLE IF EXISTS {ARCHIVE_SEARCH_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('competitions', '0009_competition_sport_feed_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedCompetition',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=200, verbose_name='Название соревнования')),
+                ('description', models.TextField(verbose_name='Описание')),
+                ('sport_type', models.CharField(choices=[('football', 'Футбол'), ('basketball', 'Баскетбол'), ('volleyball', 'Волейбол'), ('tennis', 'Теннис'), ('swimming', 'Плавание'), ('athletics', 'Легкая атлетика'), ('chess', 'Шахматы')], max_length=50, verbose_name='Вид спорта')),
+                ('location', models.CharField(max_length=200, verbose_name='Место проведения')),
+                ('start_date', models.DateTimeField(verbose_name='Дата начала')),
+                ('end_date', models.DateTimeField(verbose_name='Дата окончания')),
+                ('max_participants', models.IntegerField(verbose_name='Максимальное количество участников')),
+                ('current_participants', models.IntegerField(verbose_name='Количество участников')),
+                ('status', models.CharField(choices=[('planned', 'Запланировано'), ('ongoing', 'В процессе'), ('completed', 'Завершено'), ('cancelled', 'Отменено')], max_length=20, verbose_name='Статус')),
+                ('is_public', models.BooleanField(verbose_name='Публичное соревнование')),
+                ('registration_deadline', models.DateTimeField(blank=True, null=True, verbose_name='Срок регистрации')),
+                ('created_at', models.DateTimeField(verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(verbose_name='Дата обновления')),
+                ('archived_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата архивации')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_competitions', to=settings.AUTH_USER_MODEL, verbose_name='Создатель')),
+            ],
+            options={
+                'verbose_name': 'Архивное соревнование',
+                'verbose_name_plural': 'Архив соревнований',
+                'ordering': ['-start_date'],
+            },
+        ),
+        migrations.CreateModel(
+            name='ArchivedParticipant',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('registration_date', models.DateTimeField()),
+                ('is_confirmed', models.BooleanField(default=False)),
+                ('competition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='participants', to='competitions.archivedcompetition')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_participations', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Участник архивного соревнования',
+                'verbose_name_plural': 'Участники архивных соревнований',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='archivedcompetition',
+            index=models.Index(fields=['start_date', 'id'], name='archived_start_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedcompetition',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['start_date', 'id'], name='archived_public_start_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='archivedparticipant',
+            unique_together={('competition', 'user')},
+        ),
+        migrations.RunPython(create_archive_search_index, drop_archive_search_index),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 
@@ -73,10 +74,49 @@ class Competition(models.Model):
             ("can_register_participant", "Может регистрировать участников"),
         ]
         ordering = ['-start_date']
+        indexes = [
+            # Ключ курсорной пагинации списка: (start_date, id)
+            models.Index(fields=['start_date', 'id'], name='competition_start_id_idx'),
+            # Список для пользователей без can_view_all: только публичные
+            models.Index(
+                fields=['start_date', 'id'],
+                condition=models.Q(is_public=True),
+                name='competition_public_start_idx',
+            ),
+            # Фильтры SearchForm и админки с той же сортировкой
+            models.Index(fields=['status', 'start_date', 'id'], name='competition_status_start_idx'),
+            models.Index(fields=['sport_type', 'start_date', 'id'], name='competition_sport_start_idx'),
+            # Версия ленты iCalendar вида спорта (ical.SportFeed) только по индексу
+            models.Index(
+                fields=['sport_type', 'start_date', 'updated_at'],
+                condition=models.Q(is_public=True),
+                name='competition_sport_feed_idx',
+            ),
+            # Пересечения на площадке (schedule.location_conflicts)
+            models.Index(fields=['location', 'start_date', 'end_date'], name='competition_location_time_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def clean(self):
+        # Площадка не может быть занята двумя соревнованиями одновременно;
+        # проверяется формой организатора и админкой
+        from .schedule import describe, get_max_duration, location_conflicts
+
+        # Длина ограничена: на этом держится поиск пересечений по индексу
+        if self.start_date and self.end_date and self.end_date - self.start_date > get_max_duration():
+            raise ValidationError({
+                'end_date': f"Соревнование не может длиться дольше {get_max_duration().days} дней",
+            })
+        if self.status == 'cancelled':
+            return
+        conflicts = location_conflicts(self.location, self.start_date, self.end_date, exclude_pk=self.pk)
+        if conflicts:
+            raise ValidationError({
+                'location': f"В это время площадка занята: {describe(conflicts)}",
+            })
+
     @property
     def is_registration_open(self):
         if self.registration_deadline:
@@ -107,5 +147,153 @@ class Participant(models.Model):
         verbose_name = "Участник"
         verbose_name_plural = "Участники"
 
+    def __str__(self):
+        return f"{self.user.username} - {self.competition.name}"
+
+class WaitlistEntry(models.Model):
+    """
+    Запись в листе ожидания. Очередь FIFO внутри соревнования определяется
+    возрастающим id: постановка в очередь — одна вставка, выбор первого —
+    поиск по индексу (competition, id).
+    """
+    competition = models.ForeignKey(
+        Competition,
+        on_delete=models.CASCADE,
+        related_name='waitlist'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='waitlist_entries'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['competition', 'user']
+        ordering = ['competition', 'id']
+        indexes = [
+            models.Index(fields=['competition', 'id'], name='waitlist_queue_idx'),
+        ]
+        verbose_name = "Запись в листе ожидания"
+        verbose_name_plural = "Лист ожидания"
+
+    def __str__(self):
+        return f"{self.user.username} - {self.competition.name}"
+
+    @property
+    def position(self):
+        """Номер в очереди, начиная с 1"""
+        return WaitlistEntry.objects.filter(
+            competition_id=self.competition_id,
+            id__lte=self.id
+        ).count()
+
+
+class StatusTransition(models.Model):
+    """Смена статуса соревнования, выполненная планировщиком (scheduler.py)"""
+    competition = models.ForeignKey(
+        Competition,
+        on_delete=models.CASCADE,
+        related_name='status_transitions'
+    )
+    from_status = models.CharField(max_length=20, choices=Competition.STATUS_CHOICES, verbose_name="Прежний статус")
+    to_status = models.CharField(max_length=20, choices=Competition.STATUS_CHOICES, verbose_name="Новый статус")
+    changed_at = models.DateTimeField(verbose_name="Дата изменения")
+
+    class Meta:
+        ordering = ['-id']
+        verbose_name = "Смена статуса"
+        verbose_name_plural = "Смены статусов"
+
+    def __str__(self):
+        return f"{self.competition_id}: {self.from_status} → {self.to_status}"
+
+
+class FacetCount(models.Model):
+    """
+    Количество соревнований по значению фильтра (вид спорта, статус)
+    отдельно для публичных и закрытых. Поддерживается сигналами (facets.py).
+    """
+    facet = models.CharField(max_length=20, verbose_name="Фильтр")
+    value = models.CharField(max_length=50, verbose_name="Значение")
+    is_public = models.BooleanField(verbose_name="Публичные соревнования")
+    count = models.IntegerField(default=0, verbose_name="Количество")
+
+    class Meta:
+        unique_together = ['facet', 'value', 'is_public']
+        verbose_name = "Счетчик фильтра"
+        verbose_name_plural = "Счетчики фильтров"
+
+    def __str__(self):
+        return f"{self.facet}={self.value} ({'публичные' if self.is_public else 'закрытые'}): {self.count}"
+
+
+class ArchivedCompetition(models.Model):
+    """
+    Завершенное или отмененное соревнование, перенесенное из рабочей таблицы
+    командой archive_competitions (archive.py). Первичный ключ сохраняется,
+    поэтому старые ссылки на карточку ведут в архив.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    name = models.CharField(max_length=200, verbose_name="Название соревнования")
+    description = models.TextField(verbose_name="Описание")
+    sport_type = models.CharField(max_length=50, choices=Competition.SPORT_TYPES, verbose_name="Вид спорта")
+    location = models.CharField(max_length=200, verbose_name="Место проведения")
+    start_date = models.DateTimeField(verbose_name="Дата начала")
+    end_date = models.DateTimeField(verbose_name="Дата окончания")
+    max_participants = models.IntegerField(verbose_name="Максимальное количество участников")
+    current_participants = models.IntegerField(verbose_name="Количество участников")
+    status = models.CharField(max_length=20, choices=Competition.STATUS_CHOICES, verbose_name="Статус")
+    is_public = models.BooleanField(verbose_name="Публичное соревнование")
+    registration_deadline = models.DateTimeField(verbose_name="Срок регистрации", null=True, blank=True)
+    created_by = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_competitions',
+        verbose_name="Создатель"
+    )
+    created_at = models.DateTimeField(verbose_name="Дата создания")
+    updated_at = models.DateTimeField(verbose_name="Дата обновления")
+    archived_at = models.DateTimeField(auto_now_add=True, verbose_name="Дата архивации")
+
+    class Meta:
+        verbose_name = "Архивное соревнование"
+        verbose_name_plural = "Архив соревнований"
+        ordering = ['-start_date']
+        indexes = [
+            # Тот же ключ курсорной пагинации, что и у рабочего списка
+            models.Index(fields=['start_date', 'id'], name='archived_start_id_idx'),
+            models.Index(
+                fields=['start_date', 'id'],
+                condition=models.Q(is_public=True),
+                name='archived_public_start_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return self.name
+
+
+class ArchivedParticipant(models.Model):
+    """Участник архивного соревнования"""
+    id = models.BigIntegerField(primary_key=True)
+    competition = models.ForeignKey(
+        ArchivedCompetition,
+        on_delete=models.CASCADE,
+        related_name='participants'
+    )
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='archived_participations'
+    )
+    registration_date = models.DateTimeField()
+    is_confirmed = models.BooleanField(default=False)
+
+    class Meta:
+        unique_together = ['competition', 'user']
+        verbose_name = "Участник архивного соревнования"
+        verbose_name_plural = "Участники архивных соревнований"
+
     def __str__(self):
         return f"{self.user.username} - {self.competition.name}"
\ No newline at end of file
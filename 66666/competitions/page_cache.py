@@ -0,0 +1,119 @@
+"""
+Кэш страниц списка и карточки соревнования.
+
+Ключи содержат номер версии: общий для списка и отдельный для каждого
+соревнования. Сигналы ``Competition`` и ``Participant`` (см. ``signals.py``)
+увеличивают версию после фиксации транзакции, и старые записи просто
+перестают читаться, поэтому количество участников на страницах не устаревает.
+
+Код, меняющий соревнования в обход сигналов (``QuerySet.update()``,
+``bulk_create()``), должен сам вызывать ``invalidate_competitions()``.
+
+Если кэш страниц — память процесса, сроки записей и версий ограничены
+(см. ``shared_cache.py``).
+"""
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import shared_cache
+
+LIST_VERSION_KEY = 'competitions:pages:list-version'
+
+
+def get_page_cache():
+    return caches[getattr(settings, 'PAGE_CACHE_ALIAS', 'default')]
+
+
+def get_timeout():
+    return shared_cache.get_timeout(get_page_cache(), getattr(settings, 'PAGE_CACHE_TIMEOUT', 300))
+
+
+def _version_timeout(cache):
+    return shared_cache.get_timeout(cache, None)
+
+
+def _competition_version_key(pk):
+    return f'competitions:pages:version:{pk}'
+
+
+def _version(key):
+    cache = get_page_cache()
+    version = cache.get(key)
+    if version is None:
+        # Начальное значение уникально, чтобы после вытеснения версии из кэша
+        # не начали снова читаться записи, сохраненные под старым номером
+        cache.add(key, time.time_ns(), _version_timeout(cache))
+        version = cache.get(key)
+    return version
+
+
+async def _aversion(key):
+    cache = get_page_cache()
+    version = await cache.aget(key)
+    if version is None:
+        await cache.aadd(key, time.time_ns(), _version_timeout(cache))
+        version = await cache.aget(key)
+    return version
+
+
+def _bump(keys):
+    cache = get_page_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), _version_timeout(cache))
+
+
+def _list_key(version, tier, params):
+    digest = hashlib.md5(
+        json.dumps(params, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    return f'competitions:pages:list:{version}:{tier}:{digest}'
+
+
+def list_key(tier, params):
+    """Ключ страницы списка для уровня доступа и параметров фильтрации"""
+    return _list_key(_version(LIST_VERSION_KEY), tier, params)
+
+
+async def alist_key(tier, params):
+    return _list_key(await _aversion(LIST_VERSION_KEY), tier, params)
+
+
+def detail_key(pk):
+    return f'competitions:pages:detail:{pk}:{_version(_competition_version_key(pk))}'
+
+
+async def adetail_key(pk):
+    return f'competitions:pages:detail:{pk}:{await _aversion(_competition_version_key(pk))}'
+
+
+def load(key):
+    return get_page_cache().get(key)
+
+
+def store(key, value):
+    get_page_cache().set(key, value, get_timeout())
+
+
+async def aload(key):
+    return await get_page_cache().aget(key)
+
+
+async def astore(key, value):
+    await get_page_cache().aset(key, value, get_timeout())
+
+
+def invalidate_competitions(pks=()):
+    """
+    Сбрасывает кэш списка и карточек указанных соревнований после
+    фиксации текущей транзакции.
+    """
+    keys = [LIST_VERSION_KEY] + [_competition_version_key(pk) for pk in pks]
+    transaction.on_commit(lambda: _bump(keys))
@@ -0,0 +1,165 @@
+import base64
+import binascii
+import json
+from datetime import date, datetime
+from functools import reduce
+from operator import or_
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class KeysetPage:
+    """Страница результатов курсорной пагинации"""
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def page_url(request, **cursor):
+    """Ссылка на соседнюю страницу с сохранением параметров фильтрации"""
+    params = request.GET.copy()
+    params.pop('after', None)
+    params.pop('before', None)
+    params.update(cursor)
+    return '?' + params.urlencode()
+
+
+def _json_default(value):
+    # DjangoJSONEncoder обрезает микросекунды, а ключу нужна точная граница
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} не сериализуется в курсор")
+
+
+class KeysetPaginator:
+    """
+    Курсорная (keyset) пагинация по набору полей сортировки.
+
+    По умолчанию страницы идут по ключу (start_date, id) в порядке убывания —
+    это ``Competition.Meta.ordering = ['-start_date']`` с ``id`` в качестве
+    уточняющего ключа. Каждая страница — один запрос с
+    ``WHERE (start_date, id) < (...) LIMIT n + 1``, поэтому глубокие страницы
+    стоят столько же, сколько первая.
+    """
+
+    default_ordering = ('-start_date', '-id')
+
+    def __init__(self, queryset, per_page=20, ordering=None):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.ordering = tuple(ordering or self.default_ordering)
+        self.fields = tuple(name.lstrip('-') for name in self.ordering)
+
+    def encode_cursor(self, obj):
+        # Строки могут быть как моделями, так и словарями из .values()
+        if isinstance(obj, dict):
+            values = [obj[name] for name in self.fields]
+        else:
+            values = [getattr(obj, name) for name in self.fields]
+        raw = json.dumps(values, default=_json_default, separators=(',', ':'))
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        """Возвращает значения ключа или None для некорректного курсора"""
+        if not cursor:
+            return None
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            return None
+        # Курсор приходит от клиента: значения приводятся к типам полей ключа
+        try:
+            values = [self._key_field(name).to_python(value) for name, value in zip(self.fields, values)]
+        except (ValidationError, ValueError, TypeError):
+            return None
+        if any(value is None for value in values):
+            return None
+        return values
+
+    def _key_field(self, name):
+        annotation = self.queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+        return self.queryset.model._meta.get_field(name)
+
+    def _seek(self, values, reverse=False):
+        """Условие «строго после ключа» в лексикографическом порядке сортировки"""
+        conditions = []
+        for position, name in enumerate(self.ordering):
+            descending = name.startswith('-') != reverse
+            lookup = {self.fields[i]: values[i] for i in range(position)}
+            lookup[f"{self.fields[position]}__{'lt' if descending else 'gt'}"] = values[position]
+            conditions.append(Q(**lookup))
+        return reduce(or_, conditions)
+
+    def _reversed_ordering(self):
+        return [name[1:] if name.startswith('-') else f"-{name}" for name in self.ordering]
+
+    def page_queryset(self, after=None, before=None):
+        """Запрос, которым get_page выбирает страницу (LIMIT per_page + 1)"""
+        before_key = self.decode_cursor(before)
+        if before_key is not None:
+            queryset = self.queryset.filter(
+                self._seek(before_key, reverse=True)
+            ).order_by(*self._reversed_ordering())
+        else:
+            after_key = self.decode_cursor(after)
+            queryset = self.queryset.order_by(*self.ordering)
+            if after_key is not None:
+                queryset = queryset.filter(self._seek(after_key))
+        return queryset[:self.per_page + 1]
+
+    def get_page(self, after=None, before=None):
+        """
+        Возвращает страницу после курсора ``after`` или перед курсором ``before``.
+        Без курсоров возвращается первая страница.
+        """
+        return self._make_page(list(self.page_queryset(after, before)), after, before)
+
+    async def aget_page(self, after=None, before=None):
+        """Асинхронный вариант get_page"""
+        rows = [row async for row in self.page_queryset(after, before)]
+        return self._make_page(rows, after, before)
+
+    def _make_page(self, rows, after, before):
+        after_key = self.decode_cursor(after)
+        before_key = self.decode_cursor(before)
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if before_key is not None:
+            rows.reverse()
+            return KeysetPage(
+                rows,
+                next_cursor=self.encode_cursor(rows[-1]) if rows else before,
+                previous_cursor=self.encode_cursor(rows[0]) if rows and has_more else None,
+            )
+
+        previous_cursor = None
+        if after_key is not None:
+            previous_cursor = self.encode_cursor(rows[0]) if rows else after
+        return KeysetPage(
+            rows,
+            next_cursor=self.encode_cursor(rows[-1]) if rows and has_more else None,
+            previous_cursor=previous_cursor,
+        )
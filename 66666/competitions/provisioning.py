@@ -0,0 +1,340 @@
+"""
+Декларативное создание групп, прав и пользователей (команда ``provision``).
+
+Спецификация — словарь (или YAML/CSV-файл, см. ``load_spec``)::
+
+    groups:
+      Организаторы: [competitions.can_create_competition, competitions.can_edit_competition]
+      Администраторы: [competitions.*]
+    users:
+      - username: organizer1
+        password: org123
+        email: org1@example.com
+        groups: [Организаторы]
+
+Каждый шаг выполняется небольшим числом запросов независимо от размера
+спецификации: права разрешаются одним запросом, группы, пользователи и
+связи через промежуточные таблицы вставляются ``bulk_create``, измененные
+пользователи обновляются ``bulk_update``. Пароли новых пользователей
+хэшируются до транзакции в пуле процессов (``hashers.make_passwords``).
+
+Повторный запуск ничего не меняет: существующие группы, связи и пароли
+пользователей сохраняются. С ``prune`` у перечисленных групп и
+пользователей удаляются права и членства, которых нет в спецификации.
+
+``bulk_create`` не отправляет ``m2m_changed`` и ``post_save``, поэтому кэш
+прав затронутых пользователей сбрасывается здесь же.
+"""
+import csv
+import io
+from pathlib import Path
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.db.models import Q
+
+from .backends import invalidate_permissions
+from .hashers import make_passwords
+
+USER_FIELDS = ('email', 'first_name', 'last_name', 'is_active', 'is_staff', 'is_superuser')
+BOOLEAN_FIELDS = ('is_active', 'is_staff', 'is_superuser')
+TRUE_VALUES = ('1', 'true', 'yes', 'да')
+
+
+class SpecError(Exception):
+    pass
+
+
+class ProvisioningReport:
+    """Число созданных и измененных объектов"""
+
+    def __init__(self):
+        self.groups_created = 0
+        self.permissions_added = 0
+        self.permissions_removed = 0
+        self.users_created = 0
+        self.users_updated = 0
+        self.memberships_added = 0
+        self.memberships_removed = 0
+
+    def items(self):
+        return vars(self).items()
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() in TRUE_VALUES
+
+
+def _read_csv(text):
+    """
+    Пользователи из CSV: столбцы username, password, email, first_name,
+    last_name, groups (через «;»), is_active, is_staff, is_superuser.
+    """
+    users = []
+    for row in csv.DictReader(io.StringIO(text)):
+        user = {key: value for key, value in row.items() if key and value not in (None, '')}
+        if 'groups' in user:
+            user['groups'] = [name.strip() for name in user['groups'].split(';') if name.strip()]
+        users.append(user)
+    return {'users': users}
+
+
+def _read_yaml(text):
+    try:
+        import yaml
+    except ImportError:
+        raise SpecError("Для YAML нужен пакет PyYAML: pip install PyYAML")
+    return yaml.safe_load(text) or {}
+
+
+def load_spec(path):
+    path = Path(path)
+    text = path.read_text(encoding='utf-8-sig')
+    if path.suffix.lower() == '.csv':
+        return _read_csv(text)
+    if path.suffix.lower() in ('.yaml', '.yml'):
+        return _read_yaml(text)
+    raise SpecError(f"Неизвестный формат спецификации: {path.name}")
+
+
+def merge_specs(specs):
+    """Объединяет несколько спецификаций, например группы из YAML и пользователей из CSV"""
+    merged = {'groups': {}, 'users': []}
+    for spec in specs:
+        for name, permissions in (spec.get('groups') or {}).items():
+            merged['groups'].setdefault(name, []).extend(permissions or [])
+        merged['users'].extend(spec.get('users') or [])
+    return merged
+
+
+def _validate(spec):
+    groups = {}
+    for name, labels in (spec.get('groups') or {}).items():
+        if isinstance(labels, str):
+            labels = [labels]
+        if not isinstance(labels, (list, tuple, type(None))):
+            raise SpecError(f"Группа {name}: ожидается список прав")
+        groups[str(name)] = [str(label) for label in labels or ()]
+    users = spec.get('users') or []
+    seen = set()
+    for number, user in enumerate(users, start=1):
+        if not isinstance(user, dict):
+            raise SpecError(f"Пользователь №{number}: ожидается словарь полей")
+        if isinstance(user.get('groups'), str):
+            user['groups'] = [user['groups']]
+        username = str(user.get('username') or '').strip()
+        if not username:
+            raise SpecError(f"Пользователь №{number}: не указан username")
+        if username in seen:
+            raise SpecError(f"Пользователь {username} указан дважды")
+        seen.add(username)
+        unknown = set(user) - {'username', 'password', 'groups', *USER_FIELDS}
+        if unknown:
+            raise SpecError(f"Пользователь {username}: неизвестные поля {', '.join(sorted(unknown))}")
+    return groups, users
+
+
+def resolve_permissions(labels):
+    """
+    Разрешает метки ``app_label.codename`` и ``app_label.*`` одним запросом.
+    Возвращает словарь метка → список pk прав.
+    """
+    condition = Q()
+    for label in labels:
+        app_label, _, codename = label.partition('.')
+        if not app_label or not codename:
+            raise SpecError(f"Право {label}: ожидается app_label.codename")
+        if codename == '*':
+            condition |= Q(content_type__app_label=app_label)
+        else:
+            condition |= Q(content_type__app_label=app_label, codename=codename)
+
+    resolved = {label: [] for label in labels}
+    if not labels:
+        return resolved
+    for pk, app_label, codename in Permission.objects.filter(condition).values_list(
+        'pk', 'content_type__app_label', 'codename'
+    ):
+        for label in (f"{app_label}.{codename}", f"{app_label}.*"):
+            if label in resolved:
+                resolved[label].append(pk)
+    missing = [label for label, pks in resolved.items() if not pks]
+    if missing:
+        raise SpecError(f"Права не найдены: {', '.join(sorted(missing))}")
+    return resolved
+
+
+def _chunks(items, size):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _fetch_users(usernames, batch_size):
+    users = {}
+    for chunk in _chunks(usernames, batch_size):
+        users.update((user.username, user) for user in User.objects.filter(username__in=chunk))
+    return users
+
+
+def _ensure_groups(names, report):
+    existing = dict(Group.objects.filter(name__in=names).values_list('name', 'pk'))
+    missing = [name for name in names if name not in existing]
+    if missing:
+        Group.objects.bulk_create([Group(name=name) for name in missing], ignore_conflicts=True)
+        report.groups_created += len(missing)
+        existing = dict(Group.objects.filter(name__in=names).values_list('name', 'pk'))
+    return existing
+
+
+def _sync_group_permissions(groups_spec, group_ids, permissions, prune, report):
+    """Возвращает pk групп, права которых изменились"""
+    GroupPermission = Group.permissions.through
+    wanted = {
+        (group_ids[name], pk)
+        for name, labels in groups_spec.items()
+        for label in labels
+        for pk in permissions[label]
+    }
+    declared = [group_ids[name] for name in groups_spec]
+    current = set(GroupPermission.objects.filter(group_id__in=declared).values_list('group_id', 'permission_id'))
+
+    added = wanted - current
+    GroupPermission.objects.bulk_create(
+        [GroupPermission(group_id=group_id, permission_id=pk) for group_id, pk in added],
+        ignore_conflicts=True,
+    )
+    report.permissions_added += len(added)
+
+    removed = current - wanted if prune else set()
+    if removed:
+        condition = Q()
+        for group_id, pk in removed:
+            condition |= Q(group_id=group_id, permission_id=pk)
+        GroupPermission.objects.filter(condition).delete()
+        report.permissions_removed += len(removed)
+    return {group_id for group_id, _ in added | removed}
+
+
+def _user_values(user_spec):
+    values = {}
+    for field in USER_FIELDS:
+        if field in user_spec:
+            value = user_spec[field]
+            values[field] = _parse_bool(value) if field in BOOLEAN_FIELDS else str(value)
+    return values
+
+
+def _sync_users(users_spec, hashes, batch_size, report):
+    """Создает новых пользователей, обновляет измененные поля; возвращает {username: pk}"""
+    existing = _fetch_users([user['username'] for user in users_spec], batch_size)
+    new, changed, changed_fields = [], [], set()
+    for user_spec in users_spec:
+        username = user_spec['username']
+        values = _user_values(user_spec)
+        user = existing.get(username)
+        if user is None:
+            new.append(User(username=username, password=hashes[username], **values))
+            continue
+        fields = [field for field, value in values.items() if getattr(user, field) != value]
+        if username in hashes:
+            user.password = hashes[username]
+            fields.append('password')
+        if fields:
+            for field in fields:
+                if field != 'password':
+                    setattr(user, field, values[field])
+            changed.append(user)
+            changed_fields.update(fields)
+
+    # ignore_conflicts: пользователь мог появиться между чтением и вставкой
+    User.objects.bulk_create(new, batch_size=batch_size, ignore_conflicts=True)
+    report.users_created += len(new)
+    if changed:
+        User.objects.bulk_update(changed, sorted(changed_fields), batch_size=batch_size)
+        report.users_updated += len(changed)
+
+    return {
+        username: user.pk
+        for username, user in _fetch_users([user['username'] for user in users_spec], batch_size).items()
+    }
+
+
+def _sync_memberships(users_spec, user_ids, group_ids, prune, batch_size, report):
+    """Возвращает pk пользователей, членство которых изменилось"""
+    Membership = User.groups.through
+    wanted = {
+        (user_ids[user['username']], group_ids[name])
+        for user in users_spec
+        for name in user.get('groups') or ()
+    }
+    current = set()
+    for chunk in _chunks(user_ids.values(), batch_size):
+        current.update(Membership.objects.filter(user_id__in=chunk).values_list('user_id', 'group_id'))
+
+    added = wanted - current
+    Membership.objects.bulk_create(
+        [Membership(user_id=user_id, group_id=group_id) for user_id, group_id in added],
+        batch_size=batch_size,
+        ignore_conflicts=True,
+    )
+    report.memberships_added += len(added)
+
+    removed = current - wanted if prune else set()
+    for chunk in _chunks(removed, batch_size):
+        condition = Q()
+        for user_id, group_id in chunk:
+            condition |= Q(user_id=user_id, group_id=group_id)
+        Membership.objects.filter(condition).delete()
+    report.memberships_removed += len(removed)
+    return {user_id for user_id, _ in added | removed}
+
+
+def provision(spec, workers=None, prune=False, reset_passwords=False, dry_run=False, batch_size=1000):
+    """
+    Приводит группы, их права и пользователей в соответствие со
+    спецификацией. Возвращает ``ProvisioningReport``; при ``dry_run``
+    изменения откатываются, а пароли не хэшируются.
+    """
+    groups_spec, users_spec = _validate(spec)
+    users_spec = [dict(user, username=str(user['username']).strip()) for user in users_spec]
+    permissions = resolve_permissions({label for labels in groups_spec.values() for label in labels})
+    group_names = set(groups_spec) | {name for user in users_spec for name in user.get('groups') or ()}
+
+    # Пароли хэшируются до транзакции: это самая долгая часть,
+    # и блокировка записи на все это время не нужна
+    existing = set(_fetch_users([user['username'] for user in users_spec], batch_size))
+    to_hash = [
+        user for user in users_spec
+        if user['username'] not in existing or (reset_passwords and user.get('password'))
+    ]
+    with_password = [user for user in to_hash if user.get('password') and not dry_run]
+    hashes = dict(zip(
+        [user['username'] for user in with_password],
+        make_passwords([str(user['password']) for user in with_password], workers=workers),
+    ))
+    for user in to_hash:
+        # Без пароля пользователь не сможет войти, пока пароль не задаст администратор
+        hashes.setdefault(user['username'], make_password(None))
+
+    report = ProvisioningReport()
+    with transaction.atomic():
+        group_ids = _ensure_groups(group_names, report)
+        changed_groups = _sync_group_permissions(groups_spec, group_ids, permissions, prune, report)
+        user_ids = _sync_users(users_spec, hashes, batch_size, report)
+        changed_users = _sync_memberships(users_spec, user_ids, group_ids, prune, batch_size, report)
+
+        # Права зависят и от флагов is_active/is_superuser, поэтому кэш
+        # сбрасывается всем перечисленным пользователям и участникам измененных групп
+        changed_users.update(user_ids.values())
+        if changed_groups:
+            changed_users.update(
+                User.objects.filter(groups__in=changed_groups).values_list('pk', flat=True).distinct()
+            )
+        invalidate_permissions(list(changed_users))
+        if dry_run:
+            transaction.set_rollback(True)
+    return report
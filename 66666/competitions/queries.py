@@ -0,0 +1,35 @@
+from .models import Competition
+from .pagination import KeysetPaginator
+from .search import get_backend as get_search_backend
+
+
+def filter_competitions(filters, can_view_all, queryset=None, search_backend=None):
+    """
+    Применяет фильтры SearchForm и правила видимости к списку соревнований.
+    Возвращает queryset и порядок сортировки для KeysetPaginator.
+    Для архива передаются его queryset и поисковый индекс.
+    """
+    competitions = Competition.objects.all() if queryset is None else queryset
+    ordering = KeysetPaginator.default_ordering
+
+    query = filters.get('query')
+    sport_type = filters.get('sport_type')
+    status = filters.get('status')
+
+    if query:
+        # Полнотекстовый поиск, результаты упорядочены по релевантности
+        backend = search_backend or get_search_backend()
+        competitions = backend.search(competitions, query)
+        ordering = backend.ordering
+
+    if sport_type:
+        competitions = competitions.filter(sport_type=sport_type)
+
+    if status:
+        competitions = competitions.filter(status=status)
+
+    # Для обычных пользователей показываем только публичные соревнования
+    if not can_view_all:
+        competitions = competitions.filter(is_public=True)
+
+    return competitions, ordering
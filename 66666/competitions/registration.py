@@ -0,0 +1,447 @@
+"""
+Регистрация участников на соревнования.
+
+Регистрация выполняется одной транзакцией: условный ``UPDATE`` счетчика
+``current_participants`` (только если есть свободные места и регистрация
+открыта) и ``INSERT`` участника. Повторную регистрацию отсекает ограничение
+``unique_together`` модели ``Participant``: при ``IntegrityError`` транзакция
+откатывается вместе с увеличением счетчика.
+
+Удаление участника любым способом уменьшает счетчик и отдает место листу
+ожидания (``release_slots``), а ``reconcile_counts()`` сверяет счетчики с
+таблицей участников. Каждое
+изменение счетчика обновляет и ``updated_at``: от него зависят ETag и
+Last-Modified карточки соревнования (``http_cache.py``).
+
+Пользователь, уже зарегистрированный на соревнование в это же время,
+получает ``ScheduleConflict`` (``schedule.py``).
+
+Если мест нет, пользователь встает в лист ожидания (``WaitlistEntry``).
+Пока очередь не пуста, ``register()`` отказывает (``NoSlotsAvailable``):
+освободившиеся места получают пользователи из очереди по порядку. Место,
+освобожденное удалением участника (``unregister``, админка, каскад,
+``QuerySet.delete()``), в той же транзакции получает первый из очереди.
+"""
+import csv
+import io
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.db import IntegrityError, connection, transaction
+from django.db.models import BooleanField, Count, Exists, ExpressionWrapper, F, OuterRef, Q, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import live, page_cache, schedule
+from .models import Competition, Participant, WaitlistEntry
+
+
+class RegistrationError(Exception):
+    message = "Не удалось зарегистрироваться на соревнование"
+
+
+class AlreadyRegistered(RegistrationError):
+    message = "Вы уже зарегистрированы на это соревнование"
+
+
+class RegistrationClosed(RegistrationError):
+    message = "Регистрация на это соревнование закрыта"
+
+
+class NoSlotsAvailable(RegistrationError):
+    message = "Нет свободных мест для регистрации"
+
+
+class NotRegistered(RegistrationError):
+    message = "Вы не зарегистрированы на это соревнование"
+
+
+class AlreadyWaitlisted(RegistrationError):
+    message = "Вы уже находитесь в листе ожидания"
+
+
+class UnreadableFile(RegistrationError):
+    message = "Не удалось прочитать файл: сохраните CSV в кодировке UTF-8 или Windows-1251"
+
+
+class ScheduleConflict(RegistrationError):
+    message = "Вы уже зарегистрированы на соревнование, которое проходит в это же время"
+
+    def __init__(self, conflicts=()):
+        super().__init__()
+        self.conflicts = list(conflicts)
+        if self.conflicts:
+            self.message = f"{self.message}: {schedule.describe(self.conflicts)}"
+
+
+def open_for_registration(competition, check_waitlist=True):
+    """
+    Соревнование, если регистрация на него открыта: срок не истек и, при
+    ``check_waitlist``, лист ожидания пуст. Общие условия ``register()`` и
+    ``bulk_register()`` для условного ``UPDATE`` счетчика.
+    """
+    available = Competition.objects.filter(
+        Q(registration_deadline__isnull=True) |
+        Q(registration_deadline__gte=timezone.now()),
+        pk=competition.pk,
+    )
+    if check_waitlist:
+        available = available.filter(~Exists(WaitlistEntry.objects.filter(competition_id=OuterRef('pk'))))
+    return available
+
+
+def register(competition, user, is_confirmed=True, from_waitlist=False):
+    """
+    Регистрирует пользователя на соревнование и возвращает созданного участника.
+
+    Бросает ``RegistrationClosed``, ``NoSlotsAvailable``, ``AlreadyRegistered``
+    или ``ScheduleConflict``. Пока лист ожидания не пуст, свободное место
+    получает только очередь (``from_waitlist`` передает ``promote()``).
+    """
+    # Проверка очереди входит в тот же условный UPDATE
+    available = open_for_registration(competition, check_waitlist=not from_waitlist).filter(
+        current_participants__lt=F('max_participants'),
+    )
+    try:
+        with transaction.atomic():
+            updated = available.update(current_participants=F('current_participants') + 1, updated_at=timezone.now())
+            if not updated:
+                if not competition.is_registration_open:
+                    raise RegistrationClosed()
+                raise NoSlotsAvailable()
+            # Пересечения проверяются после условного UPDATE: на SQLite он уже занял
+            # блокировку записи, и параллельная регистрация того же пользователя
+            # ждет фиксации. На СУБД с блокировкой строк регистрации пользователя
+            # выстраивает блокировка его строки
+            if connection.features.has_select_for_update:
+                list(User.objects.select_for_update().filter(pk=user.pk).values_list('pk', flat=True))
+            conflicts = schedule.participant_conflicts(user, competition)
+            if conflicts:
+                raise ScheduleConflict(conflicts)
+            participant = Participant.objects.create(
+                competition=competition,
+                user=user,
+                is_confirmed=is_confirmed,
+            )
+    except IntegrityError:
+        raise AlreadyRegistered()
+    return participant
+
+
+def unregister(competition, user):
+    """
+    Отменяет регистрацию пользователя. Освободившееся место в той же
+    транзакции получает первый пользователь из листа ожидания.
+    """
+    with transaction.atomic():
+        # Счетчик уменьшает и очередь продвигает сигнал post_delete участника (release_slots)
+        deleted, _ = Participant.objects.filter(competition=competition, user=user).delete()
+        if not deleted:
+            raise NotRegistered()
+
+
+def release_slots(released):
+    """
+    Уменьшает счетчики после удаления участников и отдает места листу
+    ожидания; ``released`` — {pk соревнования: число удаленных участников}.
+    Вызывается сигналом post_delete один раз на вызов ``delete()`` внутри
+    транзакции удаления, поэтому срабатывает и при удалении через админку,
+    каскадом и через ``QuerySet.delete()``. Соревнования с одинаковым числом
+    удаленных обновляются одним ``UPDATE``. Возвращает список новых участников.
+    """
+    by_count = defaultdict(list)
+    for competition_id, count in released.items():
+        by_count[count].append(competition_id)
+    promoted = []
+    with transaction.atomic():
+        now = timezone.now()
+        for count, pks in by_count.items():
+            Competition.objects.filter(pk__in=pks).update(
+                current_participants=Greatest(F('current_participants') - count, Value(0)),
+                updated_at=now,
+            )
+        waiting = Competition.objects.filter(pk__in=list(released), waitlist__isnull=False).distinct()
+        for competition in waiting:
+            promoted.extend(promote(competition))
+        page_cache.invalidate_competitions(list(released))
+        live.publish(list(released))
+    return promoted
+
+
+def join_waitlist(competition, user):
+    """
+    Ставит пользователя в конец листа ожидания и возвращает запись.
+    Возвращает None, если за это время освободилось место и пользователь
+    сразу стал участником.
+    """
+    try:
+        with transaction.atomic():
+            # Повторную постановку в очередь отсекает unique_together записи
+            entry = WaitlistEntry.objects.create(competition=competition, user=user)
+            # Одним запросом: не участник ли уже пользователь и не освободилось ли место
+            # между отказом в регистрации и постановкой в очередь
+            registered, has_slots = Competition.objects.filter(pk=competition.pk).annotate(
+                registered=Exists(Participant.objects.filter(competition_id=OuterRef('pk'), user=user)),
+                has_slots=ExpressionWrapper(
+                    Q(current_participants__lt=F('max_participants')), output_field=BooleanField(),
+                ),
+            ).values_list('registered', 'has_slots').get()
+            if registered:
+                raise AlreadyRegistered()
+            if not has_slots:
+                return entry
+            promoted = promote(competition)
+    except IntegrityError:
+        raise AlreadyWaitlisted()
+    if any(participant.user_id == user.pk for participant in promoted):
+        return None
+    return entry
+
+
+def leave_waitlist(competition, user):
+    deleted, _ = WaitlistEntry.objects.filter(competition=competition, user=user).delete()
+    return bool(deleted)
+
+
+def promote(competition):
+    """
+    Переводит пользователей из начала листа ожидания в участники, пока есть
+    свободные места. Вызывается внутри транзакции, освободившей место.
+    Возвращает список новых участников.
+    """
+    promoted = []
+    with transaction.atomic():
+        while True:
+            entry = (
+                WaitlistEntry.objects.select_for_update(of=('self',))
+                .select_related('user')
+                .filter(competition=competition)
+                .order_by('id')
+                .first()
+            )
+            if entry is None:
+                break
+            try:
+                participant = register(competition, entry.user, from_waitlist=True)
+            except (AlreadyRegistered, ScheduleConflict):
+                # Место переходит следующему в очереди
+                entry.delete()
+                continue
+            except (NoSlotsAvailable, RegistrationClosed):
+                break
+            entry.delete()
+            promoted.append(participant)
+    return promoted
+
+
+class BulkRegistrationReport:
+    """Результат массовой регистрации: добавленные, повторные и отклоненные строки"""
+
+    def __init__(self):
+        self.inserted = []
+        self.duplicates = []
+        self.rejected = []
+
+    def reject(self, username, reason):
+        self.rejected.append((username, reason))
+
+
+# Кодировки загружаемых CSV: UTF-8 и cp1251, в которой сохраняет CSV Excel в русской Windows
+CSV_ENCODINGS = ('utf-8-sig', 'cp1251')
+
+
+def decode_csv(data):
+    for encoding in CSV_ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise UnreadableFile()
+
+
+def read_usernames(file):
+    """
+    Читает имена пользователей из первого столбца CSV. Строка заголовка
+    ``username`` пропускается. Байты декодируются как UTF-8, затем как
+    cp1251; если не подходит ни одна кодировка, бросает ``UnreadableFile``.
+    """
+    if isinstance(file, bytes):
+        file = decode_csv(file)
+    if isinstance(file, str):
+        file = io.StringIO(file)
+    usernames = []
+    for number, row in enumerate(csv.reader(file)):
+        if not row or not row[0].strip():
+            continue
+        if number == 0 and row[0].strip().lower() == 'username':
+            continue
+        usernames.append(row[0].strip())
+    return usernames
+
+
+def bulk_register(competition, usernames, is_confirmed=True, batch_size=500, force=False):
+    """
+    Регистрирует список пользователей на соревнование.
+
+    Пользователи и пересечения их расписания проверяются одним запросом
+    каждое, свободные места — один раз, участники вставляются через
+    ``bulk_create(ignore_conflicts=True)``, а счетчик увеличивается одним условным ``UPDATE``. Если между чтением и
+    записью счетчик изменила параллельная регистрация, попытка повторяется.
+
+    Как и ``register()``, после окончания срока регистрации или при непустом
+    листе ожидания никого не регистрирует. ``force`` позволяет организатору
+    зарегистрировать участников вне очереди и после срока; их записи в
+    листе ожидания удаляются. Число мест ограничено и в этом случае.
+    """
+    report = BulkRegistrationReport()
+    seen = set()
+    unique_usernames = []
+    for username in usernames:
+        if username in seen:
+            report.duplicates.append(username)
+        else:
+            seen.add(username)
+            unique_usernames.append(username)
+
+    users = {
+        username: (pk, is_active)
+        for username, pk, is_active in User.objects.filter(
+            username__in=unique_usernames
+        ).values_list('username', 'pk', 'is_active')
+    }
+    candidates = []
+    for username in unique_usernames:
+        if username not in users:
+            report.reject(username, "Пользователь не найден")
+        elif not users[username][1]:
+            report.reject(username, "Пользователь заблокирован")
+        else:
+            candidates.append((username, users[username][0]))
+
+    busy = schedule.conflicting_users(competition, [pk for _, pk in candidates])
+    if busy:
+        for username, pk in candidates:
+            if pk in busy:
+                report.reject(username, "Зарегистрирован на соревнование в это же время")
+        candidates = [(username, pk) for username, pk in candidates if pk not in busy]
+
+    while True:
+        with transaction.atomic():
+            current, maximum, deadline = Competition.objects.select_for_update().filter(
+                pk=competition.pk
+            ).values_list('current_participants', 'max_participants', 'registration_deadline').get()
+            registered = set(Participant.objects.filter(
+                competition=competition,
+                user_id__in=[pk for _, pk in candidates],
+            ).values_list('user_id', flat=True))
+            new = [(username, pk) for username, pk in candidates if pk not in registered]
+            available = (
+                Competition.objects.filter(pk=competition.pk) if force
+                else open_for_registration(competition)
+            )
+            reason = "Нет свободных мест"
+            if new and not force and not available.exists():
+                accepted = []
+                if deadline is not None and deadline < timezone.now():
+                    reason = "Регистрация закрыта"
+                else:
+                    reason = "Свободные места получает лист ожидания"
+            else:
+                accepted = new[:max(maximum - current, 0)]
+            if accepted:
+                # Счетчик должен остаться тем, что мы прочитали, а регистрация —
+                # открытой: иначе повторяем
+                updated = available.filter(current_participants=current).update(
+                    current_participants=F('current_participants') + len(accepted),
+                    updated_at=timezone.now(),
+                )
+                if not updated:
+                    continue
+                Participant.objects.bulk_create(
+                    [
+                        Participant(competition=competition, user_id=pk, is_confirmed=is_confirmed)
+                        for _, pk in accepted
+                    ],
+                    batch_size=batch_size,
+                    ignore_conflicts=True,
+                )
+                if force:
+                    WaitlistEntry.objects.filter(
+                        competition=competition, user_id__in=[pk for _, pk in accepted],
+                    ).delete()
+                page_cache.invalidate_competitions([competition.pk])
+                live.publish([competition.pk])
+        break
+
+    report.duplicates.extend(username for username, pk in candidates if pk in registered)
+    report.inserted.extend(username for username, _ in accepted)
+    for username, _ in new[len(accepted):]:
+        report.reject(username, reason)
+    return report
+
+
+class CounterDrift:
+    """Расхождение счетчика участников с фактическим числом записей"""
+
+    def __init__(self, competition_id, stored, actual):
+        self.competition_id = competition_id
+        self.stored = stored
+        self.actual = actual
+
+    @property
+    def delta(self):
+        return self.actual - self.stored
+
+
+def reconcile_counts(batch_size=1000, fix=True, promote_waitlist=False):
+    """
+    Сверяет ``current_participants`` с числом участников: пачками по
+    первичному ключу, одним агрегирующим запросом на пачку. При ``fix``
+    расхождения исправляются через ``bulk_update``, а с
+    ``promote_waitlist`` освободившиеся места получает лист ожидания.
+    Возвращает список ``CounterDrift``.
+    """
+    drifts = []
+    last_pk = 0
+    while True:
+        with transaction.atomic():
+            # Строки пачки блокируются, чтобы регистрация не изменила счетчик между подсчетом и записью
+            batch = dict(
+                Competition.objects.select_for_update()
+                .filter(pk__gt=last_pk)
+                .order_by('pk')
+                .values_list('pk', 'current_participants')[:batch_size]
+            )
+            if not batch:
+                break
+            actual = dict(
+                Participant.objects.filter(competition_id__in=list(batch))
+                .order_by()
+                .values('competition_id')
+                .annotate(total=Count('id'))
+                .values_list('competition_id', 'total')
+            )
+            found = [
+                CounterDrift(pk, stored, actual.get(pk, 0))
+                for pk, stored in batch.items()
+                if stored != actual.get(pk, 0)
+            ]
+            if fix and found:
+                now = timezone.now()
+                Competition.objects.bulk_update(
+                    [
+                        Competition(pk=drift.competition_id, current_participants=drift.actual, updated_at=now)
+                        for drift in found
+                    ],
+                    ['current_participants', 'updated_at'],
+                )
+                page_cache.invalidate_competitions([drift.competition_id for drift in found])
+                live.publish([drift.competition_id for drift in found])
+            drifts.extend(found)
+            last_pk = max(batch)
+
+    if fix and promote_waitlist:
+        freed = [drift.competition_id for drift in drifts if drift.delta < 0]
+        for competition in Competition.objects.filter(pk__in=freed, waitlist__isnull=False).distinct():
+            promote(competition)
+    return drifts
@@ -0,0 +1,155 @@
+"""
+Пересечения расписания: два соревнования на одной площадке в одно время
+и участник, зарегистрированный на соревнования, идущие одновременно.
+
+Интервалы полуоткрытые ``[start_date, end_date)``: соревнование, которое
+начинается в момент окончания другого, с ним не пересекается. Отмененные
+соревнования не учитываются.
+
+Соревнование длится не дольше ``COMPETITION_MAX_DURATION`` (проверяет
+``Competition.clean``). Поэтому пересекающееся с ``[start, end)``
+соревнование начинается в окне ``(start - COMPETITION_MAX_DURATION, end)``,
+и проверка площадки — один поиск по диапазону индекса ``(location,
+start_date, end_date)``, не зависящий от длины истории площадки. Длинное
+соревнование, начавшееся раньше коротких, тоже попадает в окно.
+
+Пересечения в уже сохраненных данных (импорт, ``QuerySet.update()``) и
+соревнования длиннее допустимого находит команда ``audit_schedule``.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils.timezone import localtime
+
+from .models import Competition, Participant
+
+ACTIVE = ~Q(status='cancelled')
+
+# Сколько пересечений перечислять в сообщении об ошибке
+MESSAGE_LIMIT = 3
+
+
+def get_max_duration():
+    return getattr(settings, 'COMPETITION_MAX_DURATION', timedelta(days=30))
+
+
+def overlaps(start, end):
+    """
+    Условие пересечения соревнования с интервалом ``[start, end)``; нижняя
+    граница ``start_date`` ограничивает диапазон индекса
+    """
+    return Q(start_date__lt=end, start_date__gt=start - get_max_duration(), end_date__gt=start)
+
+
+def too_long():
+    """Соревнования длиннее ``COMPETITION_MAX_DURATION``: проверка площадки их пропустит"""
+    return Competition.objects.filter(end_date__gt=F('start_date') + get_max_duration())
+
+
+def location_query(location, start, end, exclude_pk=None):
+    """Активные соревнования площадки, пересекающиеся с ``[start, end)``"""
+    scheduled = Competition.objects.filter(ACTIVE, overlaps(start, end), location=location)
+    if exclude_pk is not None:
+        scheduled = scheduled.exclude(pk=exclude_pk)
+    return scheduled.only('pk', 'name', 'location', 'start_date', 'end_date').order_by('start_date')
+
+
+def location_conflicts(location, start, end, exclude_pk=None):
+    """Соревнования на площадке ``location``, пересекающиеся с ``[start, end)``"""
+    if not location or not start or not end or start >= end:
+        return []
+    return list(location_query(location, start, end, exclude_pk))
+
+
+def user_competitions(user_id, start, end):
+    """Соревнования пользователя, пересекающиеся с ``[start, end)``: поиск по индексу участника"""
+    return Competition.objects.filter(
+        ACTIVE,
+        overlaps(start, end),
+        participants__user_id=user_id,
+    ).order_by('start_date')
+
+
+def participant_conflicts(user, competition):
+    """Соревнования пользователя, идущие одновременно с ``competition``"""
+    return list(
+        user_competitions(user.pk, competition.start_date, competition.end_date).exclude(pk=competition.pk)
+    )
+
+
+def conflicting_users(competition, user_ids):
+    """pk пользователей из ``user_ids``, уже занятых во время ``competition``, одним запросом"""
+    return set(
+        Participant.objects.filter(
+            user_id__in=user_ids,
+            competition__start_date__lt=competition.end_date,
+            competition__end_date__gt=competition.start_date,
+        )
+        .exclude(competition__status='cancelled')
+        .exclude(competition=competition)
+        .values_list('user_id', flat=True)
+    )
+
+
+def describe(competitions):
+    """«Название (дд.мм.гггг чч:мм – дд.мм.гггг чч:мм)» через запятую"""
+    parts = [
+        f"{item.name} ({localtime(item.start_date):%d.%m.%Y %H:%M} – {localtime(item.end_date):%d.%m.%Y %H:%M})"
+        for item in competitions[:MESSAGE_LIMIT]
+    ]
+    if len(competitions) > MESSAGE_LIMIT:
+        parts.append(f"и еще {len(competitions) - MESSAGE_LIMIT}")
+    return ', '.join(parts)
+
+
+class Overlap:
+    """Пересечение двух соревнований; ``key`` — площадка или pk пользователя"""
+
+    def __init__(self, key, first, second):
+        self.key = key
+        # (pk, name, start_date, end_date); first начинается не позже second
+        self.first = first
+        self.second = second
+
+
+def _sweep(rows):
+    """
+    Один проход по строкам ``(key, pk, name, start_date, end_date)``,
+    упорядоченным по ``(key, start_date)``. Для каждого ключа хранится
+    интервал с самым поздним окончанием: если очередной начинается раньше,
+    он пересекается как минимум с ним. Так находится каждое соревнование,
+    пересекающееся с начавшимися раньше, без сравнения всех пар.
+    """
+    current_key = latest = None
+    for key, *interval in rows:
+        if key != current_key:
+            current_key, latest = key, interval
+            continue
+        if interval[2] < latest[3]:
+            yield Overlap(key, latest, interval)
+        if interval[3] > latest[3]:
+            latest = interval
+
+
+def audit_locations(chunk_size=2000):
+    """Пересечения на площадках: проход по индексу ``(location, start_date, end_date)``"""
+    rows = (
+        Competition.objects.filter(ACTIVE)
+        .order_by('location', 'start_date', 'end_date')
+        .values_list('location', 'pk', 'name', 'start_date', 'end_date')
+    )
+    return _sweep(rows.iterator(chunk_size=chunk_size))
+
+
+def audit_participants(chunk_size=2000):
+    """Пользователи, зарегистрированные на соревнования, идущие одновременно"""
+    rows = (
+        Participant.objects.exclude(competition__status='cancelled')
+        .order_by('user_id', 'competition__start_date', 'competition__end_date')
+        .values_list(
+            'user_id', 'competition_id', 'competition__name',
+            'competition__start_date', 'competition__end_date',
+        )
+    )
+    return _sweep(rows.iterator(chunk_size=chunk_size))
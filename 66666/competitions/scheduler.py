@@ -0,0 +1,89 @@
+"""
+Автоматическая смена статусов соревнований по датам начала и окончания.
+
+Каждый переход — набор ``UPDATE ... WHERE status = <прежний> AND <условие по
+датам>`` пачками по первичному ключу, без загрузки моделей и ``save()``.
+Условие на прежний статус делает запуск идемпотентным: повторный запуск не
+находит уже переведенных соревнований, а отмененные не трогаются никогда.
+Каждый переход записывается в ``StatusTransition`` запросом ``INSERT ... SELECT``
+с тем же условием, что и у ``UPDATE``.
+"""
+from collections import Counter
+
+from django.db import connection, transaction
+from django.db.models import CharField, Count, DateTimeField, Q, Value
+from django.utils import timezone
+
+from . import facets, page_cache
+from .models import Competition, StatusTransition
+
+
+def transitions(now):
+    """Пары (прежний статус, новый статус, условие) в порядке применения"""
+    return [
+        ('planned', 'completed', Q(end_date__lte=now)),
+        ('ongoing', 'completed', Q(end_date__lte=now)),
+        ('planned', 'ongoing', Q(start_date__lte=now, end_date__gt=now)),
+    ]
+
+
+def advance_statuses(now=None, batch_size=1000, dry_run=False):
+    """
+    Переводит соревнования в статус, соответствующий текущему времени.
+    Возвращает Counter {(прежний, новый): количество}.
+    """
+    now = now or timezone.now()
+    counts = Counter()
+    for from_status, to_status, condition in transitions(now):
+        candidates = Competition.objects.filter(condition, status=from_status)
+        if dry_run:
+            counts[from_status, to_status] = candidates.count()
+            continue
+        last_pk = 0
+        while True:
+            pks = _advance_batch(candidates.filter(pk__gt=last_pk), from_status, to_status, now, batch_size)
+            counts[from_status, to_status] += len(pks)
+            if len(pks) < batch_size:
+                break
+            last_pk = pks[-1]
+    return counts
+
+
+def _advance_batch(candidates, from_status, to_status, now, batch_size):
+    with transaction.atomic():
+        # На PostgreSQL строки пачки блокируются до конца транзакции,
+        # чтобы параллельная правка статуса не попала в журнал переходов
+        pks = list(
+            candidates.order_by('pk').select_for_update().values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return pks
+        batch = Competition.objects.filter(pk__in=pks, status=from_status)
+        _log_transitions(batch, from_status, to_status, now)
+        # update() не отправляет сигналы: счетчики фильтров и кэш страниц обновляем сами
+        moved = Counter()
+        for row in batch.order_by().values('is_public').annotate(total=Count('id')):
+            moved['status', from_status, row['is_public']] -= row['total']
+            moved['status', to_status, row['is_public']] += row['total']
+        facets.apply(moved)
+        # update() не заполняет auto_now, updated_at выставляется явно
+        batch.update(status=to_status, updated_at=now)
+        page_cache.invalidate_competitions(pks)
+    return pks
+
+
+def _log_transitions(queryset, from_status, to_status, now):
+    """INSERT ... SELECT в журнал переходов для строк queryset"""
+    select = queryset.order_by().values_list(
+        'pk',
+        Value(from_status, output_field=CharField()),
+        Value(to_status, output_field=CharField()),
+        Value(now, output_field=DateTimeField()),
+    )
+    sql, params = select.query.sql_with_params()
+    table = connection.ops.quote_name(StatusTransition._meta.db_table)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} (competition_id, from_status, to_status, changed_at) {sql}",
+            params,
+        )
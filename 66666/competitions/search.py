@@ -0,0 +1,247 @@
+"""
+Полнотекстовый поиск соревнований.
+
+Индекс хранится в отдельной таблице ``competitions_competition_fts``, ключом
+которой служит id соревнования:
+
+* SQLite — виртуальная таблица FTS5 с токенизатором ``unicode61``. В отличие
+  от LIKE он приводит к нижнему регистру не только ASCII, но и кириллицу.
+* PostgreSQL — таблица с колонкой ``tsvector`` и GIN-индексом.
+
+Индекс обновляется сигналами модели ``Competition`` (см. ``signals.py``) и
+полностью перестраивается командой ``rebuild_search_index``. Архив
+(``archive.py``) индексируется так же, в таблице ``ARCHIVE_SEARCH_TABLE``.
+"""
+import re
+
+from django.db import connection as default_connection
+from django.db.models import FloatField, Q, Value
+from django.db.models.expressions import RawSQL
+
+SEARCH_TABLE = 'competitions_competition_fts'
+ARCHIVE_SEARCH_TABLE = 'competitions_archivedcompetition_fts'
+SEARCH_FIELDS = ('name', 'location', 'description')
+
+_TERM_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def normalize(text):
+    # unicode61 снимает диакритику только с латиницы, «ё» и «е» сводим сами
+    return (text or '').replace('ё', 'е').replace('Ё', 'Е')
+
+
+def search_terms(query):
+    """Разбивает пользовательский запрос на слова без служебного синтаксиса"""
+    return _TERM_RE.findall(normalize(query))
+
+
+class BaseSearchBackend:
+    """Общий интерфейс бэкендов поиска"""
+
+    # Сортировка результатов для KeysetPaginator: сначала самые релевантные
+    ordering = ('-search_rank', '-id')
+
+    def __init__(self, connection=None, table=SEARCH_TABLE, source_table='competitions_competition'):
+        self.connection = connection or default_connection
+        # Таблица индекса и таблица соревнований, на строки которой она ссылается
+        self.table = table
+        self.source_table = source_table
+
+    def create_index(self):
+        pass
+
+    def drop_index(self):
+        pass
+
+    def index_rows(self, rows):
+        """Индексирует кортежи (id, name, location, description)"""
+
+    def remove(self, pks):
+        pass
+
+    def clear(self):
+        pass
+
+    def index(self, competitions):
+        self.index_rows([
+            (c.pk, c.name, c.location, c.description) for c in competitions
+        ])
+
+    def prepare_rows(self, rows):
+        return [
+            (pk, normalize(name), normalize(location), normalize(description))
+            for pk, name, location, description in rows
+        ]
+
+    def search(self, queryset, query):
+        """Возвращает queryset, отфильтрованный по запросу и с аннотацией search_rank"""
+        raise NotImplementedError
+
+    def empty(self, queryset):
+        # Запрос без слов ничего не находит, но сортировка по search_rank должна работать
+        return queryset.annotate(search_rank=Value(0.0, output_field=FloatField())).none()
+
+
+class SQLiteSearchBackend(BaseSearchBackend):
+    # bm25() возвращает меньшие значения для более релевантных строк
+    ordering = ('search_rank', 'id')
+    # Веса столбцов для bm25: название, место, описание
+    weights = (10.0, 5.0, 1.0)
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {self.table} USING fts5("
+                f"{', '.join(SEARCH_FIELDS)}, "
+                "tokenize = 'unicode61 remove_diacritics 2')"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index_rows(self, rows):
+        rows = self.prepare_rows(rows)
+        if not rows:
+            return
+        self.remove([row[0] for row in rows])
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (rowid, {', '.join(SEARCH_FIELDS)}) "
+                "VALUES (%s, %s, %s, %s)",
+                rows,
+            )
+
+    def remove(self, pks):
+        pks = list(pks)
+        if not pks:
+            return
+        placeholders = ', '.join(['%s'] * len(pks))
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE rowid IN ({placeholders})", pks)
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table}")
+
+    def match_expression(self, query):
+        # Каждое слово — отдельная фраза с поиском по префиксу, слова через AND
+        return ' '.join(f'"{term}"*' for term in search_terms(query))
+
+    def search(self, queryset, query):
+        match = self.match_expression(query)
+        if not match:
+            return self.empty(queryset)
+        table = queryset.model._meta.db_table
+        weights = ', '.join(str(w) for w in self.weights)
+        # Таблица индекса присоединяется к запросу: MATCH выполняется один раз,
+        # а bm25() считается в том же проходе (коррелированный подзапрос
+        # повторял бы MATCH для каждой найденной строки)
+        return queryset.extra(
+            tables=[self.table],
+            where=[f"{self.table}.rowid = {table}.id", f"{self.table} MATCH %s"],
+            params=[match],
+        ).annotate(
+            search_rank=RawSQL(f"bm25({self.table}, {weights})", [], output_field=FloatField())
+        )
+
+
+class PostgresSearchBackend(BaseSearchBackend):
+    config = 'russian'
+
+    def create_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table} ("
+                "competition_id bigint PRIMARY KEY "
+                f"REFERENCES {self.source_table} (id) ON DELETE CASCADE, "
+                "document tsvector NOT NULL)"
+            )
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table}_document_idx "
+                f"ON {self.table} USING GIN (document)"
+            )
+
+    def drop_index(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {self.table}")
+
+    def index_rows(self, rows):
+        rows = self.prepare_rows(rows)
+        if not rows:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.executemany(
+                f"INSERT INTO {self.table} (competition_id, document) VALUES (%s, "
+                "setweight(to_tsvector(%s::regconfig, %s), 'A') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'B') || "
+                "setweight(to_tsvector(%s::regconfig, %s), 'C')) "
+                "ON CONFLICT (competition_id) DO UPDATE SET document = EXCLUDED.document",
+                [
+                    (pk, self.config, name, self.config, location, self.config, description)
+                    for pk, name, location, description in rows
+                ],
+            )
+
+    def remove(self, pks):
+        pks = list(pks)
+        if not pks:
+            return
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {self.table} WHERE competition_id = ANY(%s)", [pks])
+
+    def clear(self):
+        with self.connection.cursor() as cursor:
+            cursor.execute(f"TRUNCATE {self.table}")
+
+    def tsquery(self, query):
+        return ' & '.join(f"{term}:*" for term in search_terms(query))
+
+    def search(self, queryset, query):
+        tsquery = self.tsquery(query)
+        if not tsquery:
+            return self.empty(queryset)
+        table = queryset.model._meta.db_table
+        return queryset.extra(
+            tables=[self.table],
+            where=[
+                f"{self.table}.competition_id = {table}.id",
+                f"{self.table}.document @@ to_tsquery(%s::regconfig, %s)",
+            ],
+            params=[self.config, tsquery],
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank({self.table}.document, to_tsquery(%s::regconfig, %s))",
+                [self.config, tsquery],
+                output_field=FloatField(),
+            )
+        )
+
+
+class IcontainsSearchBackend(BaseSearchBackend):
+    """Запасной вариант для СУБД без поддержки полнотекстового индекса"""
+
+    ordering = ('-start_date', '-id')
+
+    def search(self, queryset, query):
+        return queryset.filter(
+            Q(name__icontains=query) |
+            Q(description__icontains=query) |
+            Q(location__icontains=query)
+        )
+
+
+BACKENDS = {
+    'sqlite': SQLiteSearchBackend,
+    'postgresql': PostgresSearchBackend,
+}
+
+
+def get_backend(connection=None, table=SEARCH_TABLE, source_table='competitions_competition'):
+    connection = connection or default_connection
+    return BACKENDS.get(connection.vendor, IcontainsSearchBackend)(connection, table, source_table)
+
+
+def get_archive_backend(connection=None):
+    """Индекс архива (ArchivedCompetition) в своей таблице, тем же бэкендом"""
+    return get_backend(connection, ARCHIVE_SEARCH_TABLE, 'competitions_archivedcompetition')
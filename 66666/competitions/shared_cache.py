@@ -0,0 +1,23 @@
+"""
+Сроки хранения для кэшей прав и страниц.
+
+Записи этих кэшей сбрасываются сигналами в том процессе, где изменились
+данные. Общий кэш (файлы, memcached, redis) видят все процессы, и сброс
+доходит до каждого. Кэш в памяти процесса (``LocMemCache``) другие процессы
+не видят: у них отозванные права и старые страницы живут до истечения срока
+записи. Поэтому для такого кэша срок ограничивается ``LOCAL_CACHE_TIMEOUT``.
+"""
+from django.conf import settings
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def is_process_local(cache):
+    return isinstance(cache, LocMemCache)
+
+
+def get_timeout(cache, timeout):
+    """Срок хранения ``timeout`` (None — бессрочно), ограниченный для кэша процесса"""
+    if not is_process_local(cache):
+        return timeout
+    limit = getattr(settings, 'LOCAL_CACHE_TIMEOUT', 30)
+    return limit if timeout is None else min(timeout, limit)
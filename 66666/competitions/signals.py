@@ -0,0 +1,190 @@
+from collections import Counter
+
+from django.contrib.auth.models import Group, Permission, User
+from django.db.backends.signals import connection_created
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import database, facets, instrumentation, live, page_cache, registration
+from .backends import invalidate_permissions
+from .models import Competition, Participant
+from .search import get_backend
+
+
+@receiver(connection_created)
+def configure_database_connection(sender, connection, **kwargs):
+    database.configure_connection(connection)
+    instrumentation.install_query_recorder(connection)
+
+
+@receiver(post_save, sender=Competition)
+def update_search_index(sender, instance, raw=False, **kwargs):
+    # При загрузке фикстур (raw) индекс перестраивается командой rebuild_search_index
+    if raw:
+        return
+    get_backend().index([instance])
+
+
+@receiver(post_delete, sender=Competition)
+def remove_from_search_index(sender, instance, **kwargs):
+    get_backend().remove([instance.pk])
+
+
+@receiver(post_save, sender=Competition)
+@receiver(post_delete, sender=Competition)
+def invalidate_competition_pages(sender, instance, **kwargs):
+    page_cache.invalidate_competitions([instance.pk])
+
+
+# Счетчики фильтров (facets.py)
+
+@receiver(pre_save, sender=Competition)
+def remember_facet_keys(sender, instance, raw=False, **kwargs):
+    instance._previous_facet_keys = []
+    if raw or instance._state.adding:
+        return
+    previous = Competition.objects.filter(pk=instance.pk).values_list(
+        'sport_type', 'status', 'is_public'
+    ).first()
+    if previous is not None:
+        instance._previous_facet_keys = facets.keys(*previous)
+
+
+@receiver(post_save, sender=Competition)
+def update_facet_counts(sender, instance, raw=False, **kwargs):
+    # При загрузке фикстур (raw) счетчики пересчитывает команда reconcile_facets
+    if raw:
+        return
+    deltas = Counter(facets.keys(instance.sport_type, instance.status, instance.is_public))
+    deltas.subtract(getattr(instance, '_previous_facet_keys', []))
+    facets.apply(deltas)
+
+
+@receiver(post_delete, sender=Competition)
+def remove_facet_counts(sender, instance, **kwargs):
+    deltas = Counter(facets.keys(instance.sport_type, instance.status, instance.is_public))
+    facets.apply({key: -delta for key, delta in deltas.items()})
+
+
+# Освобождение мест (registration.release_slots). Collector отправляет
+# pre_delete для всех удаляемых объектов раньше первого post_delete, с общим
+# origin: удаленные одним вызовом delete() участники собираются на origin и
+# передаются одной пачкой после последнего post_delete участника, в той же
+# транзакции. Участники соревнований, удаляемых тем же вызовом, пропускаются.
+
+class SlotRelease:
+    def __init__(self):
+        self.pending = 0
+        self.released = Counter()
+        self.deleted_competitions = set()
+
+
+def _slot_release(origin):
+    release = getattr(origin, '_slot_release', None)
+    if release is None:
+        release = origin._slot_release = SlotRelease()
+    return release
+
+
+@receiver(pre_delete, sender=Participant)
+def count_deleted_participant(sender, instance, origin=None, **kwargs):
+    if origin is not None:
+        _slot_release(origin).pending += 1
+
+
+@receiver(pre_delete, sender=Competition)
+def remember_deleted_competition(sender, instance, origin=None, **kwargs):
+    if origin is not None:
+        _slot_release(origin).deleted_competitions.add(instance.pk)
+
+
+@receiver(post_delete, sender=Participant)
+def release_participant_slot(sender, instance, origin=None, **kwargs):
+    release = getattr(origin, '_slot_release', None)
+    if release is None:
+        registration.release_slots({instance.competition_id: 1})
+        return
+    release.pending -= 1
+    if instance.competition_id not in release.deleted_competitions:
+        release.released[instance.competition_id] += 1
+    if release.pending > 0:
+        return
+    del origin._slot_release
+    if release.released:
+        registration.release_slots(release.released)
+
+
+@receiver(post_delete, sender=Competition)
+def forget_deleted_competitions(sender, instance, origin=None, **kwargs):
+    # Соревнование без участников: post_delete участника не придет
+    release = getattr(origin, '_slot_release', None)
+    if release is not None and release.pending <= 0:
+        del origin._slot_release
+
+
+@receiver(post_save, sender=Participant)
+def invalidate_participant_pages(sender, instance, **kwargs):
+    # Количество участников отображается и в списке, и в карточке;
+    # удаление обрабатывает release_slots
+    page_cache.invalidate_competitions([instance.competition_id])
+
+
+@receiver(post_save, sender=Participant)
+def publish_participant_counts(sender, instance, **kwargs):
+    # Подписчики страницы соревнования получают новый счетчик (live.py)
+    live.publish([instance.competition_id])
+
+
+# Кэш прав (backends.CachedModelBackend)
+
+PERMISSION_M2M_ACTIONS = ('post_add', 'post_remove', 'pre_clear')
+
+
+def _group_member_ids(group_ids):
+    return User.objects.filter(groups__in=group_ids).values_list('pk', flat=True).distinct()
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_user_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in PERMISSION_M2M_ACTIONS:
+        return
+    if not reverse:
+        invalidate_permissions([instance.pk])
+    elif action == 'pre_clear':
+        invalidate_permissions(list(instance.user_set.values_list('pk', flat=True)))
+    else:
+        invalidate_permissions(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in PERMISSION_M2M_ACTIONS:
+        return
+    if not reverse:
+        group_ids = [instance.pk]
+    elif action == 'pre_clear':
+        group_ids = list(instance.group_set.values_list('pk', flat=True))
+    else:
+        group_ids = list(pk_set)
+    invalidate_permissions(list(_group_member_ids(group_ids)))
+
+
+@receiver(post_save, sender=User)
+def invalidate_saved_user_permissions(sender, instance, update_fields=None, **kwargs):
+    # Вход в систему обновляет только last_login — права от этого не меняются
+    if update_fields is not None and set(update_fields) == {'last_login'}:
+        return
+    invalidate_permissions([instance.pk])
+
+
+@receiver(pre_delete, sender=Group)
+def invalidate_deleted_group_permissions(sender, instance, **kwargs):
+    invalidate_permissions(list(_group_member_ids([instance.pk])))
+
+
+@receiver(pre_delete, sender=Permission)
+def invalidate_deleted_permission(sender, instance, **kwargs):
+    user_ids = set(instance.user_set.values_list('pk', flat=True))
+    user_ids.update(_group_member_ids(instance.group_set.values_list('pk', flat=True)))
+    invalidate_permissions(user_ids)
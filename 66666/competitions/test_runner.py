@@ -0,0 +1,34 @@
+"""
+Запуск тестов (``TEST_RUNNER``).
+
+Профиль кэша ``shared`` хранит файлы в ``CACHE_LOCATION``. Тесты не должны
+писать туда и читать записи, оставшиеся от сервера или прошлого прогона,
+поэтому на время прогона каждый файловый кэш переносится во временный
+каталог, который затем удаляется.
+"""
+import tempfile
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+FILE_BASED_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+
+class TestRunner(DiscoverRunner):
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.cache_directory = tempfile.TemporaryDirectory(prefix='sports_competition_test_cache_')
+        caches = {
+            alias: {**config, 'LOCATION': f'{self.cache_directory.name}/{alias}'}
+            if config['BACKEND'] == FILE_BASED_CACHE else config
+            for alias, config in settings.CACHES.items()
+        }
+        self.cache_override = override_settings(CACHES=caches)
+        self.cache_override.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.cache_override.disable()
+        self.cache_directory.cleanup()
+        super().teardown_test_environment(**kwargs)
@@ -0,0 +1,34 @@
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.utils import timezone
+
+from competitions.models import Competition
+
+
+def make_user(username, **kwargs):
+    # Без пароля: хэширование PBKDF2 заметно замедляет тесты, вход — через force_login
+    return User.objects.create_user(username=username, **kwargs)
+
+
+def make_competition(created_by, **kwargs):
+    start = kwargs.pop('start_date', timezone.now() + timedelta(days=10))
+    values = {
+        'name': 'Городской турнир',
+        'description': 'Описание',
+        'sport_type': 'chess',
+        'location': 'Дворец спорта',
+        'start_date': start,
+        'end_date': start + timedelta(hours=4),
+        'max_participants': 10,
+        'created_by': created_by,
+    }
+    values.update(kwargs)
+    return Competition.objects.create(**values)
+
+
+def clear_caches():
+    # Кэш страниц и прав общий для всех тестов процесса
+    for cache in caches.all():
+        cache.clear()
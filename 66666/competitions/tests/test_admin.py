@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from competitions import database
+from competitions.admin import EstimatedCountPaginator
+from competitions.models import Competition
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+class CompetitionAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = make_user('admin', is_staff=True, is_superuser=True)
+        for number, (year, month) in enumerate([(2027, 3), (2027, 5), (2029, 1)]):
+            make_competition(
+                cls.admin, name=f"Турнир {number}", location=f"Зал {number}",
+                start_date=timezone.make_aware(datetime(year, month, 10, 12)),
+            )
+
+    def setUp(self):
+        clear_caches()
+        self.client.force_login(self.admin)
+
+    def get(self, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('admin:competitions_competition_changelist'), params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query['sql'] for query in queries]
+
+    def test_date_hierarchy_years_without_full_scan(self):
+        response, queries = self.get()
+        for year in ('2027', '2029'):
+            self.assertContains(response, f'start_date__year={year}')
+        # Год без соревнований в списке не появляется
+        self.assertNotContains(response, 'start_date__year=2028')
+        self.assertFalse([sql for sql in queries if 'DISTINCT' in sql])
+
+    def test_date_hierarchy_months(self):
+        response, queries = self.get(start_date__year=2027)
+        self.assertContains(response, 'start_date__month=3')
+        self.assertContains(response, 'start_date__month=5')
+        self.assertNotContains(response, 'start_date__month=4')
+        self.assertFalse([sql for sql in queries if 'DISTINCT' in sql])
+        response, _ = self.get(start_date__year=2027, start_date__month=3)
+        self.assertContains(response, 'start_date__day=10')
+
+
+class EstimateCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_user('organizer')
+        cls.competitions = [
+            make_competition(owner, name=f"Турнир {number}", location=f"Зал {number}") for number in range(6)
+        ]
+
+    def test_estimate_follows_analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS sqlite_stat1")
+        # Без статистики оценки нет: строки считаются точно
+        self.assertIsNone(database.estimate_count(Competition))
+        database.analyze([Competition])
+        self.assertEqual(database.estimate_count(Competition), 6)
+        # Удаление (например, перенос в архив) не завышает оценку навсегда
+        Competition.objects.filter(pk__in=[c.pk for c in self.competitions[:4]]).delete()
+        database.analyze([Competition])
+        self.assertEqual(database.estimate_count(Competition), 2)
+
+    @override_settings(ADMIN_COUNT_ESTIMATE_THRESHOLD=5)
+    def test_paginator_uses_estimate_above_threshold(self):
+        database.analyze([Competition])
+        Competition.objects.filter(pk=self.competitions[0].pk).delete()
+        self.assertEqual(EstimatedCountPaginator(Competition.objects.all(), 100).count, 6)
+        self.assertEqual(EstimatedCountPaginator(Competition.objects.filter(status='planned'), 100).count, 5)
@@ -0,0 +1,65 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser, Permission
+from django.test import AsyncRequestFactory, TestCase
+from django.urls import reverse
+
+from competitions import async_api
+from competitions.models import Participant
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+class ParticipantsAccessTests(TestCase):
+    """Участников в API видят организатор и редакторы, как и выгрузку"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.member = make_user('member')
+        cls.editor = make_user('editor')
+        cls.editor.user_permissions.add(Permission.objects.get(codename='can_edit_competition'))
+        cls.competition = make_competition(cls.owner)
+        Participant.objects.create(competition=cls.competition, user=cls.member)
+
+    def setUp(self):
+        clear_caches()
+
+    def get(self, user=None):
+        if user is not None:
+            self.client.force_login(user)
+        return self.client.get(reverse('api_competition_participants', args=[self.competition.pk]))
+
+    def test_anonymous_and_member_forbidden(self):
+        for user in (None, self.member):
+            with self.subTest(user=user and user.username):
+                self.client.logout()
+                response = self.get(user)
+                self.assertEqual(response.status_code, 403)
+                self.assertNotIn('member', response.content.decode())
+
+    def test_owner_and_editor_allowed(self):
+        for user in (self.owner, self.editor):
+            with self.subTest(user=user.username):
+                response = self.get(user)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([row['username'] for row in json.loads(response.content)['results']], ['member'])
+
+    def test_unknown_competition(self):
+        self.client.force_login(self.owner)
+        response = self.client.get(reverse('api_competition_participants', args=[self.competition.pk + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    async def async_get(self, user):
+        request = AsyncRequestFactory().get(f'/api/competitions/{self.competition.pk}/participants/')
+
+        async def auser():
+            return user
+
+        request.auser = auser
+        return await async_api.competition_participants(request, self.competition.pk)
+
+    async def test_async_view_checks_access(self):
+        self.assertEqual((await self.async_get(AnonymousUser())).status_code, 403)
+        self.assertEqual((await self.async_get(self.member)).status_code, 403)
+        self.assertEqual((await self.async_get(self.owner)).status_code, 200)
@@ -0,0 +1,131 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.db import connection
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from competitions import archive, facets
+from competitions.models import (
+    ArchivedCompetition, ArchivedParticipant, Competition, FacetCount, Participant, StatusTransition, WaitlistEntry,
+)
+from competitions.search import ARCHIVE_SEARCH_TABLE, SEARCH_TABLE
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+def indexed(table):
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT rowid FROM {table}")
+        return {row[0] for row in cursor.fetchall()}
+
+
+class ArchiveTests(TestCase):
+    """Перенос в архив: строки, производные данные и повторный запуск после сбоя"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.users = [make_user(f'user{number}') for number in range(3)]
+        finished = timezone.now() - timedelta(days=400)
+        cls.old = [
+            make_competition(
+                cls.owner, name=f"Старый турнир {number}", location=f"Зал {number}",
+                start_date=finished, end_date=finished + timedelta(hours=4),
+                status='completed' if number % 2 else 'cancelled', sport_type='football',
+            )
+            for number in range(5)
+        ]
+        for competition in cls.old:
+            for user in cls.users[:2]:
+                Participant.objects.create(competition=competition, user=user)
+            WaitlistEntry.objects.create(competition=competition, user=cls.users[2])
+            StatusTransition.objects.create(
+                competition=competition, from_status='ongoing', to_status=competition.status, changed_at=finished,
+            )
+        # Недавно завершенное и будущее соревнования остаются в рабочих таблицах
+        cls.recent = make_competition(
+            cls.owner, name="Недавний турнир", status='completed',
+            start_date=timezone.now() - timedelta(days=3), end_date=timezone.now() - timedelta(days=2),
+        )
+        cls.planned = make_competition(cls.owner, name="Будущий турнир")
+
+    def setUp(self):
+        clear_caches()
+
+    @property
+    def old_pks(self):
+        return {competition.pk for competition in self.old}
+
+    def assertArchived(self):
+        self.assertFalse(Competition.objects.filter(pk__in=self.old_pks).exists())
+        self.assertEqual(set(ArchivedCompetition.objects.values_list('pk', flat=True)), self.old_pks)
+        self.assertEqual(ArchivedParticipant.objects.count(), 2 * len(self.old))
+        self.assertEqual(
+            set(ArchivedParticipant.objects.values_list('competition_id', 'user_id')),
+            {(pk, user.pk) for pk in self.old_pks for user in self.users[:2]},
+        )
+        for model in (Participant, WaitlistEntry, StatusTransition):
+            self.assertFalse(model.objects.filter(competition_id__in=self.old_pks).exists())
+        self.assertEqual(Competition.objects.filter(pk__in=[self.recent.pk, self.planned.pk]).count(), 2)
+
+    def test_rows_moved_to_archive(self):
+        report = archive.archive(batch_size=2)
+        self.assertEqual((report.batches, report.competitions, report.participants), (3, 5, 10))
+        self.assertArchived()
+        archived = ArchivedCompetition.objects.get(pk=self.old[0].pk)
+        self.assertEqual((archived.name, archived.status), (self.old[0].name, self.old[0].status))
+
+    def test_dry_run_changes_nothing(self):
+        report = archive.archive(dry_run=True)
+        self.assertEqual((report.competitions, report.participants), (5, 10))
+        self.assertFalse(ArchivedCompetition.objects.exists())
+
+    def test_facets_and_search_index_updated(self):
+        archive.archive()
+        current = {
+            (row.facet, row.value, row.is_public): row.count for row in FacetCount.objects.all()
+        }
+        self.assertEqual(current, dict(facets.compute(Competition.objects.all())))
+        self.assertEqual(current['sport_type', 'football', True], 0)
+        self.assertFalse(indexed(SEARCH_TABLE) & self.old_pks)
+        self.assertIn(self.planned.pk, indexed(SEARCH_TABLE))
+        self.assertEqual(indexed(ARCHIVE_SEARCH_TABLE), self.old_pks)
+
+    def test_resume_after_interrupted_batch(self):
+        original = archive.get_archive_backend
+        calls = []
+
+        def failing_backend():
+            # Сбой в конце второй пачки, после копирования и удаления строк
+            calls.append(1)
+            if len(calls) == 2:
+                raise RuntimeError("сбой во второй пачке")
+            return original()
+
+        with mock.patch.object(archive, 'get_archive_backend', failing_backend):
+            with self.assertRaises(RuntimeError):
+                archive.archive(batch_size=2)
+        # Первая пачка зафиксирована, вторая откатилась целиком
+        self.assertEqual(ArchivedCompetition.objects.count(), 2)
+        self.assertEqual(ArchivedParticipant.objects.count(), 4)
+        self.assertEqual(Competition.objects.filter(pk__in=self.old_pks).count(), 3)
+        self.assertEqual(Participant.objects.filter(competition_id__in=self.old_pks).count(), 6)
+        self.assertEqual(len(indexed(SEARCH_TABLE) & self.old_pks), 3)
+        self.assertEqual(FacetCount.objects.get(facet='sport_type', value='football', is_public=True).count, 3)
+
+        report = archive.archive(batch_size=2)
+        self.assertEqual(report.competitions, 3)
+        self.assertArchived()
+        self.assertEqual(indexed(ARCHIVE_SEARCH_TABLE), self.old_pks)
+        self.assertEqual(FacetCount.objects.get(facet='sport_type', value='football', is_public=True).count, 0)
+
+    def test_archived_detail_url(self):
+        archive.archive()
+        pk = self.old[0].pk
+        response = self.client.get(reverse('competition_detail', args=[pk]))
+        self.assertRedirects(response, reverse('archive_detail', args=[pk]), status_code=301)
+        response = self.client.get(reverse('archive_detail', args=[pk]))
+        self.assertContains(response, self.old[0].name)
+        self.assertEqual(self.client.get(reverse('competition_detail', args=[10 ** 6])).status_code, 404)
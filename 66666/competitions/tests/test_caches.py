@@ -0,0 +1,77 @@
+import tempfile
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import Permission
+from django.core.cache import caches
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.checks import run_checks
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from competitions import backends, page_cache
+
+from .helpers import make_user
+
+LOCAL_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+class SharedCacheTests(TestCase):
+    """Кэш прав и страниц по умолчанию общий для процессов"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.location = directory.name
+        shared = override_settings(CACHES={
+            'default': {**settings.CACHE_PROFILES['shared'], 'LOCATION': self.location},
+        })
+        shared.enable()
+        self.addCleanup(shared.disable)
+
+    def test_default_profile_is_shared(self):
+        self.assertEqual(settings.CACHE_PROFILE, 'shared')
+        self.assertIsInstance(backends.get_permission_cache(), FileBasedCache)
+        self.assertEqual(backends.get_timeout(backends.get_permission_cache()), settings.PERMISSION_CACHE_TIMEOUT)
+        self.assertEqual(page_cache.get_timeout(), settings.PAGE_CACHE_TIMEOUT)
+
+    def test_revoked_permission_invisible_to_other_process(self):
+        user = make_user('member')
+        user.user_permissions.add(Permission.objects.get(codename='can_register_participant'))
+        self.assertTrue(user.has_perm('competitions.can_register_participant'))
+        # Второй процесс — отдельный экземпляр кэша с тем же каталогом
+        other = FileBasedCache(self.location, {})
+        self.assertIsNotNone(other.get(backends.permission_cache_key(user.pk)))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user.user_permissions.clear()
+        self.assertIsNone(other.get(backends.permission_cache_key(user.pk)))
+
+
+class TestRunnerCacheTests(SimpleTestCase):
+    def test_file_cache_moved_to_temporary_directory(self):
+        location = settings.CACHES['default']['LOCATION']
+        self.assertNotEqual(location, settings.CACHE_PROFILES['shared']['LOCATION'])
+        self.assertTrue(location.startswith(tempfile.gettempdir()))
+        self.assertFalse(location.startswith(str(settings.BASE_DIR)))
+
+
+@override_settings(CACHES=LOCAL_CACHES, LOCAL_CACHE_TIMEOUT=30)
+class ProcessLocalCacheTests(TestCase):
+    """Кэш в памяти процесса: сроки записей ограничены, проверка предупреждает"""
+
+    def test_permission_timeout_limited(self):
+        user = make_user('member')
+        user.has_perm('competitions.can_register_participant')
+        key = caches['default'].make_and_validate_key(backends.permission_cache_key(user.pk))
+        expires = caches['default']._expire_info[key]
+        self.assertLessEqual(expires - time.time(), 30)
+
+    def test_page_timeouts_limited(self):
+        self.assertEqual(page_cache.get_timeout(), 30)
+        page_cache._version(page_cache.LIST_VERSION_KEY)
+        key = caches['default'].make_and_validate_key(page_cache.LIST_VERSION_KEY)
+        self.assertIsNotNone(caches['default']._expire_info[key])
+
+    def test_deploy_check_warns(self):
+        ids = [message.id for message in run_checks(include_deployment_checks=True)]
+        self.assertIn('competitions.W002', ids)
@@ -0,0 +1,52 @@
+import io
+
+from django.contrib.auth.models import Group, Permission
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from .helpers import make_competition, make_user
+
+
+class BenchmarkCommandTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        group = Group.objects.create(name='Участники')
+        group.permissions.add(Permission.objects.get(codename='can_register_participant'))
+        cls.member = make_user('member')
+        cls.member.groups.add(group)
+        make_competition(make_user('organizer'))
+
+    def benchmark(self, password):
+        out, err = io.StringIO(), io.StringIO()
+        call_command(
+            'benchmark', iterations=1, warmup=0, host='testserver', password=password, stdout=out, stderr=err,
+        )
+        return out.getvalue(), err.getvalue()
+
+    def test_wrong_password_skips_login_only(self):
+        out, err = self.benchmark('не тот пароль')
+        self.assertIn('сценарий login пропущен', err)
+        self.assertNotIn('login ', out)
+        self.assertIn('register', out)
+        self.assertIn('list_anonymous', out)
+
+    def test_login_scenario_with_known_password(self):
+        self.member.set_password('seed123')
+        self.member.save()
+        out, err = self.benchmark('seed123')
+        self.assertIn('login', out)
+        self.assertEqual(err, '')
+
+
+class SqliteConcurrencyCommandTests(TransactionTestCase):
+    def test_production_profile_reduces_lock_errors(self):
+        out = io.StringIO()
+        call_command('sqlite_concurrency', seconds=1, writers=4, readers=2, competitions=3, stdout=out)
+        lines = out.getvalue().splitlines()
+        rows = {line.split()[0]: [int(float(value)) for value in line.split()[1:]] for line in lines[1:]}
+        self.assertEqual(set(rows), {'default', 'production'})
+        for writes, reads, locked, rate in rows.values():
+            self.assertGreater(writes, 0)
+            self.assertGreater(reads, 0)
+        # WAL, busy_timeout и BEGIN IMMEDIATE: ошибок "database is locked" меньше, чем без них
+        self.assertLess(rows['production'][2], rows['default'][2])
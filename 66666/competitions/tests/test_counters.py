@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from competitions import registration
+from competitions.models import Competition, Participant
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+def updates_of_competitions(queries):
+    return [query['sql'] for query in queries if query['sql'].startswith('UPDATE "competitions_competition"')]
+
+
+class ParticipantDeleteTests(TestCase):
+    """Удаление участников любым способом поддерживает счетчик одним UPDATE на пачку"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.users = [make_user(f'user{number}') for number in range(5)]
+
+    def setUp(self):
+        clear_caches()
+        self.first = make_competition(self.owner, location='Зал 1')
+        self.second = make_competition(
+            self.owner, location='Зал 2', start_date=timezone.now() + timedelta(days=20),
+        )
+        for user in self.users:
+            registration.register(self.first, user)
+            registration.register(self.second, user)
+
+    def assertCounts(self, *expected):
+        for competition, count in zip((self.first, self.second), expected):
+            competition.refresh_from_db()
+            self.assertEqual(competition.current_participants, count)
+            self.assertEqual(Participant.objects.filter(competition=competition).count(), count)
+
+    def test_queryset_delete_updates_counter_once(self):
+        with CaptureQueriesContext(connection) as queries:
+            Participant.objects.filter(user__in=self.users[:3]).delete()
+        # Оба соревнования потеряли по 3 участника: один UPDATE на оба
+        self.assertEqual(len(updates_of_competitions(queries)), 1)
+        self.assertCounts(2, 2)
+
+    def test_different_counts_per_competition(self):
+        Participant.objects.filter(competition=self.first, user__in=self.users[:2]).delete()
+        Participant.objects.filter(competition=self.second, user=self.users[0]).delete()
+        self.assertCounts(3, 4)
+
+    def test_instance_delete(self):
+        Participant.objects.filter(competition=self.first).first().delete()
+        self.assertCounts(4, 5)
+
+    def test_competition_cascade_skips_counter(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.first.delete()
+        self.assertEqual(updates_of_competitions(queries), [])
+        self.assertFalse(Participant.objects.filter(competition_id=self.first.pk).exists())
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.current_participants, 5)
+
+    def test_competition_cascade_query_count(self):
+        # Выборка соревнования, участников, связанных таблиц, удаление, счетчики фильтров и поисковый индекс
+        with self.assertNumQueries(8):
+            self.first.delete()
+
+    def test_user_cascade(self):
+        # Удаление организатора удаляет и его соревнования: их счетчики не трогаются
+        other = make_user('other organizer')
+        own = make_competition(other, location='Зал 3', start_date=timezone.now() + timedelta(days=30))
+        registration.register(own, self.users[0])
+        self.users[0].delete()
+        self.assertCounts(4, 4)
+        other.delete()
+        self.assertFalse(Competition.objects.filter(pk=own.pk).exists())
+        self.assertCounts(4, 4)
@@ -0,0 +1,79 @@
+from django.contrib.auth.models import Permission
+from django.test import TestCase
+from django.urls import reverse
+
+from competitions import facets
+from competitions.models import Competition, FacetCount
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+class FacetSignalTests(TestCase):
+    """Счетчики фильтров совпадают с полным пересчетом после каждого изменения"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+
+    def setUp(self):
+        clear_caches()
+
+    def count(self, facet, value, is_public=True):
+        return FacetCount.objects.get(facet=facet, value=value, is_public=is_public).count
+
+    def assertExact(self):
+        current = {(row.facet, row.value, row.is_public): row.count for row in FacetCount.objects.all()}
+        self.assertEqual(current, dict(facets.compute(Competition.objects.all())))
+
+    def test_create(self):
+        make_competition(self.owner, sport_type='football')
+        make_competition(self.owner, sport_type='football', location='Стадион', is_public=False)
+        self.assertEqual(self.count('sport_type', 'football'), 1)
+        self.assertEqual(self.count('sport_type', 'football', is_public=False), 1)
+        self.assertEqual(self.count('status', 'planned'), 1)
+        self.assertExact()
+
+    def test_save_moves_between_values(self):
+        competition = make_competition(self.owner, sport_type='football')
+        competition.sport_type = 'tennis'
+        competition.status = 'ongoing'
+        competition.is_public = False
+        competition.save()
+        self.assertEqual(self.count('sport_type', 'football'), 0)
+        self.assertEqual(self.count('sport_type', 'tennis', is_public=False), 1)
+        self.assertEqual(self.count('status', 'ongoing', is_public=False), 1)
+        self.assertExact()
+
+    def test_save_without_changes_keeps_counts(self):
+        competition = make_competition(self.owner)
+        competition.name = "Новое название"
+        competition.save()
+        self.assertEqual(self.count('sport_type', 'chess'), 1)
+        self.assertExact()
+
+    def test_delete(self):
+        competition = make_competition(self.owner)
+        competition.delete()
+        self.assertEqual(self.count('sport_type', 'chess'), 0)
+        self.assertExact()
+
+    def test_reconcile_repairs_drift(self):
+        make_competition(self.owner)
+        FacetCount.objects.filter(facet='sport_type', value='chess', is_public=True).update(count=42)
+        self.assertEqual(facets.reconcile(), 1)
+        self.assertExact()
+
+    def test_counts_by_access_tier(self):
+        make_competition(self.owner)
+        make_competition(self.owner, location='Стадион', is_public=False)
+        self.assertEqual(facets.get_counts(False)['sport_type']['chess'], 1)
+        self.assertEqual(facets.get_counts(True)['sport_type']['chess'], 2)
+
+    def test_counts_in_search_form(self):
+        make_competition(self.owner)
+        make_competition(self.owner, location='Стадион', is_public=False)
+        self.assertContains(self.client.get(reverse('competition_list')), "Шахматы (1)")
+        viewer = make_user('viewer')
+        viewer.user_permissions.add(Permission.objects.get(codename='can_view_all'))
+        self.client.force_login(viewer)
+        self.assertContains(self.client.get(reverse('competition_list')), "Шахматы (2)")
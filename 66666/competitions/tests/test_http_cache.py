@@ -0,0 +1,88 @@
+from django.contrib.auth.models import Permission
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from competitions import registration
+from competitions.models import WaitlistEntry
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+@override_settings(HTTP_CACHE_S_MAXAGE=15)
+class DetailHttpCacheTests(TestCase):
+    """Условные запросы карточки соревнования и разделение анонимных и личных ответов"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.member = make_user('member')
+        cls.member.user_permissions.add(Permission.objects.get(codename='can_register_participant'))
+        cls.competition = make_competition(cls.owner)
+
+    def setUp(self):
+        clear_caches()
+        self.url = reverse('competition_detail', args=[self.competition.pk])
+
+    def cache_control(self, response):
+        return {part.strip() for part in response['Cache-Control'].split(',')}
+
+    def test_anonymous_response_is_public(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(self.cache_control(response), {'public', 'max-age=0', 's-maxage=15'})
+        self.assertIn('Cookie', response['Vary'])
+
+    def test_conditional_requests_return_304(self):
+        response = self.client.get(self.url)
+        for headers in ({'If-None-Match': response['ETag']}, {'If-Modified-Since': response['Last-Modified']}):
+            with self.subTest(headers=headers):
+                cached = self.client.get(self.url, headers=headers)
+                self.assertEqual(cached.status_code, 304)
+                self.assertEqual(cached['ETag'], response['ETag'])
+                self.assertEqual(cached.content, b'')
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': 'W/"stale"'}).status_code, 200)
+
+    def test_authenticated_response_is_private(self):
+        anonymous = self.client.get(self.url)
+        self.client.force_login(self.member)
+        response = self.client.get(self.url)
+        self.assertEqual(self.cache_control(response), {'private', 'no-cache'})
+        self.assertNotIn('Last-Modified', response)
+        self.assertIn('Cookie', response['Vary'])
+        # Анонимная версия страницы не подходит пользователю и наоборот
+        self.assertNotEqual(response['ETag'], anonymous['ETag'])
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': anonymous['ETag']}).status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={'If-None-Match': response['ETag']}).status_code, 304)
+
+    def test_etag_changes_after_registration(self):
+        anonymous = self.client.get(self.url)['ETag']
+        # Кэш страниц сбрасывается после фиксации транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            registration.register(self.competition, make_user('other'))
+        response = self.client.get(self.url, headers={'If-None-Match': anonymous})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], anonymous)
+
+    def test_flash_message_not_cached(self):
+        self.client.force_login(self.member)
+        etag = self.client.get(self.url)['ETag']
+        self.client.post(reverse('register_participant', args=[self.competition.pk]))
+        # Сообщение об успешной регистрации показывается, а не заменяется ответом 304
+        response = self.client.get(self.url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Вы успешно зарегистрировались")
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-store', self.cache_control(response))
+        self.assertIn('private', self.cache_control(response))
+        self.assertIn('ETag', self.client.get(self.url))
+
+    def test_waitlisted_user_not_cached(self):
+        WaitlistEntry.objects.create(competition=self.competition, user=self.member)
+        self.client.force_login(self.member)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-store', self.cache_control(response))
+        self.assertIn('Cookie', response['Vary'])
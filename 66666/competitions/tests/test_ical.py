@@ -0,0 +1,149 @@
+from datetime import timedelta
+
+from django.core import signing
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from competitions import ical, registration
+from competitions.models import Participant
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content).decode()
+    return response.content.decode()
+
+
+def unfold(text):
+    return text.replace('\r\n ', '')
+
+
+class FoldTests(SimpleTestCase):
+    def test_short_line(self):
+        self.assertEqual(ical.fold('SUMMARY:Турнир'), 'SUMMARY:Турнир\r\n')
+
+    def test_long_line_split_at_75_octets(self):
+        line = 'DESCRIPTION:' + 'Шахматный турнир ' * 20
+        folded = ical.fold(line)
+        physical = folded[:-2].split('\r\n')
+        self.assertGreater(len(physical), 1)
+        for part in physical:
+            # Символы UTF-8 не разрываются: каждая часть декодируется сама
+            self.assertLessEqual(len(part.encode()), ical.LINE_LIMIT)
+        self.assertTrue(all(part.startswith(' ') for part in physical[1:]))
+        self.assertEqual(unfold(folded), line + '\r\n')
+
+    def test_escape(self):
+        self.assertEqual(ical.escape('a;b,c\\d\r\ne'), 'a\\;b\\,c\\\\d\\ne')
+
+
+class CalendarFeedTests(TestCase):
+    """Ленты iCalendar: токены, условные запросы и кэш тела"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.member = make_user('member')
+        cls.competition = make_competition(
+            cls.owner, name="Кубок города; финал", description="Длинное описание турнира. " * 10,
+        )
+        cls.hidden = make_competition(
+            cls.owner, name="Закрытый турнир", location="Стадион", is_public=False,
+            start_date=timezone.now() + timedelta(days=20),
+        )
+        cls.old = make_competition(
+            cls.owner, name="Прошлогодний турнир", location="Зал",
+            start_date=timezone.now() - timedelta(days=365),
+        )
+        cls.football = make_competition(cls.owner, name="Футбольный матч", location="Поле", sport_type='football')
+        Participant.objects.create(competition=cls.hidden, user=cls.member)
+
+    def setUp(self):
+        clear_caches()
+        self.sport_url = reverse('sport_calendar', args=['chess'])
+        self.user_url = reverse('user_calendar', args=[ical.user_token(self.member)])
+
+    def test_token_round_trip(self):
+        token = ical.user_token(self.member)
+        self.assertEqual(ical.user_from_token(token), self.member.pk)
+        self.assertIsNone(ical.user_from_token(token + 'x'))
+        self.assertIsNone(ical.user_from_token(f'{self.member.pk}'))
+        # Подпись с другой солью (например, из другого раздела сайта) не подходит
+        self.assertIsNone(ical.user_from_token(signing.Signer().sign(str(self.member.pk))))
+
+    def test_sport_feed(self):
+        response = self.client.get(self.sport_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], ical.CONTENT_TYPE)
+        self.assertIn('public', response['Cache-Control'])
+        text = body(response)
+        self.assertTrue(text.startswith('BEGIN:VCALENDAR\r\n'))
+        self.assertTrue(text.endswith('END:VCALENDAR\r\n'))
+        self.assertNotIn('\n', text.replace('\r\n', ''))
+        self.assertTrue(all(len(line.encode()) <= ical.LINE_LIMIT for line in text.split('\r\n')))
+        events = unfold(text)
+        self.assertIn('SUMMARY:Кубок города\\; финал', events)
+        self.assertIn(f'UID:competition-{self.competition.pk}@', events)
+        # Закрытые, давно прошедшие и другие виды спорта в ленту не попадают
+        for name in ("Закрытый турнир", "Прошлогодний турнир", "Футбольный матч"):
+            self.assertNotIn(name, events)
+
+    def test_user_feed(self):
+        response = self.client.get(self.user_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        events = unfold(body(response))
+        self.assertIn("Закрытый турнир", events)
+        self.assertNotIn("Кубок города", events)
+
+    def test_my_calendar_redirects_to_token(self):
+        self.client.force_login(self.member)
+        self.assertRedirects(self.client.get(reverse('my_calendar')), self.user_url, fetch_redirect_response=False)
+
+    def test_not_found(self):
+        self.assertEqual(self.client.get(reverse('sport_calendar', args=['curling'])).status_code, 404)
+        bad = reverse('user_calendar', args=[ical.user_token(self.member) + 'x'])
+        self.assertEqual(self.client.get(bad).status_code, 404)
+        self.member.is_active = False
+        self.member.save()
+        self.assertEqual(self.client.get(self.user_url).status_code, 404)
+
+    def test_not_modified(self):
+        for url in (self.sport_url, self.user_url):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                # Версия ленты, а для ленты пользователя еще проверка пользователя из токена
+                with self.assertNumQueries(1 if url == self.sport_url else 2):
+                    response = self.client.get(url, headers={'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response['ETag'], etag)
+
+    def test_etag_changes_after_edit(self):
+        etag = self.client.get(self.sport_url)['ETag']
+        self.competition.location = "Новый зал"
+        self.competition.save()
+        response = self.client.get(self.sport_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertIn('LOCATION:Новый зал', body(response))
+
+    def test_etag_changes_after_registration(self):
+        etag = self.client.get(self.user_url)['ETag']
+        registration.register(self.competition, self.member)
+        response = self.client.get(self.user_url, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Кубок города", unfold(body(response)))
+
+    def test_body_served_from_cache(self):
+        first = self.client.get(self.sport_url)
+        self.assertTrue(first.streaming)
+        text = body(first)
+        # Тело сохранено после отдачи потока: повторно читается только версия ленты
+        with self.assertNumQueries(1):
+            second = self.client.get(self.sport_url)
+        self.assertFalse(second.streaming)
+        self.assertEqual(body(second), text)
+        self.assertEqual(second['ETag'], first['ETag'])
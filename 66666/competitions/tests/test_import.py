@@ -0,0 +1,143 @@
+import io
+import os
+import tempfile
+from datetime import timedelta
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from competitions import registration
+from competitions.models import Competition, Participant, WaitlistEntry
+
+from .helpers import clear_caches, make_competition, make_user
+
+# 0x98 не определен в cp1251 и не может начинать символ UTF-8
+UNREADABLE = b'username\n\x98\xff\n'
+
+
+class ReadUsernamesTests(TestCase):
+    def test_encodings(self):
+        for encoding in ('utf-8', 'utf-8-sig', 'cp1251'):
+            with self.subTest(encoding):
+                data = 'username\nиванов\npetrov\n'.encode(encoding)
+                self.assertEqual(registration.read_usernames(data), ['иванов', 'petrov'])
+
+    def test_unreadable(self):
+        with self.assertRaises(registration.UnreadableFile):
+            registration.read_usernames(UNREADABLE)
+
+
+class ImportParticipantsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        make_user('иванов')
+        cls.competition = make_competition(cls.owner)
+
+    def setUp(self):
+        clear_caches()
+        self.client.force_login(self.owner)
+
+    def upload(self, data):
+        return self.client.post(
+            reverse('import_participants', args=[self.competition.pk]),
+            {'file': SimpleUploadedFile('users.csv', data, content_type='text/csv'), 'is_confirmed': 'on'},
+        )
+
+    def test_cp1251_upload(self):
+        response = self.upload('иванов\n'.encode('cp1251'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Participant.objects.filter(competition=self.competition).count(), 1)
+
+    def test_unreadable_upload_is_form_error(self):
+        response = self.upload(UNREADABLE)
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(response.context['form'], 'file', registration.UnreadableFile.message)
+        self.assertFalse(Participant.objects.filter(competition=self.competition).exists())
+
+    def command(self, data):
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'wb') as f:
+            f.write(data)
+        try:
+            call_command('import_participants', self.competition.pk, path, stdout=io.StringIO())
+        finally:
+            os.remove(path)
+
+    def test_command_cp1251(self):
+        self.command('иванов\n'.encode('cp1251'))
+        self.assertEqual(Participant.objects.filter(competition=self.competition).count(), 1)
+
+    def test_command_unreadable(self):
+        with self.assertRaisesMessage(CommandError, registration.UnreadableFile.message):
+            self.command(UNREADABLE)
+
+
+class BulkRegisterConditionsTests(TestCase):
+    """Массовая регистрация соблюдает срок регистрации и лист ожидания, как register()"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.users = [make_user(f'user{number}') for number in range(3)]
+        cls.usernames = [user.username for user in cls.users]
+
+    def setUp(self):
+        clear_caches()
+
+    def participants(self, competition):
+        return set(Participant.objects.filter(competition=competition).values_list('user__username', flat=True))
+
+    def test_closed_registration(self):
+        competition = make_competition(self.owner, registration_deadline=timezone.now() - timedelta(hours=1))
+        report = registration.bulk_register(competition, self.usernames)
+        self.assertEqual(report.inserted, [])
+        self.assertEqual(report.rejected, [(username, "Регистрация закрыта") for username in self.usernames])
+        self.assertEqual(self.participants(competition), set())
+
+        report = registration.bulk_register(competition, self.usernames, force=True)
+        self.assertEqual(report.inserted, self.usernames)
+        competition.refresh_from_db()
+        self.assertEqual(competition.current_participants, 3)
+
+    def test_waitlist_has_priority(self):
+        competition = make_competition(self.owner, max_participants=2)
+        waiting = make_user('waiting')
+        WaitlistEntry.objects.create(competition=competition, user=waiting)
+        WaitlistEntry.objects.create(competition=competition, user=self.users[0])
+        report = registration.bulk_register(competition, self.usernames)
+        self.assertEqual(report.inserted, [])
+        self.assertEqual(
+            report.rejected, [(username, "Свободные места получает лист ожидания") for username in self.usernames],
+        )
+
+        # Вне очереди регистрируются, пока есть места; записи в листе ожидания удаляются
+        report = registration.bulk_register(competition, self.usernames, force=True)
+        self.assertEqual(report.inserted, self.usernames[:2])
+        self.assertEqual(report.rejected, [(self.usernames[2], "Нет свободных мест")])
+        self.assertEqual(
+            list(WaitlistEntry.objects.filter(competition=competition).values_list('user', flat=True)), [waiting.pk],
+        )
+        self.assertEqual(Competition.objects.get(pk=competition.pk).current_participants, 2)
+
+    def test_open_registration_unchanged(self):
+        competition = make_competition(self.owner, registration_deadline=timezone.now() + timedelta(days=1))
+        report = registration.bulk_register(competition, self.usernames)
+        self.assertEqual(report.inserted, self.usernames)
+        self.assertEqual(self.participants(competition), set(self.usernames))
+
+    def test_command_force(self):
+        competition = make_competition(self.owner, registration_deadline=timezone.now() - timedelta(hours=1))
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as f:
+            f.write('\n'.join(self.usernames))
+        try:
+            call_command('import_participants', competition.pk, path, stdout=io.StringIO())
+            self.assertEqual(self.participants(competition), set())
+            call_command('import_participants', competition.pk, path, '--force', stdout=io.StringIO())
+        finally:
+            os.remove(path)
+        self.assertEqual(self.participants(competition), set(self.usernames))
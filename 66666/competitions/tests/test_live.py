@@ -0,0 +1,37 @@
+import json
+
+from django.http import Http404
+from django.test import AsyncRequestFactory, RequestFactory, TestCase
+
+from competitions.async_views import competition_events
+
+from .helpers import make_competition, make_user
+
+
+class CompetitionEventsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.competition = make_competition(make_user('organizer'), max_participants=5)
+
+    def test_route_not_registered_under_wsgi(self):
+        # Настройки по умолчанию — синхронный режим без ASYNC_READ_VIEWS
+        response = self.client.get(f'/competition/{self.competition.pk}/events/')
+        self.assertEqual(response.status_code, 404)
+
+    async def test_wsgi_request_rejected(self):
+        request = RequestFactory().get(f'/competition/{self.competition.pk}/events/')
+        with self.assertRaises(Http404):
+            await competition_events(request, self.competition.pk)
+
+    async def test_asgi_stream_sends_snapshot(self):
+        request = AsyncRequestFactory().get(f'/competition/{self.competition.pk}/events/')
+        response = await competition_events(request, self.competition.pk)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        try:
+            first = await anext(stream)
+        finally:
+            await stream.aclose()
+        name, data = first.decode().strip().split('\n')
+        self.assertEqual(name, 'event: participants')
+        self.assertEqual(json.loads(data.removeprefix('data: '))['available_slots'], 5)
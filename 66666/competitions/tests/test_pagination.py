@@ -0,0 +1,59 @@
+import base64
+import json
+
+from django.test import TestCase
+from django.urls import reverse
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+def forge(values):
+    raw = json.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+FORGED_CURSORS = [
+    forge(['abc', 1]),
+    forge(['2026-01-01T00:00:00+00:00', 'x']),
+    forge([None, None]),
+    forge([{}, []]),
+    forge([1]),
+    'не-курсор',
+]
+
+
+class ForgedCursorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_user('organizer')
+        for number in range(3):
+            make_competition(owner, name=f"Турнир {number}", location=f"Зал {number}")
+
+    def setUp(self):
+        clear_caches()
+
+    def test_html_pages_fall_back_to_first_page(self):
+        for url in (reverse('competition_list'), reverse('archive_list')):
+            for parameter in ('after', 'before'):
+                for cursor in FORGED_CURSORS:
+                    with self.subTest(url=url, parameter=parameter, cursor=cursor):
+                        response = self.client.get(url, {parameter: cursor})
+                        self.assertEqual(response.status_code, 200)
+
+    def test_search_cursor(self):
+        response = self.client.get(reverse('competition_list'), {'query': 'турнир', 'after': forge(['x', 'y'])})
+        self.assertEqual(response.status_code, 200)
+
+    def test_api_rejects_forged_cursor(self):
+        for parameter in ('after', 'before'):
+            for cursor in FORGED_CURSORS:
+                with self.subTest(parameter=parameter, cursor=cursor):
+                    response = self.client.get(reverse('api_competition_list'), {parameter: cursor})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('error', response.json())
+
+    def test_api_accepts_real_cursor(self):
+        first = self.client.get(reverse('api_competition_list'), {'limit': 1}).json()
+        response = self.client.get(reverse('api_competition_list') + first['next'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
@@ -0,0 +1,167 @@
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.contrib.auth.hashers import check_password, identify_hasher
+from django.contrib.auth.models import Group, Permission, User
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from competitions import hashers
+from competitions.provisioning import SpecError, provision
+
+from .helpers import clear_caches
+
+# Дешевый хэшер: в тестах проверяется логика, а не стойкость паролей
+FAST_HASHERS = ['competitions.hashers.LoadTestPBKDF2PasswordHasher']
+
+SPEC = {
+    'groups': {
+        'Организаторы': ['competitions.can_create_competition', 'competitions.can_edit_competition'],
+        'Администраторы': ['competitions.*'],
+    },
+    'users': [
+        {'username': 'org1', 'password': 'org-secret', 'email': 'org1@example.com', 'groups': ['Организаторы']},
+        {'username': 'admin1', 'password': 'admin-secret', 'is_staff': 'да', 'groups': ['Администраторы']},
+        {'username': 'member1', 'groups': 'Участники'},
+    ],
+}
+
+
+def codenames(group_name):
+    return set(Group.objects.get(name=group_name).permissions.values_list('codename', flat=True))
+
+
+def group_names(username):
+    return set(User.objects.get(username=username).groups.values_list('name', flat=True))
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class ProvisionTests(TestCase):
+    """Создание групп, прав и пользователей по спецификации и повторный запуск"""
+
+    def setUp(self):
+        clear_caches()
+
+    def test_creates_groups_permissions_and_users(self):
+        report = provision(SPEC, workers=1)
+        self.assertEqual((report.groups_created, report.users_created, report.memberships_added), (3, 3, 3))
+        self.assertEqual(codenames('Организаторы'), {'can_create_competition', 'can_edit_competition'})
+        # Метка app_label.* раскрывается во все права приложения
+        self.assertEqual(
+            codenames('Администраторы'),
+            set(Permission.objects.filter(content_type__app_label='competitions').values_list('codename', flat=True)),
+        )
+        org = User.objects.get(username='org1')
+        self.assertEqual(org.email, 'org1@example.com')
+        self.assertTrue(org.check_password('org-secret'))
+        self.assertTrue(org.has_perm('competitions.can_edit_competition'))
+        self.assertTrue(User.objects.get(username='admin1').is_staff)
+        # Без пароля в спецификации войти нельзя
+        self.assertFalse(User.objects.get(username='member1').has_usable_password())
+        self.assertEqual(group_names('member1'), {'Участники'})
+
+    def test_second_run_changes_nothing(self):
+        provision(SPEC, workers=1)
+        password = User.objects.get(username='org1').password
+        report = provision(SPEC, workers=1)
+        self.assertFalse(any(value for _, value in report.items()))
+        self.assertEqual(User.objects.get(username='org1').password, password)
+
+    def test_changed_fields_updated(self):
+        provision(SPEC, workers=1)
+        spec = {'users': [dict(SPEC['users'][0], email='new@example.com')]}
+        report = provision(spec, workers=1)
+        self.assertEqual(report.users_updated, 1)
+        org = User.objects.get(username='org1')
+        self.assertEqual(org.email, 'new@example.com')
+        self.assertTrue(org.check_password('org-secret'))
+
+    def test_reset_passwords(self):
+        provision(SPEC, workers=1)
+        spec = {'users': [dict(SPEC['users'][0], password='changed')]}
+        provision(spec, workers=1)
+        self.assertTrue(User.objects.get(username='org1').check_password('org-secret'))
+        report = provision(spec, workers=1, reset_passwords=True)
+        self.assertEqual(report.users_updated, 1)
+        self.assertTrue(User.objects.get(username='org1').check_password('changed'))
+
+    def test_prune(self):
+        provision(SPEC, workers=1)
+        spec = {
+            'groups': {'Организаторы': ['competitions.can_create_competition']},
+            'users': [{'username': 'org1', 'groups': []}],
+        }
+        # Без prune права и членства только добавляются
+        report = provision(spec, workers=1)
+        self.assertEqual((report.permissions_removed, report.memberships_removed), (0, 0))
+        self.assertEqual(group_names('org1'), {'Организаторы'})
+
+        report = provision(spec, workers=1, prune=True)
+        self.assertEqual((report.permissions_removed, report.memberships_removed), (1, 1))
+        self.assertEqual(codenames('Организаторы'), {'can_create_competition'})
+        self.assertEqual(group_names('org1'), set())
+        # Группы и пользователи вне спецификации не затрагиваются
+        self.assertEqual(group_names('admin1'), {'Администраторы'})
+
+    def test_permission_cache_reset(self):
+        provision(SPEC, workers=1)
+        org = User.objects.get(username='org1')
+        self.assertTrue(org.has_perm('competitions.can_edit_competition'))
+        # Кэш прав сбрасывается после фиксации транзакции
+        with self.captureOnCommitCallbacks(execute=True):
+            provision({'groups': {'Организаторы': []}}, workers=1, prune=True)
+        org = User.objects.get(username='org1')
+        self.assertFalse(org.has_perm('competitions.can_edit_competition'))
+
+    def test_dry_run_changes_nothing(self):
+        report = provision(SPEC, workers=1, dry_run=True)
+        self.assertEqual(report.users_created, 3)
+        self.assertFalse(User.objects.filter(username__in=['org1', 'admin1', 'member1']).exists())
+        self.assertFalse(Group.objects.exists())
+
+    def test_invalid_spec(self):
+        for spec in (
+            {'groups': {'Организаторы': ['competitions.no_such_permission']}},
+            {'groups': {'Организаторы': ['can_edit_competition']}},
+            {'users': [{'username': 'org1'}, {'username': 'org1'}]},
+            {'users': [{'username': 'org1', 'role': 'admin'}]},
+        ):
+            with self.subTest(spec=spec):
+                with self.assertRaises(SpecError):
+                    provision(spec, workers=1)
+        self.assertFalse(User.objects.filter(username='org1').exists())
+
+    def test_command_with_csv(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'members.csv'
+            path.write_text(
+                'username,password,email,groups\n'
+                'csv1,secret1,csv1@example.com,Участники;Судьи\n'
+                'csv2,,,\n',
+                encoding='utf-8',
+            )
+            out = StringIO()
+            call_command('provision', str(path), '--workers', '1', stdout=out)
+            self.assertIn("пользователей создано: 2", out.getvalue())
+            with self.assertRaises(CommandError):
+                call_command('provision', str(Path(directory) / 'members.txt'), stdout=StringIO())
+        self.assertTrue(User.objects.get(username='csv1').check_password('secret1'))
+        self.assertEqual(group_names('csv1'), {'Участники', 'Судьи'})
+        self.assertFalse(User.objects.get(username='csv2').has_usable_password())
+
+
+@override_settings(PASSWORD_HASHERS=FAST_HASHERS)
+class MakePasswordsTests(SimpleTestCase):
+    def test_hashes_in_process_pool_keep_order(self):
+        passwords = [f'password-{number}' for number in range(8)]
+        hashes = hashers.make_passwords(passwords, workers=2)
+        self.assertEqual(len(hashes), len(passwords))
+        for password, encoded in zip(passwords, hashes):
+            self.assertTrue(check_password(password, encoded))
+        self.assertEqual(len(set(hashes)), len(hashes))
+
+    def test_small_batch_without_pool(self):
+        hashes = hashers.make_passwords(['one'], workers=4)
+        self.assertEqual(identify_hasher(hashes[0]).algorithm, 'pbkdf2_sha256')
+        self.assertTrue(check_password('one', hashes[0]))
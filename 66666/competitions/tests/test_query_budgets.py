@@ -0,0 +1,106 @@
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from competitions import ical
+from competitions.instrumentation import enforce_query_budgets, get_query_budget
+from competitions.models import Competition, Participant, WaitlistEntry
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+class QueryBudgetTests(TestCase):
+    """Каждое представление укладывается в бюджет запросов из QUERY_BUDGETS"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.member = make_user('member')
+        cls.member.user_permissions.add(
+            Permission.objects.get(codename='can_register_participant'),
+        )
+        cls.competitions = [
+            make_competition(cls.owner, name=f"Турнир {number}", location=f"Зал {number}", max_participants=2)
+            for number in range(25)
+        ]
+        cls.competition = cls.competitions[0]
+        for competition in cls.competitions[:3]:
+            Participant.objects.create(competition=competition, user=cls.owner)
+
+    def setUp(self):
+        clear_caches()
+
+    def get(self, view_name, *args, user=None, **kwargs):
+        """Запрос к представлению; возвращает ответ и число SQL-запросов"""
+        if user is not None:
+            self.client.force_login(user)
+        with enforce_query_budgets(), CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(view_name, args=args), **kwargs)
+        self.assertLess(response.status_code, 400)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response, len(queries)
+
+    def assertWithinBudget(self, view_name, *args, user=None):
+        response, count = self.get(view_name, *args, user=user)
+        self.assertLessEqual(count, get_query_budget(view_name))
+        return response
+
+    def test_views_within_budget(self):
+        cases = [
+            ('competition_list', ()),
+            ('competition_detail', (self.competition.pk,)),
+            ('api_competition_list', ()),
+            ('api_competition_detail', (self.competition.pk,)),
+            ('sport_calendar', ('chess',)),
+            ('user_calendar', (ical.user_token(self.owner),)),
+        ]
+        for user in (None, self.member, self.owner):
+            # Участников видит только организатор
+            owner_cases = [('api_competition_participants', (self.competition.pk,))] if user == self.owner else []
+            for view_name, args in cases + owner_cases:
+                with self.subTest(view_name, user=user and user.username):
+                    clear_caches()
+                    self.client.logout()
+                    self.assertWithinBudget(view_name, *args, user=user)
+
+    def test_cached_pages_cost_no_queries(self):
+        for view_name, args in (('competition_list', ()), ('competition_detail', (self.competition.pk,))):
+            with self.subTest(view_name):
+                self.get(view_name, *args)
+                with self.assertNumQueries(0):
+                    self.get(view_name, *args)
+
+    def test_warm_permission_cache(self):
+        self.get('competition_list', user=self.member)
+        # Сессия и пользователь; права и страница берутся из кэша
+        with self.assertNumQueries(1):
+            self.get('competition_list')
+
+    def post_from_detail(self, competition):
+        """Регистрация со страницы соревнования: сессия и права уже в кэше"""
+        self.client.force_login(self.member)
+        self.get('competition_detail', competition.pk)
+        with enforce_query_budgets(), CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('register_participant', args=[competition.pk]))
+        self.assertEqual(response.status_code, 302)
+        return len(queries)
+
+    def test_register_within_budget(self):
+        self.client.force_login(self.member)
+        url = reverse('register_participant', args=[self.competition.pk])
+        with enforce_query_budgets(), CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Participant.objects.filter(competition=self.competition, user=self.member).exists())
+        self.assertLessEqual(len(queries), get_query_budget('register_participant'))
+
+    def test_waitlisted_registration_within_budget(self):
+        competition = self.competitions[1]
+        Participant.objects.create(competition=competition, user=make_user('another'))
+        Competition.objects.filter(pk=competition.pk).update(current_participants=2)
+        count = self.post_from_detail(competition)
+        self.assertTrue(WaitlistEntry.objects.filter(competition=competition, user=self.member).exists())
+        self.assertLessEqual(count, get_query_budget('register_participant'))
@@ -0,0 +1,49 @@
+import io
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from competitions.management.commands.check_query_plans import Command
+from competitions.models import Competition, Participant
+
+from .helpers import make_competition, make_user
+
+
+class QueryPlanTests(TestCase):
+    """Основные запросы списка, поиска, расписания и участников идут по индексам"""
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = make_user('organizer')
+        competitions = [
+            make_competition(
+                owner,
+                name=f"Турнир {number}",
+                location=f"Зал {number % 3}",
+                sport_type='football' if number % 2 else 'chess',
+                is_public=bool(number % 4),
+            )
+            for number in range(30)
+        ]
+        Participant.objects.create(competition=competitions[0], user=owner)
+
+    def test_no_full_scans(self):
+        command = Command()
+        cases = list(command.cases('турнир'))
+        self.assertTrue(cases)
+        for name, queryset, table, sorted_by_index in cases:
+            with self.subTest(name):
+                plan = queryset.explain()
+                self.assertEqual(command.problems(plan, table, sorted_by_index), [], plan)
+
+    def test_full_scan_is_reported(self):
+        # Фильтр по столбцу без индекса: проверка должна его заметить
+        queryset = Competition.objects.filter(description='x').order_by('name')
+        problems = Command().problems(queryset.explain(), Competition._meta.db_table, True)
+        self.assertIn(f"полный просмотр {Competition._meta.db_table}", problems)
+        self.assertIn("сортировка без индекса", problems)
+
+    def test_command_passes(self):
+        out = io.StringIO()
+        call_command('check_query_plans', stdout=out, stderr=io.StringIO())
+        self.assertNotIn('FAIL', out.getvalue())
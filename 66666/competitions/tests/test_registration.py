@@ -0,0 +1,123 @@
+import random
+import threading
+
+from django.db import OperationalError, connection
+from django.test import TransactionTestCase
+
+from competitions import registration
+from competitions.models import Participant
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+def retry(action, attempts=100):
+    # Под профилем SQLite по умолчанию параллельная запись может получить "database is locked"
+    for _ in range(attempts):
+        try:
+            return action()
+        except OperationalError:
+            continue
+    raise AssertionError("База заблокирована дольше допустимого")
+
+
+class ConcurrentRegistrationTests(TransactionTestCase):
+    """Счетчик участников совпадает с числом записей после параллельных регистраций"""
+
+    threads = 24
+
+    def setUp(self):
+        clear_caches()
+        self.owner = make_user('owner')
+        self.users = [make_user(f'user{number}') for number in range(self.threads)]
+        self.competition = make_competition(self.owner, max_participants=10)
+
+    def run_threads(self, work):
+        barrier = threading.Barrier(len(self.users))
+        errors = []
+
+        def target(user):
+            barrier.wait()
+            try:
+                work(user)
+            except Exception as exc:  # noqa: BLE001 — ошибка потока проверяется в тесте
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=target, args=(user,)) for user in self.users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def assertCounterConsistent(self):
+        self.competition.refresh_from_db()
+        actual = Participant.objects.filter(competition=self.competition).count()
+        self.assertEqual(self.competition.current_participants, actual)
+        self.assertLessEqual(actual, self.competition.max_participants)
+        return actual
+
+    def test_parallel_registrations_do_not_oversubscribe(self):
+        outcomes = []
+
+        def work(user):
+            try:
+                retry(lambda: registration.register(self.competition, user))
+                outcomes.append('registered')
+            except registration.NoSlotsAvailable:
+                outcomes.append('full')
+
+        self.run_threads(work)
+        self.assertEqual(outcomes.count('registered'), 10)
+        self.assertEqual(self.assertCounterConsistent(), 10)
+
+    def test_parallel_register_and_unregister(self):
+        def work(user):
+            rng = random.Random(user.pk)
+            for _ in range(3):
+                try:
+                    retry(lambda: registration.register(self.competition, user))
+                except registration.RegistrationError:
+                    pass
+                if rng.random() < 0.5:
+                    try:
+                        retry(lambda: registration.unregister(self.competition, user))
+                    except registration.NotRegistered:
+                        pass
+
+        self.run_threads(work)
+        self.assertCounterConsistent()
+
+    def test_duplicate_registration_keeps_counter(self):
+        user = self.users[0]
+
+        def work(_):
+            try:
+                retry(lambda: registration.register(self.competition, user))
+            except registration.AlreadyRegistered:
+                pass
+
+        self.run_threads(work)
+        self.assertEqual(self.assertCounterConsistent(), 1)
+
+    def test_parallel_overlapping_registrations_of_one_user(self):
+        # Одновременные соревнования на разных площадках: пройти проверку пересечений может только одна регистрация
+        user = self.users[0]
+        competitions = [
+            make_competition(self.owner, name=f"Турнир {number}", location=f"Зал {number}",
+                             start_date=self.competition.start_date)
+            for number in range(len(self.users))
+        ]
+        outcomes = []
+
+        def work(other):
+            try:
+                retry(lambda: registration.register(competitions[self.users.index(other)], user))
+                outcomes.append('registered')
+            except registration.ScheduleConflict:
+                outcomes.append('conflict')
+
+        self.run_threads(work)
+        self.assertEqual(outcomes.count('registered'), 1)
+        self.assertEqual(Participant.objects.filter(user=user).count(), 1)
@@ -0,0 +1,59 @@
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from competitions import schedule
+
+from .helpers import make_competition, make_user
+
+
+class LocationConflictTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.day = timezone.now().replace(microsecond=0) + timedelta(days=1)
+
+    def at(self, days):
+        return self.day + timedelta(days=days)
+
+    def add(self, name, start, end, **kwargs):
+        # QuerySet.create() без clean(): данные, как после импорта
+        return make_competition(self.owner, name=name, start_date=self.at(start), end_date=self.at(end), **kwargs)
+
+    def conflicts(self, start, end, exclude_pk=None):
+        return [item.name for item in schedule.location_conflicts('Дворец спорта', self.at(start), self.at(end), exclude_pk)]
+
+    def test_long_competition_overlapped_by_a_later_short_one(self):
+        # A=[100, 110) и B=[101, 102): последней начавшейся до 105 оказывается B, но пересекается A
+        self.add('A', 100, 110)
+        self.add('B', 101, 102)
+        self.assertEqual(self.conflicts(105, 106), ['A'])
+
+    def test_boundaries_and_cancelled(self):
+        self.add('A', 10, 12)
+        self.add('C', 14, 16, status='cancelled')
+        self.assertEqual(self.conflicts(12, 14), [])
+        self.assertEqual(self.conflicts(8, 10), [])
+        self.assertEqual(self.conflicts(11, 15), ['A'])
+        self.assertEqual(self.conflicts(9, 13), ['A'])
+
+    def test_excluded_competition(self):
+        competition = self.add('A', 10, 12)
+        self.assertEqual(self.conflicts(10, 12, exclude_pk=competition.pk), [])
+
+    @override_settings(COMPETITION_MAX_DURATION=timedelta(days=10))
+    def test_seek_bounded_by_max_duration(self):
+        self.add('A', 100, 110)
+        self.add('Old', 0, 1)
+        self.assertEqual(self.conflicts(109, 111), ['A'])
+        query = str(schedule.location_query('Дворец спорта', self.at(109), self.at(111)).query)
+        self.assertEqual(query.count('"start_date" >'), 1)
+
+    @override_settings(COMPETITION_MAX_DURATION=timedelta(days=10))
+    def test_longer_competition_rejected_and_audited(self):
+        competition = self.add('Long', 0, 11)
+        with self.assertRaisesMessage(ValidationError, "дольше 10 дней"):
+            competition.full_clean()
+        self.assertEqual(list(schedule.too_long()), [competition])
@@ -0,0 +1,90 @@
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from competitions import facets, scheduler
+from competitions.models import Competition, FacetCount, StatusTransition
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+class AdvanceStatusesTests(TestCase):
+    """Пакетная смена статусов: журнал переходов, счетчики фильтров, идемпотентность"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.now = timezone.now().replace(microsecond=0)
+        hour = timedelta(hours=1)
+
+        def add(name, start, end, **kwargs):
+            return make_competition(
+                cls.owner, name=name, location=name,
+                start_date=cls.now + start * hour, end_date=cls.now + end * hour, **kwargs,
+            )
+
+        cls.finished_planned = [add(f"Завершено {number}", -5, -1) for number in range(3)]
+        cls.finished_ongoing = add("Шло", -5, -1, status='ongoing', is_public=False)
+        cls.started = [add(f"Началось {number}", -1, 2) for number in range(2)]
+        cls.future = add("Будущее", 5, 8)
+        cls.cancelled = add("Отменено", -5, -1, status='cancelled')
+
+    def setUp(self):
+        clear_caches()
+
+    def statuses(self):
+        return dict(Competition.objects.values_list('name', 'status'))
+
+    def assertFacetsExact(self):
+        current = {(row.facet, row.value, row.is_public): row.count for row in FacetCount.objects.all()}
+        self.assertEqual(current, dict(facets.compute(Competition.objects.all())))
+
+    def test_statuses_and_one_transition_per_change(self):
+        counts = scheduler.advance_statuses(now=self.now, batch_size=2)
+        self.assertEqual(counts, Counter({
+            ('planned', 'completed'): 3,
+            ('ongoing', 'completed'): 1,
+            ('planned', 'ongoing'): 2,
+        }))
+        statuses = self.statuses()
+        self.assertEqual(statuses["Завершено 0"], 'completed')
+        self.assertEqual(statuses["Шло"], 'completed')
+        self.assertEqual(statuses["Началось 1"], 'ongoing')
+        self.assertEqual(statuses["Будущее"], 'planned')
+        self.assertEqual(statuses["Отменено"], 'cancelled')
+
+        logged = Counter(StatusTransition.objects.values_list('competition_id', flat=True))
+        changed = [*self.finished_planned, self.finished_ongoing, *self.started]
+        self.assertEqual(logged, Counter({competition.pk: 1 for competition in changed}))
+        transition = StatusTransition.objects.get(competition=self.finished_ongoing)
+        self.assertEqual(
+            (transition.from_status, transition.to_status, transition.changed_at),
+            ('ongoing', 'completed', self.now),
+        )
+        self.assertTrue(Competition.objects.filter(pk=self.started[0].pk, updated_at=self.now).exists())
+        self.assertFacetsExact()
+
+    def test_second_run_is_noop(self):
+        scheduler.advance_statuses(now=self.now, batch_size=2)
+        statuses = self.statuses()
+        transitions = StatusTransition.objects.count()
+        with CaptureQueriesContext(connection) as queries:
+            counts = scheduler.advance_statuses(now=self.now, batch_size=2)
+        # Только пустой выбор пачки для каждого перехода, без записи
+        selects = [query['sql'] for query in queries if query['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 3)
+        self.assertFalse([query['sql'] for query in queries if query['sql'].startswith(('UPDATE', 'INSERT'))])
+        self.assertEqual(sum(counts.values()), 0)
+        self.assertEqual(self.statuses(), statuses)
+        self.assertEqual(StatusTransition.objects.count(), transitions)
+        self.assertFacetsExact()
+
+    def test_dry_run_changes_nothing(self):
+        counts = scheduler.advance_statuses(now=self.now, dry_run=True)
+        self.assertEqual(sum(counts.values()), 6)
+        self.assertEqual(Competition.objects.filter(status='planned').count(), 6)
+        self.assertFalse(StatusTransition.objects.exists())
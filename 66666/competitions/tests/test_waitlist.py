@@ -0,0 +1,60 @@
+from django.test import TestCase
+
+from competitions import registration
+from competitions.models import Competition, Participant, WaitlistEntry
+
+from .helpers import clear_caches, make_competition, make_user
+
+
+class WaitlistTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('organizer')
+        cls.users = [make_user(f'user{number}') for number in range(4)]
+
+    def setUp(self):
+        clear_caches()
+        self.competition = make_competition(self.owner, max_participants=1)
+        registration.register(self.competition, self.users[0])
+        registration.join_waitlist(self.competition, self.users[1])
+
+    def assertPromoted(self):
+        self.assertTrue(Participant.objects.filter(competition=self.competition, user=self.users[1]).exists())
+        self.assertFalse(WaitlistEntry.objects.filter(competition=self.competition).exists())
+        self.competition.refresh_from_db()
+        self.assertEqual(self.competition.current_participants, 1)
+
+    def test_unregister_promotes(self):
+        registration.unregister(self.competition, self.users[0])
+        self.assertPromoted()
+
+    def test_instance_delete_promotes(self):
+        # Удаление через админку
+        Participant.objects.get(competition=self.competition, user=self.users[0]).delete()
+        self.assertPromoted()
+
+    def test_queryset_delete_promotes(self):
+        Participant.objects.filter(competition=self.competition).delete()
+        self.assertPromoted()
+
+    def test_cascade_from_user_promotes(self):
+        self.users[0].delete()
+        self.assertPromoted()
+
+    def test_register_refused_while_waitlist_not_empty(self):
+        Competition.objects.filter(pk=self.competition.pk).update(max_participants=3)
+        with self.assertRaises(registration.NoSlotsAvailable):
+            registration.register(self.competition, self.users[2])
+        # Вставший в очередь пользователь получает место после тех, кто ждал раньше
+        self.assertIsNone(registration.join_waitlist(self.competition, self.users[2]))
+        self.assertTrue(Participant.objects.filter(competition=self.competition, user=self.users[1]).exists())
+        self.assertFalse(WaitlistEntry.objects.filter(competition=self.competition).exists())
+
+    def test_join_twice(self):
+        with self.assertRaises(registration.AlreadyWaitlisted):
+            registration.join_waitlist(self.competition, self.users[1])
+
+    def test_participant_cannot_join(self):
+        with self.assertRaises(registration.AlreadyRegistered):
+            registration.join_waitlist(self.competition, self.users[0])
+        self.assertFalse(WaitlistEntry.objects.filter(competition=self.competition, user=self.users[0]).exists())
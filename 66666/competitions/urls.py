@@ -1,13 +1,39 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import api, async_views, views
+
+# Под ASGI страницы только для чтения и API обслуживают асинхронные версии
+if getattr(settings, 'ASYNC_READ_VIEWS', False):
+    from . import async_api as read_api, async_views as read_views
+else:
+    read_api, read_views = api, views
 
 urlpatterns = [
-    path('', views.competition_list, name='competition_list'),
+    path('', read_views.competition_list, name='competition_list'),
     path('login/', views.custom_login, name='custom_login'),
     path('logout/', views.custom_logout, name='custom_logout'),
     path('competition/new/', views.competition_create, name='competition_create'),
-    path('competition/<int:pk>/', views.competition_detail, name='competition_detail'),
+    path('competition/<int:pk>/', read_views.competition_detail, name='competition_detail'),
     path('competition/<int:pk>/edit/', views.competition_edit, name='competition_edit'),
     path('competition/<int:pk>/delete/', views.competition_delete, name='competition_delete'),
     path('competition/<int:pk>/register/', views.register_participant, name='register_participant'),
-]
\ No newline at end of file
+    path('competition/<int:pk>/unregister/', views.unregister_participant, name='unregister_participant'),
+    path('competition/<int:pk>/waitlist/leave/', views.leave_waitlist, name='leave_waitlist'),
+    path('competition/<int:pk>/participants/export/', views.export_participants, name='export_participants'),
+    path('competition/<int:pk>/participants/import/', views.import_participants, name='import_participants'),
+    path('competitions/export/', views.export_competitions, name='export_competitions'),
+    path('archive/', views.archive_list, name='archive_list'),
+    path('archive/<int:pk>/', views.archive_detail, name='archive_detail'),
+    path('calendar/my/', views.my_calendar, name='my_calendar'),
+    path('calendar/sport/<slug:sport_type>.ics', views.sport_calendar, name='sport_calendar'),
+    path('calendar/user/<str:token>.ics', views.user_calendar, name='user_calendar'),
+    path('api/competitions/', read_api.competition_list, name='api_competition_list'),
+    path('api/competitions/<int:pk>/', read_api.competition_detail, name='api_competition_detail'),
+    path('api/competitions/<int:pk>/participants/', read_api.competition_participants, name='api_competition_participants'),
+]
+
+# Поток событий держит соединение открытым: под WSGI он занял бы поток воркера навсегда
+if getattr(settings, 'ASYNC_READ_VIEWS', False):
+    urlpatterns.append(
+        path('competition/<int:pk>/events/', async_views.competition_events, name='competition_events'),
+    )
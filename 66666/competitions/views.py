@@ -1,49 +1,84 @@
+import itertools
+
+from django.conf import settings
+from django.http import Http404, StreamingHttpResponse
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import login, logout
+from django.contrib.auth.models import User
 from django.contrib import messages
-from django.db.models import Q
-from .models import Competition, Participant
-from .forms import CompetitionForm, LoginForm, SearchForm
-
+from .models import ArchivedCompetition, ArchivedParticipant, Competition, Participant, WaitlistEntry
+from .forms import CompetitionForm, LoginForm, ParticipantImportForm, SearchForm
+from . import export, facets, http_cache, ical, page_cache, registration
+from .pagination import KeysetPaginator, page_url
+from .queries import filter_competitions
+from .search import get_archive_backend as get_archive_search_backend
+
+
+def _competition_paginator(filters, can_view_all):
+    competitions, ordering = filter_competitions(filters, can_view_all)
+    return KeysetPaginator(
+        competitions,
+        per_page=getattr(settings, 'COMPETITIONS_PAGE_SIZE', 20),
+        ordering=ordering,
+    )
 
-def competition_list(request):
-    competitions = Competition.objects.all()
-    form = SearchForm(request.GET or None)
 
-    if form.is_valid():
-        query = form.cleaned_data.get('query')
-        sport_type = form.cleaned_data.get('sport_type')
-        status = form.cleaned_data.get('status')
+def _competition_page(request, filters, can_view_all):
+    """Выбирает страницу списка соревнований из базы данных"""
+    page = _competition_paginator(filters, can_view_all).get_page(
+        after=request.GET.get('after'),
+        before=request.GET.get('before'),
+    )
+    return _page_context(request, page)
 
-        if query:
-            competitions = competitions.filter(
-                Q(name__icontains=query) |
-                Q(description__icontains=query) |
-                Q(location__icontains=query)
-            )
 
-        if sport_type:
-            competitions = competitions.filter(sport_type=sport_type)
+def _page_context(request, page):
+    return {
+        'competitions': page.object_list,
+        'page': page,
+        'next_url': page_url(request, after=page.next_cursor) if page.has_next else None,
+        'previous_url': page_url(request, before=page.previous_cursor) if page.has_previous else None,
+    }
 
-        if status:
-            competitions = competitions.filter(status=status)
 
-    # Для обычных пользователей показываем только публичные соревнования
-    if not request.user.has_perm('competitions.can_view_all'):
-        competitions = competitions.filter(is_public=True)
+def competition_list(request):
+    can_view_all = request.user.has_perm('competitions.can_view_all')
+    form = SearchForm(request.GET or None, facet_counts=facets.get_counts(can_view_all))
+    filters = form.cleaned_data if form.is_valid() else {}
+
+    # Страница кэшируется по фильтрам, курсору и уровню доступа
+    cache_key = page_cache.list_key(
+        'all' if can_view_all else 'public',
+        dict(filters, after=request.GET.get('after'), before=request.GET.get('before')),
+    )
+    page_data = page_cache.load(cache_key)
+    if page_data is None:
+        page_data = _competition_page(request, filters, can_view_all)
+        page_cache.store(cache_key, page_data)
 
     context = {
-        'competitions': competitions,
+        **page_data,
         'form': form,
         'can_create': request.user.has_perm('competitions.can_create_competition'),
+        'page_cache_key': cache_key,
+        'page_cache_timeout': page_cache.get_timeout(),
     }
     return render(request, 'competitions/competition_list.html', context)
 
 
 def competition_detail(request, pk):
-    competition = get_object_or_404(Competition, pk=pk)
+    cache_key = page_cache.detail_key(pk)
+    competition = page_cache.load(cache_key)
+    if competition is None:
+        competition = Competition.objects.select_related('created_by').filter(pk=pk).first()
+        if competition is None:
+            # Старые ссылки на перенесенные в архив соревнования
+            if ArchivedCompetition.objects.filter(pk=pk).exists():
+                return redirect('archive_detail', pk=pk, permanent=True)
+            raise Http404("Соревнование не найдено")
+        page_cache.store(cache_key, competition)
 
     # Проверка доступа
     if not competition.is_public and not request.user.has_perm('competitions.can_view_all'):
@@ -51,22 +86,35 @@ def competition_detail(request, pk):
         return redirect('competition_list')
 
     is_participant = False
+    waitlist_entry = None
     if request.user.is_authenticated:
         is_participant = Participant.objects.filter(
             competition=competition,
             user=request.user
         ).exists()
+        if not is_participant:
+            waitlist_entry = WaitlistEntry.objects.filter(
+                competition=competition,
+                user=request.user
+            ).first()
 
     context = {
         'competition': competition,
         'is_participant': is_participant,
+        'waitlist_entry': waitlist_entry,
         'can_edit': request.user.has_perm('competitions.can_edit_competition') or
                     request.user == competition.created_by,
         'can_delete': request.user.has_perm('competitions.can_delete_competition') or
                       request.user == competition.created_by,
         'can_register': request.user.has_perm('competitions.can_register_participant'),
+        'page_cache_key': cache_key,
+        'page_cache_timeout': page_cache.get_timeout(),
     }
-    return render(request, 'competitions/competition_detail.html', context)
+    validators = http_cache.DetailValidators(competition, http_cache.viewer_state(request.user, context))
+    response = validators.not_modified(request)
+    if response is None:
+        response = render(request, 'competitions/competition_detail.html', context)
+    return validators.patch(request, response)
 
 
 @login_required
@@ -140,34 +188,194 @@ def register_participant(request, pk):
         messages.error(request, "У вас нет прав на регистрацию участников")
         return redirect('competition_detail', pk=pk)
 
-    if not competition.is_registration_open:
-        messages.error(request, "Регистрация на это соревнование закрыта")
+    try:
+        # Счетчик и участник обновляются одной транзакцией без гонок
+        registration.register(competition, request.user)
+    except registration.AlreadyRegistered as exc:
+        messages.warning(request, exc.message)
         return redirect('competition_detail', pk=pk)
+    except registration.NoSlotsAvailable:
+        # Вместо отказа ставим пользователя в лист ожидания
+        return _join_waitlist(request, competition)
+    except registration.RegistrationError as exc:
+        messages.error(request, exc.message)
+        return redirect('competition_detail', pk=pk)
+
+    messages.success(request, "Вы успешно зарегистрировались на соревнование!")
+    return redirect('competition_detail', pk=pk)
+
+
+def _join_waitlist(request, competition):
+    try:
+        entry = registration.join_waitlist(competition, request.user)
+    except registration.RegistrationError as exc:
+        messages.warning(request, exc.message)
+        return redirect('competition_detail', pk=competition.pk)
+
+    if entry is None:
+        messages.success(request, "Вы успешно зарегистрировались на соревнование!")
+    else:
+        messages.info(
+            request,
+            f"Свободных мест нет. Вы добавлены в лист ожидания, ваша позиция: {entry.position}"
+        )
+    return redirect('competition_detail', pk=competition.pk)
+
+
+@login_required
+def unregister_participant(request, pk):
+    competition = get_object_or_404(Competition, pk=pk)
 
-    if competition.available_slots <= 0:
-        messages.error(request, "Нет свободных мест для регистрации")
+    if request.method != 'POST':
         return redirect('competition_detail', pk=pk)
 
-    # Проверяем, не зарегистрирован ли уже пользователь
-    if Participant.objects.filter(competition=competition, user=request.user).exists():
-        messages.warning(request, "Вы уже зарегистрированы на это соревнование")
+    try:
+        # Освободившееся место сразу получает первый из листа ожидания
+        registration.unregister(competition, request.user)
+    except registration.RegistrationError as exc:
+        messages.error(request, exc.message)
         return redirect('competition_detail', pk=pk)
 
-    # Регистрируем участника
-    Participant.objects.create(
-        competition=competition,
-        user=request.user,
-        is_confirmed=True
-    )
+    messages.success(request, "Регистрация на соревнование отменена")
+    return redirect('competition_detail', pk=pk)
 
-    # Обновляем счетчик участников
-    competition.current_participants += 1
-    competition.save()
 
-    messages.success(request, "Вы успешно зарегистрировались на соревнование!")
+@login_required
+def leave_waitlist(request, pk):
+    competition = get_object_or_404(Competition, pk=pk)
+
+    if request.method == 'POST' and registration.leave_waitlist(competition, request.user):
+        messages.success(request, "Вы покинули лист ожидания")
     return redirect('competition_detail', pk=pk)
 
 
+def _export_response(request, filename, fields, rows):
+    export_format = request.GET.get('format', 'csv')
+    if export_format not in export.FORMATS:
+        raise Http404("Неизвестный формат выгрузки")
+    lines = export.stream(export_format, fields, rows)
+    if export_format == 'csv':
+        # BOM нужен Excel, чтобы правильно открыть кириллицу
+        lines = itertools.chain(['\ufeff'], lines)
+    response = StreamingHttpResponse(lines, content_type=export.FORMATS[export_format])
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{export_format}"'
+    return response
+
+
+@login_required
+def export_participants(request, pk):
+    competition = get_object_or_404(Competition, pk=pk)
+
+    # Выгружать участников может организатор соревнования или редактор
+    if not (request.user.has_perm('competitions.can_edit_competition') or
+            request.user == competition.created_by):
+        messages.error(request, "У вас нет прав на выгрузку участников этого соревнования")
+        return redirect('competition_detail', pk=pk)
+
+    rows = export.participant_rows(
+        Participant.objects.filter(competition=competition)
+    )
+    return _export_response(request, f"participants-{pk}", export.PARTICIPANT_FIELDS, rows)
+
+
+@login_required
+def import_participants(request, pk):
+    competition = get_object_or_404(Competition, pk=pk)
+
+    # Импортировать участников может организатор соревнования или редактор
+    if not (request.user.has_perm('competitions.can_edit_competition') or
+            request.user == competition.created_by):
+        messages.error(request, "У вас нет прав на импорт участников этого соревнования")
+        return redirect('competition_detail', pk=pk)
+
+    report = None
+    if request.method == 'POST':
+        form = ParticipantImportForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                usernames = registration.read_usernames(form.cleaned_data['file'].read())
+            except registration.UnreadableFile as exc:
+                form.add_error('file', exc.message)
+            else:
+                report = registration.bulk_register(
+                    competition,
+                    usernames,
+                    is_confirmed=form.cleaned_data['is_confirmed'],
+                    force=form.cleaned_data['force'],
+                )
+                messages.success(request, f"Зарегистрировано участников: {len(report.inserted)}")
+    else:
+        form = ParticipantImportForm()
+
+    context = {
+        'form': form,
+        'competition': competition,
+        'report': report,
+    }
+    return render(request, 'competitions/participant_import.html', context)
+
+
+@login_required
+def export_competitions(request):
+    # Организатор выгружает только созданные им соревнования
+    rows = export.competition_rows(
+        Competition.objects.filter(created_by=request.user)
+    )
+    return _export_response(request, "competitions", export.COMPETITION_FIELDS, rows)
+
+
+def archive_list(request):
+    can_view_all = request.user.has_perm('competitions.can_view_all')
+    form = SearchForm(request.GET or None)
+    filters = form.cleaned_data if form.is_valid() else {}
+    competitions, ordering = filter_competitions(
+        filters, can_view_all,
+        queryset=ArchivedCompetition.objects.all(),
+        search_backend=get_archive_search_backend(),
+    )
+    page = KeysetPaginator(
+        competitions,
+        per_page=getattr(settings, 'COMPETITIONS_PAGE_SIZE', 20),
+        ordering=ordering,
+    ).get_page(after=request.GET.get('after'), before=request.GET.get('before'))
+    context = {**_page_context(request, page), 'form': form}
+    return render(request, 'competitions/archive_list.html', context)
+
+
+def archive_detail(request, pk):
+    competition = get_object_or_404(ArchivedCompetition.objects.select_related('created_by'), pk=pk)
+    if not competition.is_public and not request.user.has_perm('competitions.can_view_all'):
+        messages.error(request, "У вас нет доступа к этому соревнованию")
+        return redirect('archive_list')
+
+    is_participant = request.user.is_authenticated and ArchivedParticipant.objects.filter(
+        competition=competition,
+        user=request.user
+    ).exists()
+    context = {'competition': competition, 'is_participant': is_participant}
+    return render(request, 'competitions/archive_detail.html', context)
+
+
+def sport_calendar(request, sport_type):
+    if sport_type not in ical.SPORT_NAMES:
+        raise Http404("Неизвестный вид спорта")
+    return ical.response(request, ical.SportFeed(sport_type))
+
+
+def user_calendar(request, token):
+    user_id = ical.user_from_token(token)
+    username = user_id and User.objects.filter(pk=user_id, is_active=True).values_list('username', flat=True).first()
+    if not username:
+        raise Http404("Календарь не найден")
+    return ical.response(request, ical.UserFeed(user_id, username))
+
+
+@login_required
+def my_calendar(request):
+    # Адрес с токеном пользователь добавляет в приложение календаря
+    return redirect('user_calendar', token=ical.user_token(request.user))
+
+
 def custom_login(request):
     if request.method == 'POST':
         form = LoginForm(data=request.POST)
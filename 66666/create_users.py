@@ -6,62 +6,45 @@ from django.utils import timezone
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sports_competition.settings')
 django.setup()
 
-from django.contrib.auth.models import User, Group, Permission
-from django.contrib.contenttypes.models import ContentType
+from django.contrib.auth.models import User
 from competitions.models import Competition
-
-
-def create_users_and_permissions():
-    print("Создание пользователей и разрешений...")
-
-    # Создаем группы
-    admin_group, created = Group.objects.get_or_create(name='Администраторы')
-    organizer_group, created = Group.objects.get_or_create(name='Организаторы')
-    participant_group, created = Group.objects.get_or_create(name='Участники')
-
-    # Получаем ContentType для модели Competition
-    content_type = ContentType.objects.get_for_model(Competition)
-
-    # Получаем все разрешения
-    permissions = Permission.objects.filter(content_type=content_type)
-
-    # Назначаем разрешения группам
-    # Администраторы - все права
-    for perm in permissions:
-        admin_group.permissions.add(perm)
-
-    # Организаторы - могут создавать и редактировать свои соревнования
-    organizer_perms = [
-        'can_create_competition',
-        'can_edit_competition',
-        'can_delete_competition',
-        'can_register_participant',
-    ]
-    for perm_name in organizer_perms:
-        try:
-            perm = Permission.objects.get(codename=perm_name, content_type=content_type)
-            organizer_group.permissions.add(perm)
-        except Permission.DoesNotExist:
-            print(f"Разрешение {perm_name} не найдено")
-
-    # Участники - могут регистрироваться
-    participant_perms = ['can_register_participant']
-    for perm_name in participant_perms:
-        try:
-            perm = Permission.objects.get(codename=perm_name, content_type=content_type)
-            participant_group.permissions.add(perm)
-        except Permission.DoesNotExist:
-            print(f"Разрешение {perm_name} не найдено")
-
-    # Создаем тестовых пользователей
-    users = [
+from competitions.provisioning import provision
+
+
+# Группы, права и тестовые пользователи. Та же спецификация в YAML или CSV
+# применяется командой: python manage.py provision spec.yaml
+SPEC = {
+    'groups': {
+        # Администраторы - все права на соревнования
+        'Администраторы': [
+            'competitions.add_competition',
+            'competitions.change_competition',
+            'competitions.delete_competition',
+            'competitions.view_competition',
+            'competitions.can_view_all',
+            'competitions.can_create_competition',
+            'competitions.can_edit_competition',
+            'competitions.can_delete_competition',
+            'competitions.can_register_participant',
+        ],
+        # Организаторы - могут создавать и редактировать свои соревнования
+        'Организаторы': [
+            'competitions.can_create_competition',
+            'competitions.can_edit_competition',
+            'competitions.can_delete_competition',
+            'competitions.can_register_participant',
+        ],
+        # Участники - могут регистрироваться
+        'Участники': ['competitions.can_register_participant'],
+    },
+    'users': [
         {
             'username': 'admin',
             'password': 'admin123',
             'email': 'admin@example.com',
             'first_name': 'Иван',
             'last_name': 'Петров',
-            'groups': [admin_group]
+            'groups': ['Администраторы'],
         },
         {
             'username': 'organizer1',
@@ -69,7 +52,7 @@ def create_users_and_permissions():
             'email': 'org1@example.com',
             'first_name': 'Мария',
             'last_name': 'Сидорова',
-            'groups': [organizer_group]
+            'groups': ['Организаторы'],
         },
         {
             'username': 'organizer2',
@@ -77,7 +60,7 @@ def create_users_and_permissions():
             'email': 'org2@example.com',
             'first_name': 'Алексей',
             'last_name': 'Иванов',
-            'groups': [organizer_group]
+            'groups': ['Организаторы'],
         },
         {
             'username': 'participant1',
@@ -85,7 +68,7 @@ def create_users_and_permissions():
             'email': 'part1@example.com',
             'first_name': 'Сергей',
             'last_name': 'Кузнецов',
-            'groups': [participant_group]
+            'groups': ['Участники'],
         },
         {
             'username': 'participant2',
@@ -93,7 +76,7 @@ def create_users_and_permissions():
             'email': 'part2@example.com',
             'first_name': 'Ольга',
             'last_name': 'Смирнова',
-            'groups': [participant_group]
+            'groups': ['Участники'],
         },
         {
             'username': 'viewer',
@@ -101,30 +84,19 @@ def create_users_and_permissions():
             'email': 'viewer@example.com',
             'first_name': 'Дмитрий',
             'last_name': 'Федоров',
-            'groups': []  # Только просмотр
-        }
-    ]
+            'groups': [],  # Только просмотр
+        },
+    ],
+}
+
+
+def create_users_and_permissions():
+    print("Создание пользователей и разрешений...")
 
-    for user_data in users:
-        user, created = User.objects.get_or_create(
-            username=user_data['username'],
-            defaults={
-                'email': user_data['email'],
-                'first_name': user_data['first_name'],
-                'last_name': user_data['last_name'],
-                'is_active': True
-            }
-        )
-        if created:
-            user.set_password(user_data['password'])
-            user.save()
-            print(f"✓ Создан пользователь: {user.username}")
-        else:
-            print(f"⚠ Пользователь уже существует: {user.username}")
-
-        # Назначаем группы
-        for group in user_data['groups']:
-            user.groups.add(group)
+    report = provision(SPEC)
+    print(f"✓ Создано пользователей: {report.users_created}, "
+          f"добавлено прав групп: {report.permissions_added}, "
+          f"членств в группах: {report.memberships_added}")
 
     # Создаем тестовые соревнования
     create_test_competitions()
@@ -8,5 +8,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sports_competition.settings')
+# Страницы только для чтения обслуживаются асинхронными представлениями
+os.environ.setdefault('ASYNC_READ_VIEWS', '1')
 
-application = get_asgi_application()
\ No newline at end of file
+application = get_asgi_application()
@@ -2,8 +2,13 @@
 Django settings for sports_competition project.
 """
 
+from datetime import timedelta
 from pathlib import Path
 import os
+import tempfile
+
+import django
+from django.conf import global_settings
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,6 +33,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'competitions.instrumentation.QueryInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -41,7 +47,8 @@ ROOT_URLCONF = 'sports_competition.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates с замером времени рендеринга для Server-Timing
+        'BACKEND': 'competitions.instrumentation.InstrumentedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -58,13 +65,171 @@ TEMPLATES = [
 WSGI_APPLICATION = 'sports_competition.wsgi.application'
 
 # Database
+# Профили SQLite: PRAGMA применяются при открытии каждого соединения
+# (competitions.database). Профиль выбирается переменной окружения SQLITE_PROFILE;
+# 'default' оставляет настройки SQLite по умолчанию. 'production' переводит файл
+# базы в режим WAL (рядом появляются db.sqlite3-wal и -shm) — включайте его на сервере
+SQLITE_PROFILES = {
+    'default': {
+        'pragmas': {},
+        'transaction_mode': None,
+    },
+    'production': {
+        'pragmas': {
+            'journal_mode': 'WAL',
+            'synchronous': 'NORMAL',
+            'busy_timeout': 5000,  # мс
+            'mmap_size': 128 * 1024 * 1024,  # байт
+            'cache_size': -20000,  # отрицательное значение — в КиБ
+            'temp_store': 'MEMORY',
+        },
+        # BEGIN IMMEDIATE: транзакция сразу берет блокировку записи и ждет
+        # busy_timeout, а не падает с "database is locked" при повышении блокировки
+        'transaction_mode': 'IMMEDIATE',
+    },
+}
+SQLITE_PROFILE = os.environ.get('SQLITE_PROFILE', 'default')
+SQLITE_PRAGMAS = SQLITE_PROFILES[SQLITE_PROFILE]['pragmas']
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Постоянные соединения: PRAGMA не выполняются заново на каждый запрос
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {},
+        # Тестовая база в файле: параллельные тесты регистрации открывают
+        # соединения из нескольких потоков, а база в памяти у каждого своя
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# transaction_mode поддерживается бэкендом SQLite начиная с Django 5.1
+if SQLITE_PROFILES[SQLITE_PROFILE]['transaction_mode'] and django.VERSION >= (5, 1):
+    DATABASES['default']['OPTIONS']['transaction_mode'] = SQLITE_PROFILES[SQLITE_PROFILE]['transaction_mode']
+
+# Cache
+# Профиль кэша выбирается переменной окружения CACHE_PROFILE. Кэш прав, страниц
+# и сессий сбрасывается сигналами, поэтому должен быть общим для всех процессов:
+# shared — файлы в CACHE_LOCATION (по умолчанию во временном каталоге системы,
+# а не в дереве проекта), общие для процессов одного сервера
+# (для нескольких серверов укажите memcached или redis);
+# local — память процесса, только для одного процесса; записи прав и страниц
+# в нем живут не дольше LOCAL_CACHE_TIMEOUT секунд (competitions/shared_cache.py)
+CACHE_PROFILES = {
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'CACHE_LOCATION', str(Path(tempfile.gettempdir()) / 'sports_competition_cache'),
+        ),
+    },
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+}
+CACHE_PROFILE = os.environ.get('CACHE_PROFILE', 'shared')
+CACHES = {
+    'default': CACHE_PROFILES[CACHE_PROFILE],
+}
+LOCAL_CACHE_TIMEOUT = 30
+
+# Тесты пишут файловый кэш во временный каталог, удаляемый после прогона
+TEST_RUNNER = 'competitions.test_runner.TestRunner'
+
+# Sessions
+# Профиль хранения сессий выбирается переменной окружения SESSION_PROFILE:
+# db — таблица django_session в той же базе SQLite, что и данные;
+# cached_db — чтение из кэша, в базу пишутся только изменения сессии;
+# signed_cookies — сессия целиком в подписанной cookie, база не используется
+# (сессию нельзя отозвать на сервере до истечения SESSION_COOKIE_AGE)
+SESSION_ENGINES = {
+    'db': 'django.contrib.sessions.backends.db',
+    'cached_db': 'django.contrib.sessions.backends.cached_db',
+    'signed_cookies': 'django.contrib.sessions.backends.signed_cookies',
+}
+SESSION_PROFILE = os.environ.get('SESSION_PROFILE', 'cached_db')
+SESSION_ENGINE = SESSION_ENGINES[SESSION_PROFILE]
+SESSION_CACHE_ALIAS = 'default'
+
+# Асинхронные версии страниц списка, карточки и JSON API (competitions/async_views.py,
+# async_api.py). asgi.py включает их по умолчанию, под WSGI остаются синхронные
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', '0') == '1'
+
+# Живое обновление числа участников на карточке соревнования (competitions/live.py).
+# InProcessBroker — для одного процесса uvicorn, PollingBroker — для нескольких воркеров
+LIVE_UPDATES_BROKER = os.environ.get('LIVE_UPDATES_BROKER', 'competitions.live.InProcessBroker')
+LIVE_UPDATES_POLL_INTERVAL = 1.0
+# Период комментариев-пингов в потоке событий, секунды
+LIVE_UPDATES_HEARTBEAT = 15
+
+# Размер пачки строк, читаемых из базы при потоковой выгрузке
+EXPORT_CHUNK_SIZE = 2000
+
+# Сколько секунд прокси или CDN может отдавать анонимную карточку соревнования
+# без перепроверки (competitions/http_cache.py)
+HTTP_CACHE_S_MAXAGE = 10
+
+# Начиная с этого числа строк списки админки без фильтров показывают
+# оценку размера таблицы вместо COUNT(*) (competitions/admin.py)
+ADMIN_COUNT_ESTIMATE_THRESHOLD = 50000
+
+# Кэш страниц списка и карточки соревнования (competitions/page_cache.py)
+PAGE_CACHE_ALIAS = 'default'
+PAGE_CACHE_TIMEOUT = 5 * 60
+
+# Ленты iCalendar (competitions/ical.py): тела хранятся в кэше страниц под
+# ключом с версией ленты, поэтому срок хранения может быть долгим
+CALENDAR_PAST_DAYS = 30
+CALENDAR_CACHE_TIMEOUT = 60 * 60
+CALENDAR_MAX_AGE = 5 * 60
+CALENDAR_UID_DOMAIN = 'sports-competition'
+
+# Через сколько дней после окончания завершенные и отмененные соревнования
+# переносятся в архив командой archive_competitions (competitions/archive.py)
+ARCHIVE_AFTER_DAYS = 180
+
+# Наибольшая длительность соревнования: нижняя граница поиска пересечений
+# на площадке по индексу (competitions/schedule.py)
+COMPETITION_MAX_DURATION = timedelta(days=30)
+
+# Authentication
+# Права пользователей кэшируются между запросами и процессами
+# в общем кэше (см. CACHE_PROFILE)
+AUTHENTICATION_BACKENDS = ['competitions.backends.CachedModelBackend']
+PERMISSION_CACHE_ALIAS = 'default'
+PERMISSION_CACHE_TIMEOUT = 60 * 60
+
+# Бюджет SQL-запросов на один запрос к представлению (по имени URL).
+# QUERY_BUDGET_ACTION: 'log' — предупреждение в журнал, 'raise' — исключение
+QUERY_BUDGETS = {
+    'competition_list': 6,
+    'competition_detail': 8,
+    'competition_events': 3,
+    'register_participant': 12,
+    'api_competition_list': 5,
+    'api_competition_detail': 5,
+    'api_competition_participants': 6,
+    'sport_calendar': 2,
+    'user_calendar': 3,
+}
+QUERY_BUDGET_DEFAULT = None
+QUERY_BUDGET_ACTION = 'log'
+
+# Password hashing
+# Профиль выбирается переменной окружения PASSWORD_HASHER_PROFILE. 'loadtest'
+# хэширует пароли в сотни раз дешевле и нужен только нагрузочным стендам
+# (benchmark --scenario login); manage.py check --deploy предупреждает о нем
+PASSWORD_HASHER_PROFILES = {
+    'default': global_settings.PASSWORD_HASHERS,
+    'loadtest': [
+        'competitions.hashers.LoadTestPBKDF2PasswordHasher',
+        *global_settings.PASSWORD_HASHERS,
+    ],
+}
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'default')
+PASSWORD_HASHERS = PASSWORD_HASHER_PROFILES[PASSWORD_HASHER_PROFILE]
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -97,4 +262,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Login/Logout URLs
 LOGIN_URL = 'login'
 LOGIN_REDIRECT_URL = 'competition_list'
-LOGOUT_REDIRECT_URL = 'competition_list'
\ No newline at end of file
+LOGOUT_REDIRECT_URL = 'competition_list'
+
+# Количество соревнований на странице списка (курсорная пагинация)
+COMPETITIONS_PAGE_SIZE = 20